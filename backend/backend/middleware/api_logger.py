@@ -1,39 +1,69 @@
 import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import empty
 from lms.log_app import loggers
 
 
+def _logged_user(request):
+    """
+    The caller's email, if the view or its permissions already resolved
+    the principal. The log never resolves it itself, so requests that do
+    not need the caller skip the token checks.
+    """
+    principal = getattr(request, "principal", None)
+    if principal is None:
+        return "Anonymous"
+    if getattr(principal, "_wrapped", None) is empty:
+        return "Unresolved"
+    return principal.email if principal.is_authenticated else "Anonymous"
+
+
 class APILoggingMiddleware:
+    """Logs every request with its caller, status and duration, sync or async."""
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        start_time = time.time()
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
+        start_time = time.time()
         try:
             response = self.get_response(request)
-            status_code = response.status_code
-
         except Exception:
-            status_code = 500
-            loggers.error(
-                f"API Exception | {request.method} {request.path}",
-                exc_info=True
-            )
+            self._log_exception(request)
             raise
+        self._log(request, response, start_time)
+        return response
 
-        duration = round(time.time() - start_time, 3)
+    async def __acall__(self, request):
+        start_time = time.time()
+        try:
+            response = await self.get_response(request)
+        except Exception:
+            self._log_exception(request)
+            raise
+        self._log(request, response, start_time)
+        return response
 
-        user = (
-            request.user.username
-            if hasattr(request, "user") and request.user.is_authenticated
-            else "Anonymous"
+    def _log_exception(self, request):
+        loggers.error(
+            f"API Exception | {request.method} {request.path}",
+            exc_info=True
         )
 
+    def _log(self, request, response, start_time):
+        duration = round(time.time() - start_time, 3)
+
         loggers.info(
             f"{request.method} {request.path} | "
-            f"User: {user} | "
-            f"Status: {status_code} | "
+            f"User: {_logged_user(request)} | "
+            f"Status: {response.status_code} | "
             f"Duration: {duration}s"
         )
-
-        return response
@@ -1,20 +1,34 @@
-from django.utils.deprecation import MiddlewareMixin
-from user.utils.auth import decode_token
-from user.models import User
-
-class AuthMiddleware(MiddlewareMixin):
-    def process_request(self, request):
-        token = request.headers.get("Authorization")
-
-        if token and token.startswith("Bearer "):
-            token = token.split(" ")[1]
-            payload = decode_token(token)
-
-            if payload:
-                email = payload.get("email")
-                user = User.objects.filter(email=email).first()
-                request.current_user = user
-            else:
-                request.current_user = None
-        else:
-            request.current_user = None
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+from user.utils.auth import resolve_principal
+
+
+class AuthMiddleware:
+    """
+    Attach the bearer-token caller as ``request.principal``.
+
+    The token is only decoded, and the user only looked up, when something
+    reads the principal, so endpoints that never ask for it pay nothing.
+    Permissions, views and the access log all share this one object.
+
+    Works both ways, so under ASGI the async views are not pushed onto the
+    single thread-sensitive executor.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.principal = SimpleLazyObject(lambda: resolve_principal(request))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.principal = SimpleLazyObject(lambda: resolve_principal(request))
+        return await self.get_response(request)
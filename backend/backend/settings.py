@@ -60,6 +60,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.middleware.auth.AuthMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -179,6 +180,83 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [],
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "lms-default"),
+    }
+}
+
+# Authenticated users are cached by email for this many seconds
+USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", 300))
+
+# Lifetime of the rotating refresh tokens issued at login
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+
+# Login attempts allowed per email and per client IP within the window.
+# LOGIN_THROTTLE_BACKEND=cache shares the counters through CACHES.
+LOGIN_THROTTLE_WINDOW = int(os.getenv("LOGIN_THROTTLE_WINDOW", 300))
+LOGIN_THROTTLE_EMAIL_LIMIT = int(os.getenv("LOGIN_THROTTLE_EMAIL_LIMIT", 5))
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv("LOGIN_THROTTLE_IP_LIMIT", 20))
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+
+# Revoked access tokens: Bloom filter sizing and how often each worker
+# pulls new revocations from the database (seconds)
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 10000))
+REVOCATION_SYNC_INTERVAL = int(os.getenv("REVOCATION_SYNC_INTERVAL", 5))
+
+# Password hashing: Django hasher used for new hashes (older hashes are
+# upgraded at login) and the size of the bounded hashing pool
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "default")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 16))
+
+# Verified JWT payloads kept in-process by user.utils.auth.token_cache
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 1024))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+
+# Default and maximum page size of the keyset-paginated listings
+LISTING_PAGE_SIZE = int(os.getenv("LISTING_PAGE_SIZE", 100))
+LISTING_MAX_PAGE_SIZE = int(os.getenv("LISTING_MAX_PAGE_SIZE", 500))
+
+# Employee directory search: default/maximum matches returned and how often
+# each worker rebuilds its in-memory index regardless of signals (seconds)
+EMPLOYEE_SEARCH_LIMIT = int(os.getenv("EMPLOYEE_SEARCH_LIMIT", 10))
+EMPLOYEE_SEARCH_MAX_LIMIT = int(os.getenv("EMPLOYEE_SEARCH_MAX_LIMIT", 50))
+EMPLOYEE_SEARCH_REBUILD_INTERVAL = int(os.getenv("EMPLOYEE_SEARCH_REBUILD_INTERVAL", 600))
+
+# Bulk employee onboarding: upload size, rows per insert transaction and
+# processes used to hash the generated passwords
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", 10000))
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", 500))
+BULK_IMPORT_HASH_PROCESSES = int(os.getenv("BULK_IMPORT_HASH_PROCESSES", os.cpu_count() or 1))
+
+# Employees fetched per query by the streaming directory export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+
+# Employee photo variants: bounding-box sizes rendered (as WebP and JPEG),
+# background render threads, and the largest accepted image in pixels
+IMAGE_VARIANT_SIZES = tuple(
+    int(size) for size in os.getenv("IMAGE_VARIANT_SIZES", "64,160,480").split(",")
+)
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", 2))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 40_000_000))
+
+# Deleted employees: rows removed per purge statement and background purge
+# threads
+EMPLOYEE_PURGE_CHUNK_SIZE = int(os.getenv("EMPLOYEE_PURGE_CHUNK_SIZE", 500))
+EMPLOYEE_PURGE_WORKERS = int(os.getenv("EMPLOYEE_PURGE_WORKERS", 1))
+
+# Authenticated photo and attachment downloads: "django" streams the file,
+# "x-accel-redirect" (nginx) or "x-sendfile" (Apache) hand it to the proxy.
+# For nginx, MEDIA_ACCEL_PREFIX must be an internal location aliased to
+# MEDIA_ROOT
+MEDIA_DELIVERY = os.getenv("MEDIA_DELIVERY", "django")
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/protected-media/")
+
+# Bulk holiday import (CSV or iCalendar): most holidays accepted per upload
+HOLIDAY_IMPORT_MAX_ROWS = int(os.getenv("HOLIDAY_IMPORT_MAX_ROWS", 1000))
+
 
 
 
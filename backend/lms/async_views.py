@@ -0,0 +1,105 @@
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from user.permissions import (
+    IsEmployee,
+    IsHRManagerAdmin,
+    JWTAuthenticationPermission,
+    async_permission_classes,
+)
+from user.utils.auth import get_principal
+from user.utils.hierarchy import reports_of
+from .models import Holiday, LeaveRequest, shared_calendar_id
+from .serializers import HolidayListSerializer, LeaveRequestDetailSerializer
+from .utils.leave_requests import (
+    LeaveApplicationError,
+    asave_attachment,
+    prepare_leave_application,
+)
+
+# Native async counterparts of the I/O-bound endpoints in views.py. Under
+# ASGI they wait on the database and disk without holding a worker thread.
+
+
+@require_GET
+@async_permission_classes([JWTAuthenticationPermission, IsHRManagerAdmin])
+async def get_all_leaves(request):
+    principal = get_principal(request)
+
+    leaves = LeaveRequest.objects.filter(
+        employee__deleted_at__isnull=True
+    ).select_related("employee")
+    if principal.is_manager:
+        leaves = leaves.filter(
+            employee_id__in=reports_of(principal.user_id, principal.employee_id)
+        )
+
+    serializer = LeaveRequestDetailSerializer(
+        [leave async for leave in leaves],
+        many=True
+    )
+    return JsonResponse(serializer.data, safe=False, status=200)
+
+
+@require_GET
+@async_permission_classes([JWTAuthenticationPermission])
+async def get_holidays(request):
+    holidays = Holiday.objects.all().order_by("festival_date")
+    calendar_id = request.GET.get("calendar")
+    if calendar_id:
+        if not calendar_id.isdigit():
+            return JsonResponse({"error": "calendar must be an id"}, status=400)
+        shared = await sync_to_async(shared_calendar_id)()
+        holidays = holidays.filter(calendar_id__in=[shared, int(calendar_id)])
+    holidays = [holiday async for holiday in holidays]
+    serializer = HolidayListSerializer(holidays, many=True)
+
+    return JsonResponse(
+        {
+            "count": len(serializer.data),
+            "holidays": serializer.data
+        },
+        status=200
+    )
+
+
+@csrf_exempt
+@require_POST
+@async_permission_classes([JWTAuthenticationPermission, IsEmployee])
+async def apply_leave(request):
+    user = await get_principal(request).auser()
+    employee = await sync_to_async(lambda: user.employee)()
+
+    if request.content_type == "application/json":
+        # Same 400 as the parse error DRF raises for the sync view.
+        try:
+            data = json.loads(request.body or b"{}")
+        except json.JSONDecodeError as e:
+            return JsonResponse({"detail": f"JSON parse error - {e}"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"detail": "Expected a JSON object"}, status=400)
+    else:
+        data = request.POST
+
+    try:
+        values, sandwich_days = await sync_to_async(prepare_leave_application)(
+            employee, data
+        )
+    except LeaveApplicationError as e:
+        return JsonResponse(e.payload, status=e.status)
+
+    attachment = request.FILES.get("attachment")
+    if attachment:
+        values["attachment"] = await asave_attachment(attachment)
+
+    await LeaveRequest.objects.acreate(**values)
+
+    return JsonResponse(
+        {
+            "message": f"Leave request for {values['total_days']} days submitted successfully, including {sandwich_days} sandwich weekend day(s).",
+            "status": "Success"
+        },
+        status=201
+    )
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.asgi import get_asgi_application
+from django.db import connection
+from django.test import Client
+from user.models import User
+from user.utils.auth import create_user_token
+
+# (sync endpoint served through the WSGI handler, its native async twin)
+ENDPOINTS = [
+    ("/api/lms/all-leaves/", "/api/lms/async/all-leaves/"),
+    ("/api/lms/holidays/", "/api/lms/async/holidays/"),
+    ("/api/user/get/", "/api/user/async/get/"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at each sync endpoint through the WSGI "
+        "handler and at its async twin through the project's ASGI "
+        "application, full middleware chain included, and report requests "
+        "per second. The async twin is also run one request at a time: if "
+        "the concurrent rate is no better, something in the chain is "
+        "serializing requests onto one thread."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True, help="User to issue the bearer token for")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options["email"]).first()
+        if not user:
+            raise CommandError(f"No user with email {options['email']}")
+
+        headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_user_token(user)}",
+            "HTTP_HOST": settings.ALLOWED_HOSTS[0],
+        }
+        total = options["requests"]
+        concurrency = options["concurrency"]
+
+        application = get_asgi_application()
+        self.stdout.write(
+            f"{'endpoint':<32}{'WSGI req/s':>14}{'ASGI serial':>14}{'ASGI req/s':>14}{'errors':>8}"
+        )
+        for sync_path, async_path in ENDPOINTS:
+            wsgi = self.run_wsgi(sync_path, headers, total, concurrency)
+            serial, _ = asyncio.run(self.run_asgi(application, async_path, headers, total, 1))
+            asgi, errors = asyncio.run(
+                self.run_asgi(application, async_path, headers, total, concurrency)
+            )
+            self.stdout.write(
+                f"{sync_path:<32}{wsgi:>14.1f}{serial:>14.1f}{asgi:>14.1f}{errors:>8}"
+            )
+
+    def run_wsgi(self, path, headers, total, concurrency):
+        per_thread = max(1, total // concurrency)
+
+        def worker():
+            client = Client()
+            try:
+                for _ in range(per_thread):
+                    client.get(path, **headers)
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        return per_thread * concurrency / (time.perf_counter() - started)
+
+    @staticmethod
+    async def asgi_get(application, path, headers):
+        """One GET through the ASGI application, as a server would send it."""
+        host = headers["HTTP_HOST"]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", host.encode()),
+                (b"authorization", headers["HTTP_AUTHORIZATION"].encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": (host, 80),
+        }
+        requested = False
+        status = None
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # The client never disconnects; Django cancels this wait.
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await application(scope, receive, send)
+        return status
+
+    async def run_asgi(self, application, path, headers, total, concurrency):
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with limit:
+                return await self.asgi_get(application, path, headers)
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        return total / elapsed, sum(1 for status in statuses if status != 200)
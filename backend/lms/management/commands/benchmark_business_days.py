@@ -0,0 +1,68 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from lms.utils.business_days import leave_days, leave_days_batch
+from lms.utils.holidays import holiday_calendar
+from lms.utils.leave_utils import is_non_working_day
+
+# Range lengths in days: a day, a week, a month, a quarter and a year.
+SPANS = [1, 7, 30, 91, 365]
+
+
+def walk(start, end):
+    """The original day-by-day count, kept as the baseline."""
+    applied = 0
+    day = start
+    while day <= end:
+        applied += 1
+        day += timedelta(days=1)
+
+    sandwich = 0
+    day = start - timedelta(days=1)
+    while is_non_working_day(day):
+        sandwich += 1
+        day -= timedelta(days=1)
+    day = end + timedelta(days=1)
+    while is_non_working_day(day):
+        sandwich += 1
+        day += timedelta(days=1)
+    return applied, sandwich
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the business-day engine against the day-by-day walk for leave "
+        "ranges from one day to one year, singly and in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ranges", type=int, default=2000, help="Ranges per span")
+        parser.add_argument("--year", type=int, default=date.today().year)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        first = date(options["year"], 1, 1)
+        holiday_calendar.refresh()
+        # Warm the calendar so every column measures arithmetic only.
+        leave_days_batch([(first, first + timedelta(days=max(SPANS) * 2))])
+
+        self.stdout.write(
+            f"{'span':>6}{'walk ranges/s':>16}{'engine ranges/s':>18}{'batch ranges/s':>17}"
+        )
+        for span in SPANS:
+            ranges = []
+            for _ in range(options["ranges"]):
+                start = first + timedelta(days=rng.randrange(365))
+                ranges.append((start, start + timedelta(days=span - 1), None, None))
+
+            baseline = self.rate(lambda: [walk(start, end) for start, end, *_ in ranges], ranges)
+            single = self.rate(lambda: [leave_days(*values) for values in ranges], ranges)
+            batch = self.rate(lambda: leave_days_batch(ranges), ranges)
+            self.stdout.write(f"{span:>6}{baseline:>16.0f}{single:>18.0f}{batch:>17.0f}")
+
+    def rate(self, run, ranges):
+        started = time.perf_counter()
+        run()
+        return len(ranges) / (time.perf_counter() - started)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from lms.utils.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every employee with their roles, managers and leave balance "
+        "as CSV or NDJSON, streaming in chunks so memory stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write (defaults to stdout)")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        stream = export_stream(options["format"], options["chunk_size"])
+
+        if not options["output"]:
+            for part in stream:
+                self.stdout.write(part, ending="")
+            return
+
+        with open(options["output"], "w", newline="", encoding="utf-8") as handle:
+            for part in stream:
+                handle.write(part)
+        self.stderr.write(f"Export written to {options['output']}")
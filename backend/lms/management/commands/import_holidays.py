@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from lms.models import LeaveCalendar
+from lms.utils.holiday_import import HolidayImportError, import_holidays, parse_holidays
+
+
+class Command(BaseCommand):
+    help = (
+        "Import holidays from a .csv file (festival_date, festival_name "
+        "columns) or an .ics calendar in one transaction, invalidating the "
+        "holiday calendar once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help=".csv or .ics file to import")
+        parser.add_argument("--calendar", help="Calendar name (defaults to the shared calendar)")
+        parser.add_argument(
+            "--update-existing",
+            action="store_true",
+            help="Rename holidays already on an imported date instead of failing"
+        )
+
+    def handle(self, *args, **options):
+        calendar = None
+        if options["calendar"]:
+            calendar = LeaveCalendar.objects.filter(name=options["calendar"]).first()
+            if calendar is None:
+                raise CommandError(f"No calendar named {options['calendar']!r}")
+
+        try:
+            with open(options["path"], encoding="utf-8-sig") as handle:
+                rows = parse_holidays(options["path"], handle.read())
+            results = import_holidays(
+                rows,
+                calendar=calendar,
+                update_existing=options["update_existing"]
+            )
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        except HolidayImportError as e:
+            for result in e.results:
+                if result["status"] == "error":
+                    self.stderr.write(f"Row {result['row']}: {result['errors']}")
+            raise CommandError(str(e))
+
+        created = sum(1 for result in results if result["status"] == "created")
+        self.stdout.write(f"Imported {created} holidays, updated {len(results) - created}")
@@ -0,0 +1,40 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from lms.models import LeaveCalendar
+from lms.utils.calendar_days import calendar_span, sync_calendar_days
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the calendar_days table from the holiday calendar for a "
+        "range of years, extending it if needed, for the shared calendar or "
+        "one named calendar. With no years, rebuilds the years already "
+        "present, or this year and the next."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="first", type=int, help="First year")
+        parser.add_argument("--to", dest="last", type=int, help="Last year")
+        parser.add_argument("--calendar", help="Calendar name (defaults to the shared calendar)")
+
+    def handle(self, *args, **options):
+        calendar = None
+        if options["calendar"]:
+            calendar = (
+                LeaveCalendar.objects.filter(name=options["calendar"])
+                .values_list("id", flat=True)
+                .first()
+            )
+            if calendar is None:
+                raise CommandError(f"No calendar named {options['calendar']!r}")
+
+        first, last = calendar_span(calendar)
+        this_year = date.today().year
+        first = options["first"] or first or this_year
+        last = options["last"] or last or max(first, this_year + 1)
+        if last < first:
+            raise CommandError("--to must not be before --from")
+
+        sync_calendar_days(range(first, last + 1), calendar)
+        first, last = calendar_span(calendar)
+        self.stdout.write(f"calendar_days covers {first}-{last}")
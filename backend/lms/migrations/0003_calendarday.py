@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0002_holiday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarDay',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField(unique=True)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('is_weekend', models.BooleanField(default=False)),
+                ('is_holiday', models.BooleanField(default=False)),
+                ('is_working_day', models.BooleanField(default=True)),
+                ('working_day_ordinal', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'calendar_days',
+                'indexes': [models.Index(fields=['year', 'month'], name='calendar_days_year_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0003_calendarday'),
+        ('user', '0009_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveCalendar',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'leave_calendars',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='calendarday',
+            name='day',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='holiday',
+            name='festival_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.CreateModel(
+            name='EmployeeCalendar',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_assignment', to='user.employee')),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='lms.leavecalendar')),
+            ],
+            options={
+                'db_table': 'employee_calendars',
+            },
+        ),
+        migrations.CreateModel(
+            name='CalendarYearBitset',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('holidays', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('calendar', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='year_bitsets', to='lms.leavecalendar')),
+            ],
+            options={
+                'db_table': 'calendar_year_bitsets',
+            },
+        ),
+        migrations.AddField(
+            model_name='calendarday',
+            name='calendar',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='days', to='lms.leavecalendar'),
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='calendar',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='lms.leavecalendar'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendarday',
+            constraint=models.UniqueConstraint(condition=models.Q(('calendar__isnull', True)), fields=('day',), name='calendar_days_shared_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendarday',
+            constraint=models.UniqueConstraint(fields=('calendar', 'day'), name='calendar_days_calendar_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='holiday',
+            constraint=models.UniqueConstraint(condition=models.Q(('calendar__isnull', True)), fields=('festival_date',), name='holiday_shared_date_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='holiday',
+            constraint=models.UniqueConstraint(fields=('calendar', 'festival_date'), name='holiday_calendar_date_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendaryearbitset',
+            constraint=models.UniqueConstraint(condition=models.Q(('calendar__isnull', True)), fields=('year',), name='calendar_year_bitsets_shared_year'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendaryearbitset',
+            constraint=models.UniqueConstraint(fields=('calendar', 'year'), name='calendar_year_bitsets_calendar_year'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+import django.db.models.deletion
+import lms.models
+from django.db import migrations, models
+
+SHARED_CALENDAR_NAME = "Shared"
+
+
+def seed_shared_calendar(apps, schema_editor):
+    LeaveCalendar = apps.get_model("lms", "LeaveCalendar")
+    Holiday = apps.get_model("lms", "Holiday")
+    CalendarYearBitset = apps.get_model("lms", "CalendarYearBitset")
+    CalendarDay = apps.get_model("lms", "CalendarDay")
+
+    shared, _ = LeaveCalendar.objects.get_or_create(name=SHARED_CALENDAR_NAME)
+
+    # Databases without partial indexes (MySQL) may hold duplicate shared
+    # dates; keep the oldest holiday of each.
+    kept = set()
+    duplicates = []
+    for holiday_id, festival_date in (
+        Holiday.objects.filter(calendar__isnull=True)
+        .order_by("festival_date", "id")
+        .values_list("id", "festival_date")
+    ):
+        if festival_date in kept:
+            duplicates.append(holiday_id)
+        kept.add(festival_date)
+    Holiday.objects.filter(id__in=duplicates).delete()
+    Holiday.objects.filter(calendar__isnull=True).update(calendar=shared)
+
+    # Derived rows; they are rebuilt on first use.
+    CalendarYearBitset.objects.filter(calendar__isnull=True).delete()
+    CalendarDay.objects.filter(calendar__isnull=True).delete()
+
+
+def unseed_shared_calendar(apps, schema_editor):
+    LeaveCalendar = apps.get_model("lms", "LeaveCalendar")
+    Holiday = apps.get_model("lms", "Holiday")
+    CalendarYearBitset = apps.get_model("lms", "CalendarYearBitset")
+    CalendarDay = apps.get_model("lms", "CalendarDay")
+
+    shared = LeaveCalendar.objects.filter(name=SHARED_CALENDAR_NAME).first()
+    if shared is None:
+        return
+    Holiday.objects.filter(calendar=shared).update(calendar=None)
+    CalendarYearBitset.objects.filter(calendar=shared).delete()
+    CalendarDay.objects.filter(calendar=shared).delete()
+    shared.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms', '0004_leave_calendars'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_shared_calendar, unseed_shared_calendar),
+        migrations.RemoveConstraint(
+            model_name='holiday',
+            name='holiday_shared_date_unique',
+        ),
+        migrations.RemoveConstraint(
+            model_name='calendaryearbitset',
+            name='calendar_year_bitsets_shared_year',
+        ),
+        migrations.RemoveConstraint(
+            model_name='calendarday',
+            name='calendar_days_shared_day',
+        ),
+        migrations.AlterField(
+            model_name='holiday',
+            name='calendar',
+            field=models.ForeignKey(default=lms.models.shared_calendar_id, on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='lms.leavecalendar'),
+        ),
+        migrations.AlterField(
+            model_name='calendaryearbitset',
+            name='calendar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='year_bitsets', to='lms.leavecalendar'),
+        ),
+        migrations.AlterField(
+            model_name='calendarday',
+            name='calendar',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='lms.leavecalendar'),
+        ),
+    ]
@@ -88,10 +88,73 @@ class LeaveBalance(models.Model):
     class Meta:
         db_table = "leave_balances"
 
+class LeaveCalendar(models.Model):
+    """
+    A named holiday calendar, such as one per office. The seeded "Shared"
+    calendar holds the holidays every calendar observes; employees without
+    an ``EmployeeCalendar`` assignment observe only those.
+    """
+
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "leave_calendars"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+SHARED_CALENDAR_NAME = "Shared"
+_shared_calendar = {}
+
+
+def shared_calendar_id():
+    """
+    Id of the shared calendar. It is a real row rather than a null key so
+    that plain unique constraints cover it on every database backend.
+    """
+    if "id" not in _shared_calendar:
+        _shared_calendar["id"] = LeaveCalendar.objects.get_or_create(name=SHARED_CALENDAR_NAME)[0].pk
+    return _shared_calendar["id"]
+
+
+class EmployeeCalendar(models.Model):
+    id = models.AutoField(primary_key=True)
+
+    employee = models.OneToOneField(
+        Employee,
+        related_name="calendar_assignment",
+        on_delete=models.CASCADE
+    )
+    calendar = models.ForeignKey(
+        LeaveCalendar,
+        related_name="assignments",
+        on_delete=models.CASCADE
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "employee_calendars"
+
+
 class Holiday(models.Model):
     id = models.AutoField(primary_key=True)
 
-    festival_date = models.DateField(unique=True)
+    calendar = models.ForeignKey(
+        LeaveCalendar,
+        related_name="holidays",
+        on_delete=models.CASCADE,
+        default=shared_calendar_id
+    )
+
+    festival_date = models.DateField(db_index=True)
     festival_name = models.CharField(max_length=100)
 
     created_by = models.ForeignKey(
@@ -113,6 +176,94 @@ class Holiday(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_festival_date = instance.__dict__.get("festival_date")
+        instance._loaded_calendar_id = instance.__dict__.get("calendar_id")
+        return instance
+
     class Meta:
         db_table = "holiday_calendar"
         ordering = ["festival_date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["calendar", "festival_date"],
+                name="holiday_calendar_date_unique"
+            ),
+        ]
+
+
+class CalendarYearBitset(models.Model):
+    """
+    The holidays of one calendar-year, precomputed: bit ``n`` of
+    ``holidays`` (little-endian bytes) is day ``n`` of the year, 0 being
+    1 January. A calendar's bitset already includes the shared holidays,
+    so any employee's year loads as a single row. Rows are rebuilt by the
+    holiday signals and created on first use by ``lms.utils.holidays``.
+    """
+
+    id = models.AutoField(primary_key=True)
+
+    calendar = models.ForeignKey(
+        LeaveCalendar,
+        related_name="year_bitsets",
+        on_delete=models.CASCADE
+    )
+    year = models.PositiveSmallIntegerField()
+    holidays = models.BinaryField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "calendar_year_bitsets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["calendar", "year"],
+                name="calendar_year_bitsets_calendar_year"
+            ),
+        ]
+
+
+class CalendarDay(models.Model):
+    """
+    One row per date and calendar, so reports can join leave ranges against
+    weekends and holidays in SQL. ``working_day_ordinal`` counts the
+    calendar's working days from its first row up to and including this
+    one, so the working days of ``start..end`` are the ordinal of ``end``
+    minus the ordinal of the day before ``start``. Kept in step with
+    ``Holiday`` by ``lms.utils.calendar_days``.
+    """
+
+    id = models.AutoField(primary_key=True)
+
+    calendar = models.ForeignKey(
+        LeaveCalendar,
+        related_name="days",
+        on_delete=models.CASCADE
+    )
+
+    day = models.DateField()
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    weekday = models.PositiveSmallIntegerField()  # 0 is Monday
+
+    is_weekend = models.BooleanField(default=False)
+    is_holiday = models.BooleanField(default=False)
+    is_working_day = models.BooleanField(default=True)
+    working_day_ordinal = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = "calendar_days"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["calendar", "day"],
+                name="calendar_days_calendar_day"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["year", "month"], name="calendar_days_year_month"),
+        ]
+
+    def __str__(self):
+        return str(self.day)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import LeaveBalance, Holiday, LeaveRequest
+from .models import LeaveBalance, Holiday, LeaveCalendar, LeaveRequest, shared_calendar_id
 
 class LeaveBalanceCreateSerializer(serializers.ModelSerializer):
     employee_id = serializers.IntegerField(write_only=True)
@@ -57,12 +57,27 @@ class LeaveRequestDetailSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 class HolidayCreateSerializer(serializers.ModelSerializer):
+    # Declared so no per-row unique lookup is generated: the views and the
+    # bulk import check duplicates per calendar themselves.
+    festival_date = serializers.DateField()
+    # Null still means the shared calendar.
+    calendar = serializers.PrimaryKeyRelatedField(
+        queryset=LeaveCalendar.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
     class Meta:
         model = Holiday
         fields = [
             "festival_date",
             "festival_name",
+            "calendar",
         ]
+        validators = []
+
+    def validate_calendar(self, value):
+        return value or LeaveCalendar.objects.get(pk=shared_calendar_id())
 
 class HolidayListSerializer(serializers.ModelSerializer):
     class Meta:
@@ -71,5 +86,30 @@ class HolidayListSerializer(serializers.ModelSerializer):
             "id",
             "festival_name",
             "festival_date",
+            "calendar",
         ]
 
+class LeaveCalendarSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LeaveCalendar
+        fields = [
+            "id",
+            "name",
+        ]
+
+
+class EmployeeCalendarAssignSerializer(serializers.Serializer):
+    calendar = serializers.PrimaryKeyRelatedField(
+        queryset=LeaveCalendar.objects.all(),
+        allow_null=True
+    )
+
+
+class HolidayImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    calendar = serializers.PrimaryKeyRelatedField(
+        queryset=LeaveCalendar.objects.all(),
+        required=False,
+        allow_null=True
+    )
+    update_existing = serializers.BooleanField(default=False)
@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Holiday
+from .utils.calendar_days import refresh_calendar_days
+from .utils.holidays import holiday_calendar, rebuild_year_bitsets
+
+
+def _holiday_scopes(instance):
+    """The ``(calendar_id, year)`` pairs the holiday left or joined."""
+    to_date = Holiday._meta.get_field("festival_date").to_python
+    scopes = {(instance.calendar_id, to_date(instance.festival_date).year)}
+    loaded_date = getattr(instance, "_loaded_festival_date", None)
+    if loaded_date:
+        scopes.add((getattr(instance, "_loaded_calendar_id", None), to_date(loaded_date).year))
+    return scopes
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_holiday_calendar(sender, instance, **kwargs):
+    # Only the calendar-years the holiday left or joined are rebuilt.
+    scopes = _holiday_scopes(instance)
+    instance._loaded_festival_date = instance.festival_date
+    instance._loaded_calendar_id = instance.calendar_id
+
+    def changed():
+        rebuild_year_bitsets(scopes)
+        for calendar in {calendar for calendar, _ in scopes}:
+            years = {year for scope, year in scopes if scope == calendar}
+            holiday_calendar.invalidate(years, calendar)
+            refresh_calendar_days(years, calendar)
+
+    transaction.on_commit(changed)
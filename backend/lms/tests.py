@@ -1,3 +1,801 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from user.models import Employee, EmployeeManagerMap, User
+from user.utils.auth import create_user_token
+from .models import CalendarDay, CalendarYearBitset, EmployeeCalendar, Holiday, LeaveBalance, LeaveCalendar, LeaveRequest, shared_calendar_id
+from .utils import calculate_leave_with_weekend_sandwich
+from .utils.business_days import leave_days, leave_days_batch
+from .utils.calendar_days import leave_working_days_by_month, sync_calendar_days
+from .utils.holiday_import import HolidayImportError, import_holidays, parse_holidays
+from .utils.holidays import VERSION_KEY
+from .utils.exports import directory_chunks
+from .utils.holidays import HolidayCalendar, calendar_for, holiday_calendar
+
+
+def make_user(empid, email, **roles):
+    employee = Employee.objects.create(
+        empid=empid,
+        name=empid.lower(),
+        email=email,
+        password="!",
+    )
+    return User.objects.create(
+        email=email,
+        hashed_password="!",
+        is_employee=True,
+        employee=employee,
+        **roles
+    )
+
+
+def next_weekday(days_ahead=7):
+    day = date.today() + timedelta(days=days_ahead)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_user("MGR1", "manager@example.com", is_manager=True)
+        cls.employee = make_user("EMP1", "employee@example.com")
+        cls.other = make_user("EMP2", "other@example.com")
+
+        EmployeeManagerMap.objects.create(
+            employee=cls.employee.employee,
+            manager=cls.manager
+        )
+        LeaveBalance.objects.create(employee=cls.employee.employee, casual_leave=5)
+        for user in (cls.employee, cls.other):
+            LeaveRequest.objects.create(
+                employee=user.employee,
+                leave_type="casual",
+                start_date="2030-01-07",
+                end_date="2030-01-07",
+                total_days=1,
+            )
+        Holiday.objects.create(festival_date="2030-01-01", festival_name="New Year")
+
+    def setUp(self):
+        cache.clear()
+
+    def auth(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {create_user_token(user)}"}
+
+    def test_manager_sees_only_mapped_leaves(self):
+        response = self.client.get(
+            reverse("all-leaves-async"), **self.auth(self.manager)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [leave["employee"] for leave in response.json()],
+            [self.employee.employee.id]
+        )
+
+    def test_role_checks_match_sync_views(self):
+        response = self.client.get(
+            reverse("all-leaves-async"), **self.auth(self.employee)
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(reverse("get-holidays-async"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_holidays(self):
+        response = self.client.get(
+            reverse("get-holidays-async"), **self.auth(self.employee)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_apply_leave(self):
+        day = next_weekday()
+        response = self.client.post(
+            reverse("apply-leave-async"),
+            {
+                "leave_type": "casual",
+                "start_date": day.isoformat(),
+                "end_date": day.isoformat(),
+            },
+            **self.auth(self.employee)
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            LeaveRequest.objects.filter(
+                employee=self.employee.employee, start_date=day
+            ).exists()
+        )
+
+    def test_apply_leave_rejects_malformed_json(self):
+        for body in ("{not json", "[1, 2]"):
+            response = self.client.post(
+                reverse("apply-leave-async"),
+                body,
+                content_type="application/json",
+                **self.auth(self.employee)
+            )
+            self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            reverse("apply-leave"),
+            "{not json",
+            content_type="application/json",
+            **self.auth(self.employee)
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class DirectoryExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR1", "hr@example.com", is_hr=True, is_manager=True)
+        cls.employees = [make_user(f"EMP{i}", f"emp{i}@example.com") for i in range(5)]
+        EmployeeManagerMap.objects.create(employee=cls.employees[0].employee, manager=cls.hr)
+        LeaveBalance.objects.create(employee=cls.employees[0].employee, casual_leave=4.5)
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, **params):
+        return self.client.get(
+            reverse("export-directory"),
+            params,
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+
+    def test_csv_export_streams_every_employee(self):
+        response = self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 6)
+
+        first = next(row for row in rows if row["empid"] == "EMP0")
+        self.assertEqual(first["manager_emails"], "hr@example.com")
+        self.assertEqual(first["casual_leave"], "4.5")
+        self.assertEqual(first["is_employee"], "True")
+
+    def test_query_count_is_per_chunk(self):
+        chunks = list(directory_chunks(chunk_size=2))
+        self.assertEqual([len(rows) for rows in chunks], [2, 2, 2])
+
+        with self.assertNumQueries(4 * 3 + 1):
+            list(directory_chunks(chunk_size=2))
+
+    def test_ndjson_export_and_bad_format(self):
+        response = self.export(output="ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])["empid"], "HR1")
+        self.assertEqual(self.export(output="xml").status_code, 400)
+
+
+class AttachmentDownloadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = make_user("MGR3", "dl-manager@example.com", is_manager=True)
+        cls.employee = make_user("EMP3", "dl-employee@example.com")
+        cls.other = make_user("EMP4", "dl-other@example.com")
+        EmployeeManagerMap.objects.create(employee=cls.employee.employee, manager=cls.manager)
+        cls.leave = LeaveRequest.objects.create(
+            employee=cls.employee.employee,
+            leave_type="sick",
+            start_date="2030-01-07",
+            end_date="2030-01-07",
+            total_days=1,
+            attachment="uploads/note.pdf",
+        )
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.content = bytes(range(256)) * 4
+        os.makedirs(os.path.join(media, "uploads"))
+        with open(os.path.join(media, "uploads", "note.pdf"), "wb") as handle:
+            handle.write(self.content)
+
+    def download(self, user, **headers):
+        return self.client.get(
+            reverse("leave-attachment", args=[self.leave.id]),
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(user)}",
+            **headers
+        )
+
+    def test_owner_and_managers_only(self):
+        response = self.download(self.employee)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertIn("attachment;", response["Content-Disposition"])
+
+        self.assertEqual(self.download(self.manager).status_code, 200)
+        self.assertEqual(self.download(self.other).status_code, 403)
+
+    def test_ranges(self):
+        response = self.download(self.employee, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = self.download(self.employee, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.download(self.employee, HTTP_RANGE="bytes=2000-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */1024")
+
+        # Several ranges, or a stale If-Range, get the whole file.
+        self.assertEqual(self.download(self.employee, HTTP_RANGE="bytes=0-1,5-6").status_code, 200)
+        response = self.download(self.employee, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conditional_requests(self):
+        first = self.download(self.employee)
+        etag, last_modified = first["ETag"], first["Last-Modified"]
+
+        self.assertEqual(self.download(self.employee, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.download(self.employee, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304
+        )
+        response = self.download(self.employee, HTTP_RANGE="bytes=0-3", HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+    def test_proxy_handoff(self):
+        with mock.patch("user.utils.downloads.MEDIA_DELIVERY", "x-accel-redirect"):
+            response = self.download(self.employee)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/uploads/note.pdf")
+        self.assertEqual(response.content, b"")
+
+
+class HolidayCalendarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR5", "calendar-hr@example.com", is_hr=True)
+        # Friday 2030-03-08 and Monday 2030-03-11 around a weekend.
+        for day in ("2030-03-08", "2030-03-11", "2031-01-01"):
+            Holiday.objects.create(festival_date=day, festival_name="Holiday")
+
+    def setUp(self):
+        cache.clear()
+        holiday_calendar.reset()
+
+    def test_one_query_per_stored_year(self):
+        # The first worker builds the year's bitset and stores it.
+        with self.assertNumQueries(3):
+            calculate_leave_with_weekend_sandwich(date(2030, 3, 6), date(2030, 3, 6))
+        holiday_calendar.reset()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                calculate_leave_with_weekend_sandwich(date(2030, 3, 6), date(2030, 3, 6)),
+                (1, 0)
+            )
+            # The day after the holiday-weekend-holiday block sandwiches it.
+            self.assertEqual(
+                calculate_leave_with_weekend_sandwich(date(2030, 3, 12), date(2030, 3, 12)),
+                (5, 4)
+            )
+        self.assertTrue(holiday_calendar.is_holiday(date(2031, 1, 1)))
+        self.assertFalse(holiday_calendar.is_holiday(date(2031, 1, 2)))
+        self.assertEqual(holiday_calendar.stats()["years"], [2030, 2031])
+
+    def test_changes_reach_other_workers(self):
+        other_worker = HolidayCalendar()
+        other_worker.refresh()
+        self.assertFalse(other_worker.is_holiday(date(2030, 3, 12)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Create holiday"),
+                {"festival_date": "2030-03-12", "festival_name": "Extra"},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+            )
+        self.assertEqual(response.status_code, 201)
+
+        other_worker.refresh()
+        self.assertTrue(other_worker.is_holiday(date(2030, 3, 12)))
+        self.assertEqual(other_worker.loads, 2)
+
+
+class BusinessDayTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = make_user("EMP6", "business-days@example.com")
+        LeaveBalance.objects.create(employee=cls.employee.employee, casual_leave=20)
+        cls.holidays = {date(2030, 12, 31), date(2031, 1, 1), date(2031, 4, 14), date(2031, 4, 18)}
+        for day in cls.holidays:
+            Holiday.objects.create(festival_date=day, festival_name="Holiday")
+
+    def setUp(self):
+        cache.clear()
+        holiday_calendar.reset()
+
+    def walk(self, start, end):
+        def off(day):
+            return day.weekday() >= 5 or day in self.holidays
+
+        sandwich = 0
+        day = start - timedelta(days=1)
+        while off(day):
+            sandwich, day = sandwich + 1, day - timedelta(days=1)
+        day = end + timedelta(days=1)
+        while off(day):
+            sandwich, day = sandwich + 1, day + timedelta(days=1)
+        non_working = sum(off(start + timedelta(days=n)) for n in range((end - start).days + 1))
+        return sandwich, non_working
+
+    def test_batch_matches_a_day_by_day_walk(self):
+        ranges = [
+            (date(2030, 12, 1) + timedelta(days=offset), date(2030, 12, 1) + timedelta(days=offset + span))
+            for offset in range(0, 160, 3)
+            for span in (1, 4, 13, 60, 365)
+        ]
+        # Every year is built and stored at once, then read back as one query.
+        with self.assertNumQueries(3):
+            leave_days_batch(ranges)
+        holiday_calendar.reset()
+        with self.assertNumQueries(1):
+            results = leave_days_batch(ranges)
+
+        for (start, end), result in zip(ranges, results):
+            sandwich, non_working = self.walk(start, end)
+            days = (end - start).days + 1
+            self.assertEqual(result.sandwich_days, sandwich, (start, end))
+            self.assertEqual(result.non_working_days, non_working, (start, end))
+            self.assertEqual(result.working_days, days - non_working)
+            self.assertEqual(result.total_days, days + sandwich)
+
+    def test_half_days_and_single_days(self):
+        # Thursday 2031-04-17 lies between two holidays and next to a weekend.
+        self.assertEqual(leave_days(date(2031, 4, 17), date(2031, 4, 17)).total_days, 1)
+        self.assertEqual(leave_days(date(2031, 4, 17), date(2031, 4, 17), "first").total_days, Decimal("0.5"))
+        self.assertEqual(
+            leave_days(date(2031, 4, 15), date(2031, 4, 17), "second", "first"),
+            (Decimal("8"), 6, 3, 0)
+        )
+
+    def test_apply_and_update_share_the_rules(self):
+        monday = next_weekday(14)
+        monday += timedelta(days=-monday.weekday())
+        client_headers = {"HTTP_AUTHORIZATION": f"Bearer {create_user_token(self.employee)}"}
+
+        response = self.client.post(
+            reverse("apply-leave"),
+            {
+                "leave_type": "casual",
+                "start_date": monday.isoformat(),
+                "end_date": (monday + timedelta(days=1)).isoformat(),
+                "half_day_end_type": "first",
+            },
+            **client_headers
+        )
+        self.assertEqual(response.status_code, 201)
+        leave = LeaveRequest.objects.get(employee=self.employee.employee)
+        expected = leave_days(monday, monday + timedelta(days=1), None, "first").total_days
+        self.assertEqual(leave.total_days, expected)
+        self.assertEqual(expected % 1, Decimal("0.5"))
+
+        response = self.client.patch(
+            reverse("update-leave", args=[leave.id]),
+            {"end_date": (monday + timedelta(days=4)).isoformat()},
+            content_type="application/json",
+            **client_headers
+        )
+        self.assertEqual(response.status_code, 200)
+        leave.refresh_from_db()
+        self.assertEqual(leave.total_days, leave_days(monday, monday + timedelta(days=4)).total_days)
+
+
+class WorkingDayPrefixTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR8", "prefix-hr@example.com", is_hr=True)
+        cls.holiday = Holiday.objects.create(festival_date="2030-05-01", festival_name="May Day")
+        Holiday.objects.create(festival_date="2031-12-25", festival_name="Christmas")
+        Holiday.objects.create(festival_date="2032-01-01", festival_name="New Year")
+
+    def setUp(self):
+        cache.clear()
+        holiday_calendar.reset()
+
+    def test_range_counts_match_a_day_walk(self):
+        holidays = {date(2030, 5, 1), date(2031, 12, 25), date(2032, 1, 1)}
+        start = date(2029, 12, 20)
+        holiday_calendar.preload(range(2029, 2034))
+
+        with self.assertNumQueries(0):
+            for offset in range(0, 900, 37):
+                for span in (0, 1, 6, 30, 400):
+                    first = start + timedelta(days=offset)
+                    last = first + timedelta(days=span)
+                    expected = sum(
+                        1 for n in range(span + 1)
+                        if (first + timedelta(days=n)).weekday() < 5
+                        and first + timedelta(days=n) not in holidays
+                    )
+                    self.assertEqual(holiday_calendar.working_days(first, last), expected)
+
+    def test_only_changed_years_are_rebuilt(self):
+        holiday_calendar.preload([2030, 2031, 2032])
+        kept = holiday_calendar.year(2032)
+        may = date(2030, 5, 1)
+        self.assertEqual(holiday_calendar.working_days(may, may), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("update-holiday", args=[self.holiday.id]),
+                {"festival_date": "2031-05-01"},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+            )
+        self.assertEqual(response.status_code, 200)
+
+        holiday_calendar.refresh()
+        self.assertEqual(holiday_calendar.stats()["years"], [2032])
+        self.assertIs(holiday_calendar.year(2032), kept)
+        self.assertEqual(holiday_calendar.working_days(may, may), 1)
+        self.assertEqual(holiday_calendar.working_days(date(2031, 5, 1), date(2031, 5, 1)), 0)
+
+
+class CalendarDimensionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR9", "dimension-hr@example.com", is_hr=True)
+        cls.employee = make_user("EMP9", "dimension-emp@example.com")
+        cls.holiday = Holiday.objects.create(festival_date="2030-05-01", festival_name="May Day")
+
+    def setUp(self):
+        cache.clear()
+        holiday_calendar.reset()
+
+    def test_rows_match_the_holiday_calendar(self):
+        sync_calendar_days([2031])
+        sync_calendar_days([2029])
+        days = list(CalendarDay.objects.order_by("day"))
+
+        self.assertEqual(len(days), 365 * 3)
+        self.assertEqual((days[0].day, days[-1].day), (date(2029, 1, 1), date(2031, 12, 31)))
+        may = CalendarDay.objects.get(day=date(2030, 5, 1))
+        self.assertTrue(may.is_holiday)
+        self.assertFalse(may.is_working_day)
+        for row in days[::29]:
+            self.assertEqual(row.weekday, row.day.weekday())
+            self.assertEqual(
+                row.working_day_ordinal,
+                holiday_calendar.working_days(date(2029, 1, 1), row.day)
+            )
+
+    def test_holiday_changes_resync_the_table(self):
+        sync_calendar_days([2030, 2031])
+        last = CalendarDay.objects.get(day=date(2031, 12, 31)).working_day_ordinal
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("update-holiday", args=[self.holiday.id]),
+                {"festival_date": "2030-05-02"},
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(CalendarDay.objects.get(day=date(2030, 5, 1)).is_working_day)
+        self.assertTrue(CalendarDay.objects.get(day=date(2030, 5, 2)).is_holiday)
+        self.assertEqual(CalendarDay.objects.get(day=date(2031, 12, 31)).working_day_ordinal, last)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(festival_date="2030-12-25", festival_name="Christmas")
+        self.assertEqual(CalendarDay.objects.get(day=date(2031, 12, 31)).working_day_ordinal, last - 1)
+
+    def test_report_aggregates_working_days_in_sql(self):
+        employee = self.employee.employee
+        # Mon 29 Apr to Fri 10 May 2030 with a half day at the start;
+        # 1 May is a holiday and 4-5 May a weekend.
+        LeaveRequest.objects.create(
+            employee=employee, leave_type="casual", status="approved",
+            start_date=date(2030, 4, 29), end_date=date(2030, 5, 10),
+            half_day_start_type="second_half"
+        )
+        LeaveRequest.objects.create(
+            employee=employee, leave_type="casual", status="pending",
+            start_date=date(2030, 6, 3), end_date=date(2030, 6, 4)
+        )
+
+        rows = leave_working_days_by_month(2030)
+        self.assertEqual(rows, [
+            {"empid": "EMP9", "year": 2030, "month": 4, "working_days": Decimal("1.5")},
+            {"empid": "EMP9", "year": 2030, "month": 5, "working_days": Decimal("7")},
+        ])
+        with self.assertNumQueries(4):
+            leave_working_days_by_month(2030)
+
+        response = self.client.get(
+            reverse("leave-working-days-report"),
+            {"year": 2030, "status": "pending"},
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [
+            {"empid": "EMP9", "year": 2030, "month": 6, "working_days": "2"},
+        ])
+
+        for year in ("0", "9999", "10000", "abc"):
+            response = self.client.get(
+                reverse("leave-working-days-report"),
+                {"year": year},
+                HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class RegionCalendarTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR10", "region-hr@example.com", is_hr=True)
+        cls.pune = make_user("EMP10", "region-pune@example.com")
+        cls.shared = make_user("EMP11", "region-shared@example.com")
+        LeaveBalance.objects.create(employee=cls.pune.employee, casual_leave=20)
+        cls.calendar = LeaveCalendar.objects.create(name="Pune")
+        EmployeeCalendar.objects.create(employee=cls.pune.employee, calendar=cls.calendar)
+        Holiday.objects.create(festival_date="2030-01-01", festival_name="New Year")
+        # Friday, so a Monday leave in Pune sandwiches a three-day weekend.
+        Holiday.objects.create(
+            festival_date="2030-03-08", festival_name="Women's Day", calendar=cls.calendar
+        )
+
+    def setUp(self):
+        cache.clear()
+        holiday_calendar.reset()
+
+    def auth(self, user):
+        return {"HTTP_AUTHORIZATION": f"Bearer {create_user_token(user)}"}
+
+    def test_employees_follow_their_calendar(self):
+        calendar = calendar_for(self.pune.employee.pk)
+        self.assertEqual(calendar, self.calendar.id)
+        self.assertEqual(calendar_for(self.shared.employee.pk), shared_calendar_id())
+
+        monday, tuesday = date(2030, 3, 11), date(2030, 3, 12)
+        self.assertEqual(leave_days(monday, tuesday, calendar=calendar).sandwich_days, 3)
+        self.assertEqual(leave_days(monday, tuesday).sandwich_days, 2)
+        # Shared holidays belong to every calendar.
+        self.assertTrue(holiday_calendar.is_holiday(date(2030, 1, 1), calendar))
+
+        results = leave_days_batch([(monday, tuesday, None, None, calendar), (monday, tuesday)])
+        self.assertEqual([result.total_days for result in results], [Decimal(5), Decimal(4)])
+
+    def test_year_bitsets_are_stored_and_rebuilt(self):
+        holiday_calendar.preload([2030], [None, self.calendar.id])
+        stored = CalendarYearBitset.objects.get(calendar=self.calendar, year=2030)
+        self.assertEqual(
+            int.from_bytes(bytes(stored.holidays), "little"),
+            holiday_calendar.year(2030, self.calendar.id).holidays
+        )
+
+        other_worker = HolidayCalendar()
+        with self.assertNumQueries(1):
+            other_worker.preload([2030], [None, self.calendar.id])
+
+        # A shared holiday reaches the calendar's stored bitset as well.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Create holiday"),
+                {"festival_date": "2030-03-13", "festival_name": "Extra"},
+                content_type="application/json",
+                **self.auth(self.hr)
+            )
+        self.assertEqual(response.status_code, 201)
+        other_worker.refresh()
+        self.assertTrue(other_worker.is_holiday(date(2030, 3, 13), self.calendar.id))
+        self.assertTrue(other_worker.is_holiday(date(2030, 3, 13)))
+        self.assertFalse(other_worker.is_holiday(date(2030, 3, 8)))
+
+    def test_shared_calendar_rows_are_unique(self):
+        # A plain unique key, so this holds on MySQL too.
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Holiday.objects.create(festival_date="2030-01-01", festival_name="New Year again")
+
+        for worker in (HolidayCalendar(), HolidayCalendar()):
+            worker.preload([2030])
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(festival_date="2030-05-01", festival_name="May Day")
+        self.assertEqual(
+            CalendarYearBitset.objects.filter(calendar_id=shared_calendar_id(), year=2030).count(),
+            1
+        )
+
+    def test_holiday_api_is_per_calendar(self):
+        payload = {"festival_date": "2030-03-08", "festival_name": "Women's Day"}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Create holiday"),
+                {**payload, "calendar": self.calendar.id},
+                content_type="application/json",
+                **self.auth(self.hr)
+            )
+        self.assertEqual(response.status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("Create holiday"), payload,
+                content_type="application/json",
+                **self.auth(self.hr)
+            )
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get(reverse("get-holidays"), {"calendar": self.calendar.id}, **self.auth(self.hr))
+        self.assertEqual(response.json()["count"], 3)
+
+        response = self.client.put(
+            reverse("assign-employee-calendar", args=["EMP11"]),
+            {"calendar": self.calendar.id},
+            content_type="application/json",
+            **self.auth(self.hr)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calendar_for(self.shared.employee.pk), self.calendar.id)
+
+        for payload in ({"calendar": "abc"}, {"calendar": 999999}, {}):
+            response = self.client.put(
+                reverse("assign-employee-calendar", args=["EMP11"]),
+                payload,
+                content_type="application/json",
+                **self.auth(self.hr)
+            )
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(calendar_for(self.shared.employee.pk), self.calendar.id)
+
+    def test_apply_and_report_use_the_employee_calendar(self):
+        response = self.client.post(
+            reverse("apply-leave"),
+            {"leave_type": "casual", "start_date": "2030-03-11", "end_date": "2030-03-12"},
+            **self.auth(self.pune)
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(LeaveRequest.objects.get(employee=self.pune.employee).total_days, Decimal(5))
+
+        for user in (self.pune, self.shared):
+            LeaveRequest.objects.create(
+                employee=user.employee, leave_type="casual", status="approved",
+                start_date=date(2030, 3, 4), end_date=date(2030, 3, 8)
+            )
+        rows = leave_working_days_by_month(2030)
+        self.assertEqual(
+            [(row["empid"], row["working_days"]) for row in rows],
+            [("EMP10", Decimal(4)), ("EMP11", Decimal(5))]
+        )
+
+
+class HolidayImportTests(TestCase):
+
+    ICS = "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT",
+        "DTSTART;VALUE=DATE:20301225",
+        "DTEND;VALUE=DATE:20301227",
+        "SUMMARY:Christmas\\, Boxing",
+        "  Day",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "DTSTART:20310101T000000Z",
+        "SUMMARY:New Year",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ])
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR12", "import-hr@example.com", is_hr=True)
+        Holiday.objects.create(festival_date="2030-08-15", festival_name="Independence")
+
+    def setUp(self):
+        cache.clear()
+        holiday_calendar.reset()
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            reverse("import-holidays"),
+            {"file": SimpleUploadedFile(name, content.encode()), **data},
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+
+    def test_ics_events_become_one_holiday_per_day(self):
+        rows = parse_holidays("holidays.ics", self.ICS)
+        self.assertEqual(rows, [
+            {"festival_date": "2030-12-25", "festival_name": "Christmas, Boxing Day"},
+            {"festival_date": "2030-12-26", "festival_name": "Christmas, Boxing Day"},
+            {"festival_date": "2031-01-01", "festival_name": "New Year"},
+        ])
+        with self.assertRaises(HolidayImportError):
+            parse_holidays("holidays.txt", self.ICS)
+
+    def test_csv_import_writes_once_and_bumps_the_version_once(self):
+        holiday_calendar.preload([2030, 2031])
+        csv_text = "festival_date,festival_name\n2030-10-02,Gandhi Jayanti\n2031-01-26,Republic Day\n"
+
+        with mock.patch.object(holiday_calendar, "_bump", wraps=holiday_calendar._bump) as bump:
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks() as callbacks:
+                    response = self.upload("holidays.csv", csv_text)
+            self.assertEqual(response.status_code, 201)
+            # One lookup of existing dates and one multi-row insert.
+            self.assertEqual(
+                len([query for query in queries if '"holiday_calendar"' in query["sql"]]),
+                2
+            )
+            self.assertEqual(response.json()["created"], 2)
+            for callback in callbacks:
+                callback()
+        bump.assert_called_once_with(VERSION_KEY)
+        self.assertTrue(holiday_calendar.is_holiday(date(2031, 1, 26)))
+        self.assertTrue(holiday_calendar.is_holiday(date(2030, 10, 2)))
+
+    def test_invalid_rows_import_nothing(self):
+        csv_text = (
+            "festival_date,festival_name\n"
+            "2030-08-15,Independence Day\n"
+            "2030-11-01,Diwali\n"
+            "2030-11-01,Diwali again\n"
+            "not-a-date,Broken\n"
+        )
+        response = self.upload("holidays.csv", csv_text)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.json()["results"]],
+            ["error", "skipped", "error", "error"]
+        )
+        self.assertEqual(Holiday.objects.count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload("holidays.csv", "\n".join(csv_text.splitlines()[:3]), update_existing="true")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertEqual(Holiday.objects.get(festival_date="2030-08-15").festival_name, "Independence Day")
+        self.assertTrue(holiday_calendar.is_holiday(date(2030, 11, 1)))
+
+    def test_same_date_twice_into_the_shared_calendar(self):
+        csv_text = "festival_date,festival_name\n2030-10-02,Gandhi Jayanti\n"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.upload("holidays.csv", csv_text).status_code, 201)
+        response = self.upload("holidays.csv", csv_text)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["results"][0]["status"], "error")
+
+        # A concurrent import the existence check misses is refused by the
+        # unique key rather than written twice.
+        with mock.patch.object(Holiday.objects, "filter", return_value=Holiday.objects.none()):
+            with self.assertRaises(HolidayImportError):
+                import_holidays(parse_holidays("holidays.csv", csv_text))
+        self.assertEqual(
+            Holiday.objects.filter(calendar_id=shared_calendar_id(), festival_date="2030-10-02").count(),
+            1
+        )
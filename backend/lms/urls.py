@@ -1,11 +1,13 @@
 from django.urls import path
-from .views import create_leave_balance, apply_leave, get_my_leaves, get_leave_by_id, get_all_leaves, update_leave_request, update_leave_balance, update_leave_status, get_leave_balance, delete_leave_request, create_holiday, get_holidays, update_holiday
+from . import async_views
+from .views import create_leave_balance, apply_leave, get_my_leaves, get_leave_by_id, download_leave_attachment, get_all_leaves, update_leave_request, update_leave_balance, update_leave_status, get_leave_balance, delete_leave_request, create_holiday, get_holidays, update_holiday, export_directory, leave_working_days_report, create_calendar, get_calendars, assign_employee_calendar, import_holiday_calendar
 
 urlpatterns = [
     path("create_leave_balance/", create_leave_balance,name="create-leave-balance"),
     path("apply_leave/",apply_leave,name="apply-leave"),
     path("my-leaves/", get_my_leaves,name="my-leaves"),
     path("leave/<int:leave_id>/", get_leave_by_id,name="leave-by-id"),
+    path("leave/<int:leave_id>/attachment/", download_leave_attachment, name="leave-attachment"),
     path("all-leaves/", get_all_leaves,name="all-leaves"),
     path("leave_update/<int:leave_id>/", update_leave_request,name="update-leave"),
     path("leave_balance/<str:employee_id>/", update_leave_balance,name="update-leave-balance"),
@@ -15,4 +17,14 @@ urlpatterns = [
     path("create_holiday/",create_holiday,name="Create holiday"),
     path("holidays/", get_holidays, name="get-holidays"),
     path("update_holiday/<int:festival_id>/", update_holiday, name="update-holiday"),
+    path("holidays/import/", import_holiday_calendar, name="import-holidays"),
+    path("create_calendar/", create_calendar, name="create-calendar"),
+    path("calendars/", get_calendars, name="get-calendars"),
+    path("employee_calendar/<str:empid>/", assign_employee_calendar, name="assign-employee-calendar"),
+    path("export/directory/", export_directory, name="export-directory"),
+    path("reports/leave-working-days/", leave_working_days_report, name="leave-working-days-report"),
+
+    path("async/all-leaves/", async_views.get_all_leaves, name="all-leaves-async"),
+    path("async/holidays/", async_views.get_holidays, name="get-holidays-async"),
+    path("async/apply_leave/", async_views.apply_leave, name="apply-leave-async"),
 ]
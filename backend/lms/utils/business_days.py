@@ -0,0 +1,121 @@
+from datetime import timedelta
+from decimal import Decimal
+from typing import NamedTuple
+from lms.utils.holidays import holiday_calendar
+
+HALF_DAY = Decimal("0.5")
+
+
+class LeaveDays(NamedTuple):
+    total_days: Decimal
+    sandwich_days: int
+    working_days: int
+    non_working_days: int
+
+
+def _year(year, calendar):
+    """``(ordinal of 1 January, days in year, non-working bitset)``."""
+    entry = holiday_calendar.year(year, calendar)
+    return entry.base, entry.length, entry.non_working
+
+
+def count_non_working(start, end, calendar=None):
+    """Weekend and holiday days in ``start..end``, both inclusive."""
+    days = end.toordinal() - start.toordinal() + 1
+    return days - holiday_calendar.working_days(start, end, calendar)
+
+
+def _run_after(day, calendar=None):
+    """Consecutive non-working days from ``day`` onwards."""
+    year = day.year
+    base, length, bits = _year(year, calendar)
+    offset = day.toordinal() - base
+    run = 0
+    while True:
+        rest = bits >> offset
+        # Trailing ones: the lowest clear bit of ``rest`` ends the run.
+        ones = min((~rest & (rest + 1)).bit_length() - 1, length - offset)
+        run += ones
+        if offset + ones < length:
+            return run
+        year += 1
+        base, length, bits = _year(year, calendar)
+        offset = 0
+
+
+def _run_before(day, calendar=None):
+    """Consecutive non-working days from ``day`` backwards."""
+    year = day.year
+    base, length, bits = _year(year, calendar)
+    offset = day.toordinal() - base
+    run = 0
+    while True:
+        # The highest clear bit at or below ``offset`` ends the run.
+        clear = ~bits & ((1 << (offset + 1)) - 1)
+        if clear:
+            return run + offset - (clear.bit_length() - 1)
+        run += offset + 1
+        year -= 1
+        base, length, bits = _year(year, calendar)
+        offset = length - 1
+
+
+def sandwich_span(start, end, calendar=None):
+    """
+    Return ``(applied_days, sandwich_days)``: every calendar day of the
+    range, plus the weekends and holidays directly before and after it.
+    """
+    applied = end.toordinal() - start.toordinal() + 1
+    sandwich = (
+        _run_before(start - timedelta(days=1), calendar)
+        + _run_after(end + timedelta(days=1), calendar)
+    )
+    return applied, sandwich
+
+
+def _leave_days(start, end, half_day_start_type, half_day_end_type, calendar):
+    applied = end.toordinal() - start.toordinal() + 1
+    non_working = count_non_working(start, end, calendar)
+
+    # A single day never sandwiches anything; a half of it is half a day.
+    if start == end:
+        total = HALF_DAY if half_day_start_type or half_day_end_type else Decimal(1)
+        return LeaveDays(total, 0, applied - non_working, non_working)
+
+    applied, sandwich = sandwich_span(start, end, calendar)
+    total = Decimal(applied + sandwich)
+    if half_day_start_type:
+        total -= HALF_DAY
+    if half_day_end_type:
+        total -= HALF_DAY
+    return LeaveDays(total, sandwich, applied - non_working, non_working)
+
+
+def leave_days(start, end, half_day_start_type=None, half_day_end_type=None, calendar=None):
+    """
+    The chargeable length of one leave request, as ``LeaveDays``, under
+    the holidays of ``calendar`` (see ``holidays.calendar_for``).
+    """
+    holiday_calendar.refresh()
+    return _leave_days(start, end, half_day_start_type, half_day_end_type, calendar)
+
+
+def leave_days_batch(ranges):
+    """
+    ``leave_days`` for many ``(start, end, half_day_start_type,
+    half_day_end_type, calendar)`` tuples at once; the trailing items may
+    be left off. The calendar is checked once and every calendar-year the
+    ranges touch is loaded in a single query, after which each range costs
+    a few integer operations per year it spans.
+    """
+    ranges = [tuple(values) + (None,) * (5 - len(values)) for values in ranges]
+    holiday_calendar.refresh()
+
+    years, calendars = set(), set()
+    for start, end, _, _, calendar in ranges:
+        # A sandwich can reach into the neighbouring years.
+        years.update(range(start.year - 1, end.year + 2))
+        calendars.add(calendar)
+    if years:
+        holiday_calendar.preload(years, calendars)
+    return [_leave_days(*values) for values in ranges]
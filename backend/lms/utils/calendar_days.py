@@ -0,0 +1,164 @@
+from datetime import date
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import F, Max, Min
+from lms.models import CalendarDay, EmployeeCalendar, LeaveRequest, shared_calendar_id
+from lms.utils.holidays import calendar_key, holiday_calendar
+from user.models import Employee
+
+
+def calendar_span(calendar=None):
+    """``(first year, last year)`` covered for ``calendar``, or ``(None, None)``."""
+    span = CalendarDay.objects.filter(calendar_id=calendar_key(calendar)).aggregate(
+        first=Min("year"),
+        last=Max("year")
+    )
+    return span["first"], span["last"]
+
+
+def _year_rows(year, ordinal, calendar):
+    entry = holiday_calendar.year(year, calendar)
+    weekday = date(year, 1, 1).weekday()
+    rows = []
+    for offset in range(entry.length):
+        day = date.fromordinal(entry.base + offset)
+        working = not entry.non_working >> offset & 1
+        ordinal += working
+        rows.append(CalendarDay(
+            calendar_id=calendar,
+            day=day,
+            year=year,
+            month=day.month,
+            weekday=(weekday + offset) % 7,
+            is_weekend=(weekday + offset) % 7 >= 5,
+            is_holiday=bool(entry.holidays >> offset & 1),
+            is_working_day=working,
+            working_day_ordinal=ordinal,
+        ))
+    return rows, ordinal
+
+
+def sync_calendar_days(years, calendar=None):
+    """
+    Rebuild the rows of ``years`` for ``calendar`` from the holiday
+    calendar, adding any years needed to keep its rows contiguous. Later
+    years keep their rows and only have their ordinals shifted by the
+    change in working days.
+    """
+    years = set(years)
+    if not years:
+        return
+    calendar = calendar_key(calendar)
+    first, last = calendar_span(calendar)
+    if first is not None:
+        years |= set(range(min(years), first))
+        years |= set(range(last + 1, max(years)))
+
+    holiday_calendar.refresh()
+    days = CalendarDay.objects.filter(calendar_id=calendar)
+    with transaction.atomic():
+        for year in sorted(years):
+            previous = (
+                days.filter(day__lt=date(year, 1, 1))
+                .order_by("-day")
+                .values_list("working_day_ordinal", flat=True)
+                .first()
+            ) or 0
+            old_end = days.filter(year=year).aggregate(
+                end=Max("working_day_ordinal")
+            )["end"]
+            if old_end is None:
+                old_end = previous
+
+            rows, new_end = _year_rows(year, previous, calendar)
+            days.filter(year=year).delete()
+            CalendarDay.objects.bulk_create(rows, batch_size=500)
+
+            if new_end != old_end:
+                days.filter(year__gt=year).update(
+                    working_day_ordinal=F("working_day_ordinal") + (new_end - old_end)
+                )
+
+
+def refresh_calendar_days(years, calendar=None):
+    """
+    Rebuild whichever of ``years`` the table already covers for
+    ``calendar``; shared holidays are part of every calendar, so a change
+    to them rebuilds those years of all calendars.
+    """
+    calendar = calendar_key(calendar)
+    if calendar == shared_calendar_id():
+        calendars = CalendarDay.objects.values_list("calendar_id", flat=True).distinct()
+    else:
+        calendars = [calendar]
+    for calendar in list(calendars):
+        first, last = calendar_span(calendar)
+        if first is not None:
+            sync_calendar_days({year for year in years if first <= year <= last}, calendar)
+
+
+def ensure_calendar_days(start, end, calendar=None):
+    """Extend the rows of ``calendar`` so they cover ``start..end``."""
+    first, last = calendar_span(calendar)
+    if first is None or start.year < first or end.year > last:
+        sync_calendar_days(range(start.year, end.year + 1), calendar)
+
+
+# Half-day ends count half; a single day with either half counts half.
+LEAVE_DAY_WEIGHT = """
+    CASE
+        WHEN cd.day = lr.start_date AND COALESCE(lr.half_day_start_type, '') <> '' THEN 0.5
+        WHEN cd.day = lr.end_date AND COALESCE(lr.half_day_end_type, '') <> '' THEN 0.5
+        ELSE 1
+    END
+"""
+
+
+def leave_working_days_by_month(year=None, status="approved"):
+    """
+    Working days of leave per employee and month, aggregated in the
+    database by joining each request's date range against the days of the
+    employee's calendar. Returns dicts ordered by empid, year and month.
+    """
+    leaves = LeaveRequest.objects.filter(status=status)
+    if year is not None:
+        leaves = leaves.filter(start_date__lte=date(year, 12, 31), end_date__gte=date(year, 1, 1))
+    span = leaves.aggregate(start=Min("start_date"), end=Max("end_date"))
+    if span["start"] is None:
+        return []
+    calendars = set(
+        EmployeeCalendar.objects.filter(employee__leaves__in=leaves)
+        .values_list("calendar_id", flat=True)
+    )
+    shared = shared_calendar_id()
+    for calendar in calendars | {shared}:
+        ensure_calendar_days(span["start"], span["end"], calendar)
+
+    filters, params = ["lr.status = %s", "cd.is_working_day = %s", "e.deleted_at IS NULL"], [shared, status, True]
+    if year is not None:
+        filters.append("cd.year = %s")
+        params.append(year)
+
+    sql = f"""
+        SELECT e.empid, cd.year, cd.month, SUM({LEAVE_DAY_WEIGHT}) AS working_days
+        FROM {LeaveRequest._meta.db_table} lr
+        JOIN {Employee._meta.db_table} e ON e.id = lr.employee_id
+        LEFT JOIN {EmployeeCalendar._meta.db_table} ec ON ec.employee_id = lr.employee_id
+        JOIN {CalendarDay._meta.db_table} cd
+            ON cd.day BETWEEN lr.start_date AND lr.end_date
+            AND cd.calendar_id = COALESCE(ec.calendar_id, %s)
+        WHERE {" AND ".join(filters)}
+        GROUP BY e.empid, cd.year, cd.month
+        ORDER BY e.empid, cd.year, cd.month
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [
+            {
+                "empid": empid,
+                "year": row_year,
+                "month": month,
+                "working_days": Decimal(str(working_days)),
+            }
+            for empid, row_year, month, working_days in cursor.fetchall()
+        ]
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from django.conf import settings
+from lms.models import LeaveBalance
+from user.models import Employee, EmployeeManagerMap, User
+
+EXPORT_CHUNK_SIZE = getattr(settings, "EXPORT_CHUNK_SIZE", 500)
+
+ROLE_COLUMNS = ["is_superadmin", "is_hr", "is_manager", "is_employee"]
+BALANCE_COLUMNS = [
+    "sick_leave",
+    "casual_leave",
+    "optional_leave",
+    "earned_leave",
+    "total_sick_leave",
+    "total_casual_leave",
+    "total_optional_leave",
+    "total_earned_leave",
+]
+EXPORT_COLUMNS = [
+    "employee_id",
+    "empid",
+    "name",
+    "email",
+    "user_id",
+    *ROLE_COLUMNS,
+    "manager_empids",
+    "manager_emails",
+    *BALANCE_COLUMNS,
+]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def directory_chunks(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield lists of export rows, ``chunk_size`` employees at a time.
+
+    Each chunk is one keyset page of employees plus one batched query each
+    for their users, managers and balances. Nothing spans chunks, so memory
+    stays flat however large the directory is. No database cursor is held
+    open between yields, so a slow client cannot pin a connection with a
+    half-read result set.
+    """
+    last_id = 0
+    while True:
+        employees = list(
+            Employee.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "empid", "name", "email")[:chunk_size]
+        )
+        if not employees:
+            return
+        ids = [row[0] for row in employees]
+
+        # Descending ids so the lowest id wins, as with .first() elsewhere.
+        users = {
+            row[0]: row[1:]
+            for row in User.objects.filter(employee_id__in=ids)
+            .order_by("-id")
+            .values_list("employee_id", "id", *ROLE_COLUMNS)
+        }
+        balances = {
+            row[0]: row[1:]
+            for row in LeaveBalance.objects.filter(employee_id__in=ids)
+            .order_by("-id")
+            .values_list("employee_id", *BALANCE_COLUMNS)
+        }
+        managers = {}
+        mappings = EmployeeManagerMap.objects.filter(employee_id__in=ids).order_by("id").values_list(
+            "employee_id", "manager__employee__empid", "manager__email"
+        )
+        for employee_id, manager_empid, manager_email in mappings:
+            managers.setdefault(employee_id, []).append((manager_empid or "", manager_email))
+
+        rows = []
+        for employee_id, empid, name, email in employees:
+            user = users.get(employee_id, (None,) + (None,) * len(ROLE_COLUMNS))
+            balance = balances.get(employee_id, (None,) * len(BALANCE_COLUMNS))
+            managed_by = managers.get(employee_id, [])
+            rows.append([
+                employee_id,
+                empid,
+                name,
+                email,
+                *user,
+                ";".join(manager[0] for manager in managed_by),
+                ";".join(manager[1] for manager in managed_by),
+                *balance,
+            ])
+        yield rows
+
+        last_id = ids[-1]
+
+
+def csv_stream(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield flush()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield flush()
+
+
+def ndjson_stream(chunks):
+    for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in rows
+        )
+
+
+def export_stream(export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    chunks = directory_chunks(chunk_size)
+    if export_format == "ndjson":
+        return ndjson_stream(chunks)
+    return csv_stream(chunks)
@@ -0,0 +1,207 @@
+import csv
+import io
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from lms.models import Holiday
+from lms.serializers import HolidayCreateSerializer
+from .calendar_days import refresh_calendar_days
+from .holidays import calendar_key, holiday_calendar, rebuild_year_bitsets
+
+HOLIDAY_IMPORT_MAX_ROWS = getattr(settings, "HOLIDAY_IMPORT_MAX_ROWS", 1000)
+
+
+class HolidayImportError(ValueError):
+    """
+    Raised when an upload cannot be read, or when any of its rows is
+    invalid; ``results`` then holds the per-row report.
+    """
+
+    def __init__(self, message, results=None):
+        super().__init__(message)
+        self.results = results or []
+
+
+def _ics_date(value):
+    # DATE values are YYYYMMDD; DATE-TIME values add "THHMMSS[Z]".
+    digits = value[:8]
+    if len(digits) != 8 or not digits.isdigit():
+        raise HolidayImportError(f"Invalid iCalendar date: {value!r}")
+    try:
+        return date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+    except ValueError:
+        raise HolidayImportError(f"Invalid iCalendar date: {value!r}")
+
+
+def _ics_text(value):
+    for escaped, plain in (("\\n", " "), ("\\N", " "), ("\\,", ","), ("\\;", ";"), ("\\\\", "\\")):
+        value = value.replace(escaped, plain)
+    return value.strip()
+
+
+def _event_rows(event):
+    if "RRULE" in event:
+        raise HolidayImportError("Recurring events are not supported; export each occurrence")
+    start = _ics_date(event.get("DTSTART", ""))
+    end = start + timedelta(days=1)
+    # An all-day DTEND is exclusive; a multi-day event is one holiday per day.
+    if "T" not in event.get("DTEND", "T"):
+        end = max(_ics_date(event["DTEND"]), end)
+    if (end - start).days > HOLIDAY_IMPORT_MAX_ROWS:
+        raise HolidayImportError(f"Upload exceeds {HOLIDAY_IMPORT_MAX_ROWS} rows")
+
+    name = _ics_text(event.get("SUMMARY", ""))
+    return [
+        {"festival_date": (start + timedelta(days=offset)).isoformat(), "festival_name": name}
+        for offset in range((end - start).days)
+    ]
+
+
+def parse_ics(text):
+    """The all-day events of an iCalendar file as holiday rows."""
+    lines = []
+    for line in text.splitlines():
+        # Long lines are folded onto continuation lines starting with whitespace.
+        if line[:1] in (" ", "\t") and lines:
+            lines[-1] += line[1:]
+        else:
+            lines.append(line)
+
+    rows, event = [], None
+    for line in lines:
+        name, _, value = line.partition(":")
+        name = name.split(";")[0].upper()
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event = {}
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            rows += _event_rows(event)
+            event = None
+        elif event is not None and name in ("DTSTART", "DTEND", "SUMMARY", "RRULE"):
+            event[name] = value
+    return rows
+
+
+def parse_holidays(name, text):
+    """Return the rows of a ``.csv`` (festival_date, festival_name) or ``.ics`` file."""
+    name = (name or "").lower()
+    try:
+        if name.endswith(".csv"):
+            rows = list(csv.DictReader(io.StringIO(text)))
+        elif name.endswith(".ics"):
+            rows = parse_ics(text)
+        else:
+            raise HolidayImportError("Upload a .csv or .ics file")
+    except csv.Error as e:
+        raise HolidayImportError(f"Could not parse upload: {e}")
+
+    if not rows:
+        raise HolidayImportError("Upload contains no holidays")
+    if len(rows) > HOLIDAY_IMPORT_MAX_ROWS:
+        raise HolidayImportError(f"Upload exceeds {HOLIDAY_IMPORT_MAX_ROWS} rows")
+    return rows
+
+
+def parse_upload(upload):
+    try:
+        text = upload.read().decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HolidayImportError(f"Could not parse upload: {e}")
+    return parse_holidays(upload.name, text)
+
+
+def import_holidays(rows, calendar=None, user=None, update_existing=False):
+    """
+    Write ``rows`` as holidays of ``calendar`` (None for the shared
+    calendar) and return the per-row report.
+
+    Dates repeated within the upload are errors, and so are dates that
+    already have a holiday in the calendar unless ``update_existing``, in
+    which case those holidays are renamed. Existing holidays are found with
+    one query over the upload's date range. Nothing is written unless every
+    row is valid, and everything is written in one transaction with
+    ``bulk_create`` and ``bulk_update``, which skip the per-holiday signals:
+    the touched years are rebuilt and the calendar version is bumped once,
+    after commit.
+    """
+    calendar_id = calendar_key(calendar.pk if calendar is not None else None)
+    results = [{"row": index + 1, "status": "pending"} for index in range(len(rows))]
+
+    def fail(index, errors):
+        results[index]["status"] = "error"
+        results[index]["errors"] = errors
+
+    valid, seen = {}, {}
+    for index, row in enumerate(rows):
+        serializer = HolidayCreateSerializer(data={
+            "festival_date": row.get("festival_date"),
+            "festival_name": row.get("festival_name"),
+        })
+        if not serializer.is_valid():
+            fail(index, serializer.errors)
+            continue
+
+        day = serializer.validated_data["festival_date"]
+        results[index]["festival_date"] = day.isoformat()
+        if day in seen:
+            fail(index, {"festival_date": [f"Duplicate of row {seen[day] + 1}"]})
+            continue
+        seen[day] = index
+        valid[index] = serializer.validated_data
+
+    existing = {}
+    if seen:
+        existing = {
+            holiday.festival_date: holiday
+            for holiday in Holiday.objects.filter(
+                calendar_id=calendar_id,
+                festival_date__range=(min(seen), max(seen))
+            )
+        }
+
+    now = timezone.now()
+    to_create, to_update = [], []
+    for index, values in valid.items():
+        holiday = existing.get(values["festival_date"])
+        if holiday is None:
+            to_create.append(Holiday(
+                calendar_id=calendar_id,
+                festival_date=values["festival_date"],
+                festival_name=values["festival_name"],
+                created_by=user,
+                updated_by=user,
+            ))
+            results[index]["status"] = "created"
+        elif update_existing:
+            holiday.festival_name = values["festival_name"]
+            holiday.updated_by = user
+            holiday.updated_at = now
+            to_update.append(holiday)
+            results[index]["status"] = "updated"
+        else:
+            fail(index, {"festival_date": ["Holiday already exists for this date"]})
+
+    if any(result["status"] == "error" for result in results):
+        for result in results:
+            if result["status"] != "error":
+                result["status"] = "skipped"
+        raise HolidayImportError("Upload has invalid rows; nothing was imported", results)
+
+    # The unique (calendar, festival_date) key rejects a holiday another
+    # request added since the lookup above, the shared calendar included.
+    try:
+        with transaction.atomic():
+            Holiday.objects.bulk_create(to_create)
+            Holiday.objects.bulk_update(to_update, ["festival_name", "updated_by", "updated_at"])
+    except IntegrityError:
+        raise HolidayImportError("A holiday was added for one of these dates meanwhile; retry the import")
+
+    years = sorted({day.year for day in seen})
+
+    def imported():
+        rebuild_year_bitsets({(calendar_id, year) for year in years})
+        holiday_calendar.invalidate()
+        refresh_calendar_days(years, calendar_id)
+
+    transaction.on_commit(imported)
+    return results
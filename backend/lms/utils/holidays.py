@@ -0,0 +1,299 @@
+import threading
+from array import array
+from datetime import date
+from functools import lru_cache
+from itertools import accumulate
+from django.core.cache import cache
+from lms.models import CalendarYearBitset, EmployeeCalendar, Holiday, shared_calendar_id
+
+VERSION_KEY = "holidays:calendar:version"
+YEAR_VERSION_KEY = "holidays:calendar:year:{}"
+CALENDAR_YEAR_VERSION_KEY = "holidays:calendar:{}:year:{}"
+
+# Enough little-endian bytes for 366 days.
+YEAR_BYTES = 46
+
+
+@lru_cache(maxsize=64)
+def weekend_bits(year):
+    """Bitset of the Saturdays and Sundays of ``year``, bit 0 being 1 January."""
+    first = date(year, 1, 1)
+    length = date(year + 1, 1, 1).toordinal() - first.toordinal()
+    weekday = first.weekday()
+    bits = 0
+    for offset in range(length):
+        if (weekday + offset) % 7 >= 5:
+            bits |= 1 << offset
+    return bits
+
+
+class CalendarYear:
+    """
+    One year of the calendar. Bit ``n`` of ``holidays`` and ``non_working``
+    is day ``n`` of the year (0 for 1 January), and ``working[n]`` counts
+    the working days before day ``n``, so the working days from day ``lo``
+    to day ``hi`` are ``working[hi + 1] - working[lo]``.
+    """
+
+    __slots__ = ("year", "base", "length", "holidays", "non_working", "working")
+
+    def __init__(self, year, holidays):
+        self.year = year
+        self.base = date(year, 1, 1).toordinal()
+        self.length = date(year + 1, 1, 1).toordinal() - self.base
+        self.holidays = holidays
+        self.non_working = weekend_bits(year) | holidays
+
+        # Binary digits read from bit 0 upwards: "1" for a non-working day.
+        flags = format(self.non_working, f"0{self.length}b")[::-1]
+        self.working = array("H", accumulate((flag == "0" for flag in flags), initial=0))
+
+
+def calendar_key(calendar):
+    """``calendar`` as a ``LeaveCalendar`` id, None meaning the shared calendar."""
+    return shared_calendar_id() if calendar is None else calendar
+
+
+def calendar_for(employee_id):
+    """The id of the calendar assigned to an employee, or of the shared one."""
+    return calendar_key(
+        EmployeeCalendar.objects.filter(employee_id=employee_id)
+        .values_list("calendar_id", flat=True)
+        .first()
+    )
+
+
+def calendars_for(employee_ids):
+    """``{employee_id: calendar_id}`` for the employees that have a calendar."""
+    return dict(
+        EmployeeCalendar.objects.filter(employee_id__in=employee_ids)
+        .values_list("employee_id", "calendar_id")
+    )
+
+
+def holiday_bits(pairs):
+    """
+    Holiday bitsets of ``(calendar_id, year)`` pairs computed from the
+    ``Holiday`` rows with one range query; a calendar's bitset includes the
+    shared holidays.
+    """
+    shared = shared_calendar_id()
+    years = sorted({year for _, year in pairs})
+    calendars = {calendar for calendar, _ in pairs} | {shared}
+    days = Holiday.objects.filter(
+        calendar_id__in=calendars,
+        festival_date__gte=date(years[0], 1, 1),
+        festival_date__lt=date(years[-1] + 1, 1, 1)
+    ).order_by().values_list("calendar_id", "festival_date")
+
+    bits = {}
+    for calendar, day in days:
+        key = (calendar, day.year)
+        bits[key] = bits.get(key, 0) | 1 << (day.toordinal() - date(day.year, 1, 1).toordinal())
+    return {
+        (calendar, year): bits.get((shared, year), 0) | bits.get((calendar, year), 0)
+        for calendar, year in pairs
+    }
+
+
+def rebuild_year_bitsets(pairs):
+    """
+    Store fresh bitsets for ``(calendar_id, year)`` pairs whose holidays
+    changed. A change to a shared holiday also rebuilds every stored
+    calendar bitset of that year.
+    """
+    shared = shared_calendar_id()
+    pairs = {(calendar_key(calendar), year) for calendar, year in pairs}
+    shared_years = {year for calendar, year in pairs if calendar == shared}
+    if shared_years:
+        pairs |= set(
+            CalendarYearBitset.objects.filter(year__in=shared_years)
+            .values_list("calendar_id", "year")
+        )
+    if not pairs:
+        return
+    for (calendar, year), bits in holiday_bits(pairs).items():
+        CalendarYearBitset.objects.update_or_create(
+            calendar_id=calendar,
+            year=year,
+            defaults={"holidays": bits.to_bytes(YEAR_BYTES, "little")}
+        )
+
+
+class HolidayCalendar:
+    """
+    Per-process index of holiday dates, one ``CalendarYear`` per calendar
+    and year. ``calendar`` arguments are a ``LeaveCalendar`` id; None
+    stands for the shared calendar.
+
+    Membership is a shift and a mask on the year's bitset, and a working-day
+    count is two lookups in its prefix table per year spanned. A year is
+    loaded from its stored ``CalendarYearBitset`` row the first time it is
+    asked for; missing rows are built from the holidays and stored.
+
+    Each year has version stamps in the cache, one for its shared holidays
+    and one per calendar, and holiday signals bump the stamps of the years
+    they touch; a bulk change bumps the calendar-wide stamp instead.
+    ``refresh`` reads all stamps in one cache round trip and reloads only
+    the years another worker has changed. Callers refresh once per
+    calculation rather than once per lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._version = None
+            self._years = {}
+            self._stamps = {}
+            self.loads = 0
+
+    @staticmethod
+    def _stamp_keys(key):
+        calendar, year = key
+        if calendar == shared_calendar_id():
+            return (YEAR_VERSION_KEY.format(year),)
+        return YEAR_VERSION_KEY.format(year), CALENDAR_YEAR_VERSION_KEY.format(calendar, year)
+
+    def _load(self, keys):
+        keys = list(keys)
+        stamp_keys = {key: self._stamp_keys(key) for key in keys}
+        stamps = cache.get_many([VERSION_KEY, *{name for names in stamp_keys.values() for name in names}])
+        if self._version is None:
+            self._version = stamps.get(VERSION_KEY, 0)
+
+        years = {year for _, year in keys}
+        calendars = {calendar for calendar, _ in keys}
+        stored = {
+            (calendar, year): int.from_bytes(bytes(bits), "little")
+            for calendar, year, bits in CalendarYearBitset.objects.filter(
+                calendar_id__in=calendars,
+                year__in=years
+            ).values_list("calendar_id", "year", "holidays")
+        }
+
+        missing = [key for key in keys if key not in stored]
+        if missing:
+            built = holiday_bits(missing)
+            CalendarYearBitset.objects.bulk_create(
+                [
+                    CalendarYearBitset(
+                        calendar_id=calendar,
+                        year=year,
+                        holidays=bits.to_bytes(YEAR_BYTES, "little")
+                    )
+                    for (calendar, year), bits in built.items()
+                ],
+                ignore_conflicts=True
+            )
+            stored.update(built)
+
+        for key in keys:
+            self._years[key] = CalendarYear(key[1], stored[key])
+            self._stamps[key] = tuple(stamps.get(name, 0) for name in stamp_keys[key])
+        self.loads += 1
+
+    def year(self, year, calendar=None):
+        key = (calendar_key(calendar), year)
+        entry = self._years.get(key)
+        if entry is None:
+            with self._lock:
+                if key not in self._years:
+                    self._load([key])
+                entry = self._years[key]
+        return entry
+
+    def preload(self, years, calendars=(None,)):
+        """Load every missing year of ``years`` for each of ``calendars`` at once."""
+        with self._lock:
+            missing = {
+                (calendar_key(calendar), year) for calendar in calendars for year in years
+            } - set(self._years)
+            if missing:
+                self._load(missing)
+
+    def refresh(self):
+        with self._lock:
+            loaded = list(self._years)
+            stamp_keys = {key: self._stamp_keys(key) for key in loaded}
+            stamps = cache.get_many([VERSION_KEY, *{name for names in stamp_keys.values() for name in names}])
+
+            version = stamps.get(VERSION_KEY, 0)
+            if version != self._version:
+                self._version = version
+                self._years = {}
+                self._stamps = {}
+                return
+
+            for key in loaded:
+                current = tuple(stamps.get(name, 0) for name in stamp_keys[key])
+                if current != self._stamps[key]:
+                    del self._years[key]
+                    del self._stamps[key]
+
+    @staticmethod
+    def _bump(key):
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    def invalidate(self, years=None, calendar=None):
+        """
+        Make every worker reload ``years`` after the holidays of
+        ``calendar`` changed, or the whole calendar when ``years`` is None.
+        A change to the shared holidays reloads the years of every calendar.
+        """
+        calendar = calendar_key(calendar)
+        shared = calendar == shared_calendar_id()
+        if years is None:
+            self._bump(VERSION_KEY)
+        elif shared:
+            for year in set(years):
+                self._bump(YEAR_VERSION_KEY.format(year))
+        else:
+            for year in set(years):
+                self._bump(CALENDAR_YEAR_VERSION_KEY.format(calendar, year))
+
+        with self._lock:
+            if years is None:
+                self._version = None
+                self._years = {}
+                self._stamps = {}
+                return
+            years = set(years)
+            for key in list(self._years):
+                if key[1] in years and (shared or key[0] == calendar):
+                    del self._years[key]
+                    del self._stamps[key]
+
+    def is_holiday(self, day, calendar=None):
+        entry = self.year(day.year, calendar)
+        return bool(entry.holidays >> (day.toordinal() - entry.base) & 1)
+
+    def working_days(self, start, end, calendar=None):
+        """Working days in ``start..end``, both inclusive."""
+        first, last = start.toordinal(), end.toordinal()
+        total = 0
+        for year in range(start.year, end.year + 1):
+            entry = self.year(year, calendar)
+            low = max(first, entry.base) - entry.base
+            high = min(last, entry.base + entry.length - 1) - entry.base
+            total += entry.working[high + 1] - entry.working[low]
+        return total
+
+    def stats(self):
+        with self._lock:
+            return {
+                "years": sorted({year for _, year in self._years}),
+                "calendars": len({calendar for calendar, _ in self._years}),
+                "holidays": sum(entry.holidays.bit_count() for entry in self._years.values()),
+                "version": self._version,
+                "loads": self.loads,
+            }
+
+
+holiday_calendar = HolidayCalendar()
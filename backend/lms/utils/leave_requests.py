@@ -0,0 +1,116 @@
+import os
+from datetime import date
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from lms.models import LeaveBalance, LeaveRequest
+from lms.serializers import LeaveRequestCreateSerializer
+from .business_days import leave_days
+from .holidays import calendar_for
+
+VALID_LEAVE_TYPES = {"sick", "optional", "casual", "earned"}
+
+
+class LeaveApplicationError(Exception):
+    def __init__(self, payload, status=400):
+        super().__init__(payload)
+        self.payload = payload
+        self.status = status
+
+
+def _reject(detail, status=400):
+    raise LeaveApplicationError({"detail": detail}, status)
+
+
+def prepare_leave_application(employee, data):
+    """
+    Validate a leave application for ``employee`` and work out its length.
+
+    Returns ``(values, sandwich_days)`` where ``values`` are the fields for
+    the new LeaveRequest (without the attachment, which the caller stores).
+    Raises ``LeaveApplicationError`` with the response payload and status.
+    """
+    if not LeaveBalance.objects.filter(employee=employee).exists():
+        _reject("Leave Balance not set. Contact HR.", 403)
+
+    # Attachments arrive as files and are written separately.
+    data = {key: data[key] for key in data if key != "attachment"}
+
+    serializer = LeaveRequestCreateSerializer(data=data)
+    if not serializer.is_valid():
+        raise LeaveApplicationError(serializer.errors)
+
+    leave_type = serializer.validated_data["leave_type"]
+    start_date = serializer.validated_data["start_date"]
+    end_date = serializer.validated_data["end_date"]
+    reason = serializer.validated_data.get("reason")
+    half_day_start_type = serializer.validated_data.get("half_day_start_type")
+    half_day_end_type = serializer.validated_data.get("half_day_end_type")
+
+    if leave_type not in VALID_LEAVE_TYPES:
+        _reject(f"Invalid leave type : {leave_type}")
+
+    if start_date > end_date:
+        _reject("Start date cannot be after end date")
+
+    current_date = date.today()
+    if current_date > start_date or current_date > end_date:
+        _reject("Leave date has already passed.")
+
+    if half_day_start_type and half_day_start_type.lower() not in {"first", "second"}:
+        _reject("half_day_start_type must be either 'first' or 'second'")
+
+    if half_day_end_type and half_day_end_type.lower() not in {"first", "second"}:
+        _reject("half_day_end_type must be either 'first' or 'second'")
+
+    is_already_applied = LeaveRequest.objects.filter(
+        employee=employee,
+        status__in=["pending", "approved"],
+        start_date__lte=end_date,
+        end_date__gte=start_date
+    ).exists()
+
+    if is_already_applied:
+        _reject("Duplicate leave: Dates already applied.")
+
+    try:
+        total_days, sandwich_days, _, _ = leave_days(
+            start_date,
+            end_date,
+            half_day_start_type,
+            half_day_end_type,
+            calendar_for(employee.pk)
+        )
+    except Exception as e:
+        _reject(str(e))
+
+    values = {
+        "employee": employee,
+        "leave_type": leave_type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "total_days": total_days,
+        "reason": reason,
+        "half_day_start_type": half_day_start_type,
+        "half_day_end_type": half_day_end_type,
+    }
+    return values, sandwich_days
+
+
+def save_attachment(attachment):
+    """Write an uploaded leave attachment under MEDIA_ROOT and return its path."""
+    upload_dir = os.path.join(settings.MEDIA_ROOT, "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+
+    file_path = f"uploads/{attachment.name}"
+    full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+
+    with open(full_path, "wb+") as destination:
+        for chunk in attachment.chunks():
+            destination.write(chunk)
+
+    return file_path
+
+
+async def asave_attachment(attachment):
+    """Write an attachment on a worker thread so the event loop never blocks on disk."""
+    return await sync_to_async(save_attachment, thread_sensitive=False)(attachment)
@@ -3,8 +3,10 @@ from datetime import timedelta, date
 import schedule
 import time
 from django.db import transaction
-from lms.models import Holiday, LeaveBalance
+from lms.models import LeaveBalance
 from lms.log_app import loggers  
+from lms.utils.business_days import sandwich_span
+from lms.utils.holidays import holiday_calendar
 
 
 
@@ -12,38 +14,25 @@ def is_weekend(day):
     return day.weekday() >= 5
 
 
-def is_holiday(day):
-    return Holiday.objects.filter(festival_date=day).exists()
+def is_holiday(day, calendar=None):
+    # Callers refresh the calendar once per calculation, not once per day.
+    return holiday_calendar.is_holiday(day, calendar)
 
 
-def is_non_working_day(day):
-    return is_weekend(day) or is_holiday(day)
+def is_non_working_day(day, calendar=None):
+    return is_weekend(day) or is_holiday(day, calendar)
 
 
 def calculate_leave_with_weekend_sandwich(
     start_date,
     end_date,
     half_day_start_type=None,
-    half_day_end_type=None
+    half_day_end_type=None,
+    calendar=None
 ):
     try:
-        applied_leave_days = 0
-        sandwich_days = 0
-
-        current_date = start_date
-        while current_date <= end_date:
-            applied_leave_days += 1
-            current_date += timedelta(days=1)
-
-        prev_day = start_date - timedelta(days=1)
-        while is_non_working_day(prev_day):
-            sandwich_days += 1
-            prev_day -= timedelta(days=1)
-
-        next_day = end_date + timedelta(days=1)
-        while is_non_working_day(next_day):
-            sandwich_days += 1
-            next_day += timedelta(days=1)
+        holiday_calendar.refresh()
+        applied_leave_days, sandwich_days = sandwich_span(start_date, end_date, calendar)
 
         total_days = applied_leave_days + sandwich_days
 
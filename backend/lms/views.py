@@ -1,25 +1,29 @@
 from django.http import JsonResponse
 from user.models import User, Employee
-from user.utils.auth import decode_access_token
-from .serializers import LeaveBalanceCreateSerializer, LeaveRequestCreateSerializer, LeaveRequestListSerializer, LeaveBalanceSerializer, LeaveRequestDetailSerializer,HolidayCreateSerializer,HolidayListSerializer
-import os
+from .serializers import LeaveBalanceCreateSerializer, LeaveRequestCreateSerializer, LeaveRequestListSerializer, LeaveBalanceSerializer, LeaveRequestDetailSerializer,HolidayCreateSerializer,HolidayListSerializer, LeaveCalendarSerializer, HolidayImportSerializer, EmployeeCalendarAssignSerializer
 from datetime import date
 from decimal import Decimal
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from django.conf import settings
 from user.utils.auth import authenticate_request
 from user.models import Employee
-from .models import LeaveRequest, LeaveBalance,Holiday
-from .utils import calculate_leave_with_weekend_sandwich
-from user.models import EmployeeManagerMap
+from .models import LeaveRequest, LeaveBalance,Holiday, LeaveCalendar, EmployeeCalendar, shared_calendar_id
+from .utils.leave_requests import LeaveApplicationError, prepare_leave_application, save_attachment
+from .utils.business_days import leave_days
+from .utils.holidays import calendar_for
+from .utils.exports import EXPORT_FORMATS, export_stream
+from .utils.calendar_days import leave_working_days_by_month
+from .utils.holiday_import import HolidayImportError, import_holidays, parse_upload
+from django.http import Http404, StreamingHttpResponse
+from user.utils.downloads import media_response
+from user.utils.hierarchy import manages, reports_of
 from datetime import datetime, date
 from decimal import Decimal
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from user.permissions import JWTAuthenticationPermission,IsHRorSuperAdmin, IsHR, IsManager, IsEmployee ,IsHRManagerAdmin
+from user.permissions import JWTAuthenticationPermission,IsHRorSuperAdmin, IsHR, IsManager, IsEmployee ,IsHRManagerAdmin, can_access_employee
 
 AUTH_HEADER = openapi.Parameter(
     "Authorization",
@@ -47,22 +51,9 @@ AUTH_HEADER = openapi.Parameter(
 @api_view(["POST"])
 @permission_classes([JWTAuthenticationPermission,IsHRorSuperAdmin])
 def create_leave_balance(request):
-    token = request.headers.get("Authorization")
-    if not token or not token.startswith("Bearer "):
-        return JsonResponse(
-            {"error": "Authorization header missing"},
-            status=401
-        )
-
-    token = token.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user_email = payload.get("sub")
-    current_user = User.objects.filter(email=current_user_email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr):
         return JsonResponse(
@@ -128,125 +119,20 @@ def apply_leave(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    employee_leave_balance = LeaveBalance.objects.filter(employee=employee).first()
-    if not employee_leave_balance:
-        return Response(
-            {"detail": "Leave Balance not set. Contact HR."},
-            status=status.HTTP_403_FORBIDDEN
-        )
-
-    serializer = LeaveRequestCreateSerializer(data=request.data)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    leave_type = serializer.validated_data["leave_type"]
-    start_date = serializer.validated_data["start_date"]
-    end_date = serializer.validated_data["end_date"]
-    reason = serializer.validated_data.get("reason")
-    half_day_start_type = serializer.validated_data.get("half_day_start_type")
-    half_day_end_type = serializer.validated_data.get("half_day_end_type")
-    attachment = serializer.validated_data.get("attachment")
-
-    VALID_LEAVE_TYPES = {"sick", "optional", "casual", "earned"}
-    if leave_type not in VALID_LEAVE_TYPES:
-        return Response(
-            {"detail": f"Invalid leave type : {leave_type}"},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    if start_date > end_date:
-        return Response(
-            {"detail": "Start date cannot be after end date"},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    current_date = date.today()
-    if current_date > start_date or current_date > end_date:
-        return Response(
-            {"detail": "Leave date has already passed."},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    if half_day_start_type and half_day_start_type.lower() not in {"first", "second"}:
-        return Response(
-            {"detail": "half_day_start_type must be either 'first' or 'second'"},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    if half_day_end_type and half_day_end_type.lower() not in {"first", "second"}:
-        return Response(
-            {"detail": "half_day_end_type must be either 'first' or 'second'"},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    is_already_applied = LeaveRequest.objects.filter(
-        employee=employee,
-        status__in=["pending", "approved"],
-        start_date__lte=end_date,
-        end_date__gte=start_date
-    ).exists()
-
-    if is_already_applied:
-        return Response(
-            {"detail": "Duplicate leave: Dates already applied."},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
     try:
-        if start_date == end_date:
-            if half_day_start_type or half_day_end_type:
-                sandwich_days = 0
-                total_days = Decimal("0.5")
-            else:
-                sandwich_days = 0
-                total_days = Decimal("1.0")
-        else:
-            total_days, sandwich_days = calculate_leave_with_weekend_sandwich(
-                start_date,
-                end_date,
-                half_day_start_type,
-                half_day_end_type
-            )
-            total_days = Decimal(total_days)
-
-            if half_day_start_type:
-                total_days -= Decimal("0.5")
-            if half_day_end_type:
-                total_days -= Decimal("0.5")
-
-    except Exception as e:
-        return Response(
-            {"detail": str(e)},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        values, sandwich_days = prepare_leave_application(employee, request.data)
+    except LeaveApplicationError as e:
+        return Response(e.payload, status=e.status)
 
-    file_path = None
+    attachment = request.FILES.get("attachment")
     if attachment:
-        upload_dir = os.path.join(settings.MEDIA_ROOT, "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-
-        file_path = f"uploads/{attachment.name}"
-        full_path = os.path.join(settings.MEDIA_ROOT, file_path)
+        values["attachment"] = save_attachment(attachment)
 
-        with open(full_path, "wb+") as destination:
-            for chunk in attachment.chunks():
-                destination.write(chunk)
-
-    LeaveRequest.objects.create(
-        employee=employee,
-        leave_type=leave_type,
-        start_date=start_date,
-        end_date=end_date,
-        total_days=total_days,
-        reason=reason,
-        half_day_start_type=half_day_start_type,
-        half_day_end_type=half_day_end_type,
-        attachment=file_path
-    )
+    LeaveRequest.objects.create(**values)
 
     return Response(
         {
-            "message": f"Leave request for {total_days} days submitted successfully, including {sandwich_days} sandwich weekend day(s).",
+            "message": f"Leave request for {values['total_days']} days submitted successfully, including {sandwich_days} sandwich weekend day(s).",
             "status": "Success"
         },
         status=status.HTTP_201_CREATED
@@ -312,7 +198,7 @@ def get_leave_by_id(request, leave_id):
     try:
         leave = LeaveRequest.objects.select_related(
             "employee"
-        ).get(id=leave_id)
+        ).get(id=leave_id, employee__deleted_at__isnull=True)
     except LeaveRequest.DoesNotExist:
         return Response(
             {"detail": "Leave request not found"},
@@ -327,6 +213,53 @@ def get_leave_by_id(request, leave_id):
     )
 
 
+@swagger_auto_schema(
+    method="get",
+    tags=["Leave Management"],
+    operation_summary="Download Leave Attachment",
+    operation_description=(
+        "The applicant, their managers and HR can download the attachment. "
+        "Supports Range and If-None-Match / If-Modified-Since."
+    ),
+    manual_parameters=[AUTH_HEADER],
+)
+@api_view(["GET"])
+@permission_classes([JWTAuthenticationPermission])
+def download_leave_attachment(request, leave_id):
+    user = request.user_obj
+
+    leave = (
+        LeaveRequest.objects.filter(id=leave_id, employee__deleted_at__isnull=True)
+        .only("id", "employee_id", "attachment")
+        .first()
+    )
+    if not leave:
+        return Response(
+            {"detail": "Leave request not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if not can_access_employee(user, leave.employee_id):
+        return Response(
+            {"detail": "Not authorised to view this attachment"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if not leave.attachment:
+        return Response(
+            {"detail": "Leave request has no attachment"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        return media_response(request, leave.attachment, as_attachment=True)
+    except Http404:
+        return Response(
+            {"detail": "Attachment file not found"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+
 @swagger_auto_schema(
     method="get",
     tags=["Leave Management"],
@@ -350,16 +283,16 @@ def get_all_leaves(request):
 
     try:
         if user.is_manager:
-            employee_ids = EmployeeManagerMap.objects.filter(
-                manager_id=user.id
-            ).values_list("employee_id", flat=True)
-
             leaves = LeaveRequest.objects.filter(
-                employee_id__in=employee_ids
+                employee_id__in=reports_of(user.id, user.employee_id)
             ).select_related("employee")
 
         else:
-            leaves = LeaveRequest.objects.all().select_related("employee")
+            # Deleted employees' requests remain until purged; hide them. The
+            # employee is joined for select_related anyway.
+            leaves = LeaveRequest.objects.filter(
+                employee__deleted_at__isnull=True
+            ).select_related("employee")
 
         serializer = LeaveRequestDetailSerializer(leaves, many=True)
 
@@ -459,32 +392,17 @@ def update_leave_request(request, leave_id):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if leave.start_date == leave.end_date:
-                if half_day_start_type or half_day_end_type:
-                    leave.total_days = Decimal("0.5")
-                else:
-                    leave.total_days = Decimal("1.0")
-            else:
-                total_days = (leave.end_date - leave.start_date).days + 1
-                if half_day_start_type:
-                    total_days -= 0.5
-                if half_day_end_type:
-                    total_days -= 0.5
-
-                leave.total_days = Decimal(total_days)
+            # Same business-day rules as apply_leave, sandwich included.
+            leave.total_days = leave_days(
+                leave.start_date,
+                leave.end_date,
+                half_day_start_type,
+                half_day_end_type,
+                calendar_for(leave.employee_id)
+            ).total_days
 
         if attachment:
-            upload_dir = os.path.join(settings.MEDIA_ROOT, "uploads")
-            os.makedirs(upload_dir, exist_ok=True)
-
-            file_path = f"uploads/{attachment.name}"
-            full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-
-            with open(full_path, "wb+") as destination:
-                for chunk in attachment.chunks():
-                    destination.write(chunk)
-
-            leave.attachment = file_path
+            leave.attachment = save_attachment(attachment)
 
         leave.save()
 
@@ -623,7 +541,10 @@ def update_leave_status(request, leave_id):
         )
 
     try:
-        leave = LeaveRequest.objects.select_related("employee").get(id=leave_id)
+        leave = LeaveRequest.objects.select_related("employee").get(
+            id=leave_id,
+            employee__deleted_at__isnull=True
+        )
     except LeaveRequest.DoesNotExist:
         return Response(
             {"detail": "Leave request not found"},
@@ -633,12 +554,7 @@ def update_leave_status(request, leave_id):
     employee = leave.employee
 
     if user.is_manager:
-        is_managed = EmployeeManagerMap.objects.filter(
-            manager=user,
-            employee=employee
-        ).exists()
-
-        if not is_managed:
+        if not manages(user.id, user.employee_id, employee.id):
             return Response(
                 {"detail": "You don't have permission to approve/reject current employee leave"},
                 status=status.HTTP_403_FORBIDDEN
@@ -773,19 +689,9 @@ def update_leave_status(request, leave_id):
 @api_view(["GET"])
 @permission_classes([JWTAuthenticationPermission,IsHRorSuperAdmin])
 def get_leave_balance(request, empid):
-    token = request.headers.get("Authorization")
-    if not token or not token.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization header missing"}, status=401)
-
-    token = token.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user_email = payload.get("sub")
-    current_user = User.objects.filter(email=current_user_email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     employee = Employee.objects.filter(empid=empid).first()
     if not employee:
@@ -834,22 +740,9 @@ def get_leave_balance(request, empid):
 @api_view(["DELETE"])
 @permission_classes([JWTAuthenticationPermission,IsHRorSuperAdmin])
 def delete_leave_request(request, leave_id):
-    token = request.headers.get("Authorization")
-    if not token or not token.startswith("Bearer "):
-        return JsonResponse(
-            {"error": "Authorization header missing"},
-            status=401
-        )
-
-    token = token.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user_email = payload.get("sub")
-    current_user = User.objects.filter(email=current_user_email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     employee = getattr(current_user, "employee", None)
     if not employee:
@@ -892,22 +785,9 @@ def delete_leave_request(request, leave_id):
 def create_holiday(request):
 
     # 🔹 Token check (same as your API)
-    token = request.headers.get("Authorization")
-    if not token or not token.startswith("Bearer "):
-        return JsonResponse(
-            {"error": "Authorization header missing"},
-            status=401
-        )
-
-    token = token.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user_email = payload.get("sub")
-    current_user = User.objects.filter(email=current_user_email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     # 🔹 Role check
     if not (current_user.is_superadmin or current_user.is_hr):
@@ -922,9 +802,11 @@ def create_holiday(request):
         return JsonResponse(serializer.errors, status=400)
 
     festival_date = serializer.validated_data["festival_date"]
+    calendar = serializer.validated_data.get("calendar")
+    calendar_id = calendar.pk if calendar else shared_calendar_id()
 
-    # 🔹 Duplicate check
-    if Holiday.objects.filter(festival_date=festival_date).exists():
+    # 🔹 Duplicate check (per calendar)
+    if Holiday.objects.filter(festival_date=festival_date, calendar_id=calendar_id).exists():
         return JsonResponse(
             {"error": "Holiday already exists for this date"},
             status=400
@@ -934,6 +816,7 @@ def create_holiday(request):
     Holiday.objects.create(
         festival_date=serializer.validated_data["festival_date"],
         festival_name=serializer.validated_data["festival_name"],
+        calendar_id=calendar_id,
         created_by=current_user,
         updated_by=current_user
     )
@@ -948,9 +831,17 @@ def create_holiday(request):
 def get_holidays(request):
     """
     Accessible by: Admin, HR, Manager, Employee
+    ?calendar=<id> limits the list to the shared holidays and that calendar's
     """
 
     holidays = Holiday.objects.all().order_by("festival_date")
+    calendar_id = request.GET.get("calendar")
+    if calendar_id:
+        if not calendar_id.isdigit():
+            return JsonResponse({"error": "calendar must be an id"}, status=400)
+        holidays = holidays.filter(
+            calendar_id__in=[shared_calendar_id(), int(calendar_id)]
+        )
     serializer = HolidayListSerializer(holidays, many=True)
 
     return JsonResponse(
@@ -966,22 +857,9 @@ def get_holidays(request):
 @permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
 def update_holiday(request, festival_id):
 
-    token = request.headers.get("Authorization")
-    if not token or not token.startswith("Bearer "):
-        return JsonResponse(
-            {"error": "Authorization header missing"},
-            status=401
-        )
-
-    token = token.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user_email = payload.get("sub")
-    current_user = User.objects.filter(email=current_user_email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr):
         return JsonResponse(
@@ -1005,9 +883,13 @@ def update_holiday(request, festival_id):
     if not serializer.is_valid():
         return JsonResponse(serializer.errors, status=400)
 
-    new_date = serializer.validated_data.get("festival_date")
-    if new_date:
-        if Holiday.objects.filter(festival_date=new_date).exclude(id=festival_id).exists():
+    new_date = serializer.validated_data.get("festival_date", holiday.festival_date)
+    new_calendar = serializer.validated_data.get("calendar", holiday.calendar)
+    if "festival_date" in serializer.validated_data or "calendar" in serializer.validated_data:
+        if Holiday.objects.filter(
+            festival_date=new_date,
+            calendar=new_calendar
+        ).exclude(id=festival_id).exists():
             return JsonResponse(
                 {"error": "Another holiday already exists for this date"},
                 status=400
@@ -1019,3 +901,228 @@ def update_holiday(request, festival_id):
         {"message": "Holiday updated successfully"},
         status=200
     )
+
+
+@swagger_auto_schema(
+    method="post",
+    tags=["Leave Management"],
+    operation_summary="Import Holidays",
+    operation_description=(
+        "HR or SuperAdmin can add many holidays at once from a .csv upload "
+        "with festival_date and festival_name columns, or an .ics calendar. "
+        "Nothing is imported if any row is invalid; dates that already have "
+        "a holiday are rejected unless update_existing is set. Returns a "
+        "per-row report."
+    ),
+    manual_parameters=[AUTH_HEADER],
+    consumes=["multipart/form-data"],
+    request_body=HolidayImportSerializer,
+    responses={
+        201: "Holidays imported",
+        400: "Validation error",
+        403: "Permission denied",
+    },
+)
+@api_view(["POST"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def import_holiday_calendar(request):
+    serializer = HolidayImportSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        rows = parse_upload(serializer.validated_data["file"])
+        results = import_holidays(
+            rows,
+            calendar=serializer.validated_data.get("calendar"),
+            user=request.user_obj,
+            update_existing=serializer.validated_data["update_existing"]
+        )
+    except HolidayImportError as e:
+        return JsonResponse({"error": str(e), "results": e.results}, status=400)
+
+    return JsonResponse({
+        "message": "Holidays imported",
+        "created": sum(1 for result in results if result["status"] == "created"),
+        "updated": sum(1 for result in results if result["status"] == "updated"),
+        "results": results,
+    }, status=201)
+
+
+@swagger_auto_schema(
+    method="post",
+    tags=["Leave Management"],
+    operation_summary="Create Holiday Calendar",
+    operation_description=(
+        "HR or SuperAdmin can create a named holiday calendar, e.g. one per "
+        "office; shared holidays apply to every calendar"
+    ),
+    manual_parameters=[AUTH_HEADER],
+    request_body=LeaveCalendarSerializer,
+    responses={
+        201: "Calendar created",
+        400: "Validation error",
+        403: "Permission denied",
+    },
+)
+@api_view(["POST"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def create_calendar(request):
+    serializer = LeaveCalendarSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    calendar = serializer.save()
+    return JsonResponse(LeaveCalendarSerializer(calendar).data, status=201)
+
+
+@swagger_auto_schema(
+    method="get",
+    tags=["Leave Management"],
+    operation_summary="List Holiday Calendars",
+    manual_parameters=[AUTH_HEADER],
+)
+@api_view(["GET"])
+@permission_classes([JWTAuthenticationPermission])
+def get_calendars(request):
+    serializer = LeaveCalendarSerializer(LeaveCalendar.objects.all(), many=True)
+    return JsonResponse(
+        {
+            "count": len(serializer.data),
+            "calendars": serializer.data
+        },
+        status=200
+    )
+
+
+@swagger_auto_schema(
+    method="put",
+    tags=["Leave Management"],
+    operation_summary="Assign Holiday Calendar",
+    operation_description=(
+        "HR or SuperAdmin can assign an employee to a holiday calendar; "
+        "a null calendar puts them back on the shared holidays only"
+    ),
+    manual_parameters=[AUTH_HEADER],
+    request_body=EmployeeCalendarAssignSerializer,
+    responses={
+        200: "Calendar assigned",
+        400: "Validation error",
+        404: "Employee not found",
+    },
+)
+@api_view(["PUT"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def assign_employee_calendar(request, empid):
+    employee = Employee.objects.filter(empid=empid).first()
+    if not employee:
+        return JsonResponse({"error": "Employee not found"}, status=404)
+
+    serializer = EmployeeCalendarAssignSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    calendar = serializer.validated_data["calendar"]
+    if calendar is None:
+        EmployeeCalendar.objects.filter(employee=employee).delete()
+    else:
+        EmployeeCalendar.objects.update_or_create(
+            employee=employee,
+            defaults={"calendar": calendar}
+        )
+
+    return JsonResponse(
+        {
+            "empid": employee.empid,
+            "calendar": calendar.pk if calendar else None,
+        },
+        status=200
+    )
+
+
+@swagger_auto_schema(
+    method="get",
+    tags=["Leave Management"],
+    operation_summary="Export Employee Directory",
+    operation_description=(
+        "HR or SuperAdmin can stream every employee with their roles, "
+        "managers and leave balance as CSV or NDJSON"
+    ),
+    manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter(
+            "output",
+            openapi.IN_QUERY,
+            description="csv (default) or ndjson",
+            type=openapi.TYPE_STRING,
+        ),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def export_directory(request):
+    # Not "format": DRF reserves that query parameter for renderer selection.
+    export_format = request.GET.get("output", "csv")
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": f"output must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=400
+        )
+
+    response = StreamingHttpResponse(
+        export_stream(export_format),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="employees-{date.today():%Y%m%d}.{export_format}"'
+    )
+    return response
+
+
+@swagger_auto_schema(
+    method="get",
+    tags=["Leave Management"],
+    operation_summary="Leave Working Days by Month",
+    operation_description=(
+        "HR or SuperAdmin can get the working days of leave taken per "
+        "employee and month, weekends and holidays excluded"
+    ),
+    manual_parameters=[
+        AUTH_HEADER,
+        openapi.Parameter(
+            "year",
+            openapi.IN_QUERY,
+            description="Limit the report to one year",
+            type=openapi.TYPE_INTEGER,
+        ),
+        openapi.Parameter(
+            "status",
+            openapi.IN_QUERY,
+            description="Leave status to count (default approved)",
+            type=openapi.TYPE_STRING,
+        ),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def leave_working_days_report(request):
+    year = request.GET.get("year")
+    if year is not None:
+        if not year.isdigit():
+            return JsonResponse({"error": "year must be a number"}, status=400)
+        year = int(year)
+        # The sandwich lookup reads the following year as well.
+        if not date.min.year <= year < date.max.year:
+            return JsonResponse(
+                {"error": f"year must be between {date.min.year} and {date.max.year - 1}"},
+                status=400
+            )
+
+    leave_status = request.GET.get("status", "approved")
+    if leave_status not in {"pending", "approved", "rejected"}:
+        return JsonResponse({"error": "Invalid status"}, status=400)
+
+    rows = leave_working_days_by_month(year, leave_status)
+    for row in rows:
+        row["working_days"] = str(row["working_days"])
+    return JsonResponse({"results": rows}, status=200)
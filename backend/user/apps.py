@@ -4,6 +4,9 @@ class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
     # def ready(self):
     #     from .superadmin import create_superadmin
     #     create_superadmin()
@@ -0,0 +1,109 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from .models import Employee, EmployeeManagerMap, User
+from .permissions import (
+    IsHR,
+    IsHRorSuperAdmin,
+    IsManager,
+    JWTAuthenticationPermission,
+    async_permission_classes,
+)
+from .serializers import AddPhotoSerializer, EmployeeSerializer
+from .utils.auth import get_principal
+from .utils.pagination import (
+    PaginationError,
+    keyset_page,
+    page_params,
+    paginated_response,
+    requested_fields,
+    split_page,
+)
+
+# Native async counterparts of the I/O-bound endpoints in views.py. Under
+# ASGI they wait on the database and disk without holding a worker thread.
+
+
+@require_GET
+@async_permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+async def get_employees(request):
+    principal = get_principal(request)
+
+    try:
+        after, limit = page_params(request)
+        fields = requested_fields(request, EmployeeSerializer.Meta.fields)
+    except PaginationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    employees = Employee.objects.for_listing(fields)
+    if principal.is_manager:
+        employees = employees.filter(manager_mapping__manager_id=principal.user_id)
+
+    employees, next_cursor = split_page(
+        [employee async for employee in keyset_page(employees, after, limit)],
+        limit
+    )
+    if not employees and after is None:
+        return JsonResponse({"error": "No employees found"}, status=404)
+
+    data = EmployeeSerializer(
+        employees, many=True, fields=fields, context={"request": request}
+    ).data
+
+    return paginated_response(
+        JsonResponse({"employees": data, "next_cursor": next_cursor}, safe=False),
+        next_cursor
+    )
+
+
+@csrf_exempt
+@require_POST
+@async_permission_classes([JWTAuthenticationPermission, IsHR | IsManager])
+async def add_photo(request, id):
+    principal = get_principal(request)
+
+    serializer = AddPhotoSerializer(
+        data={"empid": id, "file": request.FILES.get("file")}
+    )
+    # Image validation decodes the upload with Pillow; keep it off the loop.
+    is_valid = await sync_to_async(serializer.is_valid, thread_sensitive=False)()
+    if not is_valid:
+        return JsonResponse(serializer.errors, status=400)
+
+    employee = await Employee.objects.filter(empid=id).afirst()
+    if not employee:
+        return JsonResponse({"error": "Employee not found"}, status=404)
+
+    user = await User.objects.filter(employee=employee).afirst()
+    if not user:
+        return JsonResponse({"error": "User not linked with employee"}, status=404)
+
+    if principal.is_manager:
+        is_managed = await EmployeeManagerMap.objects.filter(
+            manager_id=principal.user_id,
+            employee=employee
+        ).aexists()
+        if not is_managed:
+            return JsonResponse(
+                {"error": "You don't have access to this employee"},
+                status=403
+            )
+
+    image_file = serializer.validated_data["file"]
+
+    if user.image:
+        await sync_to_async(user.image.delete, thread_sensitive=False)(save=False)
+
+    await sync_to_async(user.image.save, thread_sensitive=False)(
+        image_file.name, image_file, save=False
+    )
+    await user.asave()
+
+    return JsonResponse(
+        {
+            "message": "Photo uploaded successfully",
+            "image_url": request.build_absolute_uri(user.image.url)
+        },
+        status=201
+    )
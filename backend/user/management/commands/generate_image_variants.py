@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from user.models import User
+from user.utils.images import delete_variants, generate_variants
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the thumbnail/WebP variants of employee photos that have "
+        "none yet, e.g. after a deploy or jobs lost on a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every photo, not only those missing variants",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.exclude(image="").exclude(image__isnull=True)
+        if not options["all"]:
+            users = users.filter(image_variants={})
+
+        done = failed = 0
+        rows = users.values_list("id", "image", "image_variants").iterator()
+        for user_id, name, previous in rows:
+            try:
+                generate_variants(user_id, name)
+                delete_variants(previous)
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"User {user_id} ({name}): {e}")
+
+        self.stdout.write(f"Rendered variants for {done} photos, {failed} failed")
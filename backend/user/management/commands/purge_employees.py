@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from user.utils.purge import EMPLOYEE_PURGE_CHUNK_SIZE, deactivated_employee_ids, purge_employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge every deleted employee still awaiting removal, e.g. jobs "
+        "lost on a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EMPLOYEE_PURGE_CHUNK_SIZE,
+            help="Rows removed per statement",
+        )
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for employee_id in list(deactivated_employee_ids()):
+            try:
+                purge_employee(employee_id, options["chunk_size"])
+                done += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Employee {employee_id}: {e}")
+
+        self.stdout.write(f"Purged {done} employees, {failed} failed")
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 20:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_hierarchy(apps, schema_editor):
+    EmployeeManagerMap = apps.get_model("user", "EmployeeManagerMap")
+    EmployeeHierarchy = apps.get_model("user", "EmployeeHierarchy")
+
+    parents = {}
+    edges = EmployeeManagerMap.objects.filter(
+        manager__employee_id__isnull=False
+    ).values_list("employee_id", "manager__employee_id")
+    for employee_id, parent_id in edges:
+        if employee_id != parent_id:
+            parents.setdefault(employee_id, set()).add(parent_id)
+
+    rows = []
+    for node in parents:
+        # Breadth-first walk upwards gives the shortest depth to each ancestor.
+        depths, frontier, depth = {}, parents[node], 1
+        while frontier:
+            frontier = {a for a in frontier if a != node and a not in depths}
+            for ancestor in frontier:
+                depths[ancestor] = depth
+            frontier = {p for a in frontier for p in parents.get(a, ())}
+            depth += 1
+        rows.extend(
+            EmployeeHierarchy(ancestor_id=a, descendant_id=node, depth=d)
+            for a, d in depths.items()
+        )
+    EmployeeHierarchy.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0006_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeHierarchy',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='user.employee')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='user.employee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_employee_hierarchy_pair')],
+            },
+        ),
+        migrations.RunPython(build_hierarchy, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,46 @@ class Admin(models.Model):
         return self.username
 
 
+class EmployeeQuerySet(models.QuerySet):
+
+    def with_image(self):
+        """Annotate the linked user's image and its variants in the same query."""
+        linked_users = User.objects.filter(
+            employee=models.OuterRef("pk")
+        ).order_by("id")
+        return self.annotate(
+            image_path=models.Subquery(linked_users.values("image")[:1]),
+            image_variants=models.Subquery(linked_users.values("image_variants")[:1])
+        )
+
+    def for_listing(self, fields=None):
+        """
+        Project only what the listed ``fields`` need; ``image_url`` pulls in
+        the image annotations. ``None`` means every listing field.
+        """
+        if fields is None:
+            return self.with_image()
+
+        wants_image = "image_url" in fields or "image_variants" in fields
+        queryset = self.with_image() if wants_image else self
+        columns = [name for name in fields if name in ("empid", "name", "email")]
+        return queryset.only("id", *columns)
+
+
+class ActiveEmployeeManager(models.Manager.from_queryset(EmployeeQuerySet)):
+    """Hides deactivated employees; ``Employee.all_objects`` still sees them."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class ActiveUserManager(models.Manager):
+    """Hides deactivated users; ``User.all_objects`` still sees them."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Employee(models.Model):
     id = models.AutoField(primary_key=True)
     empid = models.CharField(max_length=50, unique=True)
@@ -16,10 +56,19 @@ class Employee(models.Model):
     name = models.CharField(max_length=50)
     email = models.EmailField(max_length=100, unique=True)
 
+    # Set when the employee is deleted. The row stays, hidden by the default
+    # manager, until the purger in user.utils.purge has removed its history.
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ActiveEmployeeManager()
+    all_objects = EmployeeQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
 class User(models.Model):
+    ROLE_FIELDS = ("is_superadmin", "is_hr", "is_manager", "is_employee")
+
     id = models.AutoField(primary_key=True)
     email = models.EmailField(max_length=255, unique=True)
     hashed_password = models.CharField(max_length=255)
@@ -41,10 +90,69 @@ class User(models.Model):
         null=True,
         blank=True
     )
+    # Resized copies of ``image`` as {size: {extension: storage name}},
+    # filled in by the background worker in user.utils.images.
+    image_variants = models.JSONField(default=dict, blank=True)
+
+    # Bumped whenever a claim embedded in issued tokens changes, which
+    # revokes every token carrying the old version.
+    token_version = models.PositiveIntegerField(default=0)
+
+    # Set together with the linked employee's ``deleted_at``.
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ActiveUserManager()
+    all_objects = models.Manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_email = instance.__dict__.get("email")
+        instance._loaded_claims = instance._claim_values()
+        # None when the image column was deferred and its value is unknown.
+        instance._loaded_image = (
+            instance.__dict__.get("image") or "" if "image" in field_names else None
+        )
+        return instance
+
+    def _claim_values(self):
+        fields = ("email", "employee_id") + self.ROLE_FIELDS
+        return tuple(self.__dict__.get(field) for field in fields)
+
+    def _image_replaced(self):
+        loaded = getattr(self, "_loaded_image", "")
+        if loaded is None and "image" not in self.__dict__:
+            return False
+        image = self.image
+        if image and not image._committed:
+            return True
+        return loaded is not None and (image.name or "") != loaded
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded_claims", None)
+        if loaded is not None and loaded != self._claim_values():
+            self.token_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+
+        # Variants of the previous image are stale; signals.py deletes them
+        # and queues new ones once the row is committed.
+        self._stale_image_variants = None
+        if self._image_replaced():
+            self._stale_image_variants = self.image_variants
+            self.image_variants = {}
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "image_variants"}
+
+        super().save(*args, **kwargs)
+
+        self._loaded_email = self.email
+        self._loaded_claims = self._claim_values()
+        self._loaded_image = self.image.name or ""
+
     def __str__(self):
         return self.email
 
@@ -62,13 +170,92 @@ class EmployeeManagerMap(models.Model):
         on_delete=models.CASCADE
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_employee_id = instance.__dict__.get("employee_id")
+        return instance
+
     def __str__(self):
         return f"{self.manager.email} -> {self.employee.name}"
 
 
+class EmployeeHierarchy(models.Model):
+    """
+    Closure of ``EmployeeManagerMap``: one row for every employee below
+    another, at the shortest distance between them. A manager's node is
+    the employee linked to their user, so ``depth`` 1 rows are direct
+    reports. Maintained by ``user.utils.hierarchy``.
+    """
+
+    id = models.AutoField(primary_key=True)
+    ancestor = models.ForeignKey(
+        Employee,
+        related_name='descendant_links',
+        on_delete=models.CASCADE
+    )
+    descendant = models.ForeignKey(
+        Employee,
+        related_name='ancestor_links',
+        on_delete=models.CASCADE
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"],
+                name="unique_employee_hierarchy_pair"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
 class SuperAdminUser(User):
     class Meta:
         proxy = True
         verbose_name = "Super Admin"
         verbose_name_plural = "Super Admins"
-    
\ No newline at end of file
+    
+
+class RefreshToken(models.Model):
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        User,
+        related_name='refresh_tokens',
+        on_delete=models.CASCADE
+    )
+
+    # HMAC-SHA256 of the opaque token; the raw value is never stored.
+    token_hash = models.CharField(max_length=64, unique=True)
+    # Every token rotated out of the same login shares a family, so reuse of
+    # an already rotated token can revoke the whole chain.
+    family = models.UUIDField(db_index=True)
+
+    expires_at = models.DateTimeField()
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.email} ({self.family})"
+
+
+class RevokedToken(models.Model):
+    id = models.AutoField(primary_key=True)
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        User,
+        related_name='revoked_tokens',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+
+    # The token's own expiry; rows past it no longer need to be checked.
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
@@ -1,72 +1,100 @@
+from functools import wraps
+from django.http import JsonResponse
+from django.utils.functional import SimpleLazyObject
 from rest_framework.permissions import BasePermission
-from user.models import User
-from user.utils.auth import decode_access_token
+from user.utils.auth import get_principal
+from user.utils.hierarchy import manages
 
 
-class JWTAuthenticationPermission(BasePermission):
-
-    def has_permission(self, request, view):
-        auth = request.headers.get("Authorization")
-
-        if not auth or not auth.startswith("Bearer "):
-            return False
+def _authenticated_principal(request):
+    principal = get_principal(request)
+    return principal if principal.is_authenticated else None
 
-        token = auth.split(" ")[1]
-        payload = decode_access_token(token)
 
-        if not payload:
-            return False
+class JWTAuthenticationPermission(BasePermission):
 
-        user = User.objects.filter(email=payload.get("sub")).first()
-        if not user:
+    def has_permission(self, request, view):
+        principal = _authenticated_principal(request)
+        if not principal:
             return False
 
-        request.user_obj = user
+        request.user_obj = SimpleLazyObject(lambda: principal.user)
         return True
 
 
 class IsEmployee(BasePermission):
     def has_permission(self, request, view):
-        return bool(
-            hasattr(request, "user_obj")
-            and request.user_obj.is_employee
-        )
+        principal = _authenticated_principal(request)
+        return bool(principal and principal.is_employee)
 
 
 class IsManager(BasePermission):
     def has_permission(self, request, view):
-        return bool(
-            hasattr(request, "user_obj")
-            and request.user_obj.is_manager
-        )
+        principal = _authenticated_principal(request)
+        return bool(principal and principal.is_manager)
 
 
 class IsHR(BasePermission):
     def has_permission(self, request, view):
-        return bool(
-            hasattr(request, "user_obj")
-            and request.user_obj.is_hr
-        )
+        principal = _authenticated_principal(request)
+        return bool(principal and principal.is_hr)
 
 
 class IsHRorSuperAdmin(BasePermission):
     def has_permission(self, request, view):
+        principal = _authenticated_principal(request)
         return bool(
-            hasattr(request, "user_obj")
+            principal
             and (
-                request.user_obj.is_hr
-                or request.user_obj.is_superadmin
+                principal.is_hr
+                or principal.is_superadmin
             )
         )
 
 
 class IsHRManagerAdmin(BasePermission):
     def has_permission(self, request, view):
+        principal = _authenticated_principal(request)
         return bool(
-            hasattr(request, "user_obj")
+            principal
             and (
-                request.user_obj.is_hr
-                or request.user_obj.is_manager
-                or request.user_obj.is_superadmin
+                principal.is_hr
+                or principal.is_manager
+                or principal.is_superadmin
             )
         )
+
+
+def async_permission_classes(permission_classes):
+    """
+    Guard a native async view with the same permission classes the DRF views
+    use. Authentication runs through the async cache/ORM first, after which
+    the claim-based role checks are plain attribute reads.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            principal = get_principal(request)
+            if not await principal.ais_authenticated():
+                return principal.error_response()
+
+            for permission_class in permission_classes:
+                if not permission_class().has_permission(request, view):
+                    return JsonResponse(
+                        {"detail": "You do not have permission to perform this action."},
+                        status=403
+                    )
+
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def can_access_employee(user, employee_id):
+    """
+    Whether ``user`` may see an employee's own files: HR and SuperAdmin
+    always, the employee themselves, or a manager anywhere above them.
+    """
+    if user.is_superadmin or user.is_hr or user.employee_id == employee_id:
+        return True
+    return user.is_manager and manages(user.id, user.employee_id, employee_id)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
 from .models import User, Employee, EmployeeManagerMap
+from .utils.images import image_upload_error, variant_urls
 import random, string
 
 
@@ -8,6 +9,21 @@ class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField()
 
+class RefreshTokenSerializer(serializers.Serializer):
+    refresh_token = serializers.CharField()
+
+class LogoutSerializer(serializers.Serializer):
+    refresh_token = serializers.CharField(required=False)
+
+class RevokeTokenSerializer(serializers.Serializer):
+    jti = serializers.CharField(required=False)
+    email = serializers.EmailField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("jti") and not attrs.get("email"):
+            raise serializers.ValidationError("Provide a token jti or a user email")
+        return attrs
+
 class CreateEmployeeSerializer(serializers.Serializer):
     username = serializers.CharField()
     email = serializers.EmailField()
@@ -19,12 +35,12 @@ class CreateEmployeeSerializer(serializers.Serializer):
     manager_email = serializers.EmailField(required=False, allow_null=True)
 
     def validate_empid(self, value):
-        if Employee.objects.filter(empid=value).exists():
+        if Employee.all_objects.filter(empid=value).exists():
             raise serializers.ValidationError("Employee ID already exists")
         return value
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        if User.all_objects.filter(email=value).exists():
             raise serializers.ValidationError("Email already exists")
         return value
 
@@ -76,21 +92,62 @@ class CreateEmployeeSerializer(serializers.Serializer):
         }
 
 
+class BulkEmployeeRowSerializer(CreateEmployeeSerializer):
+    """One row of a bulk import; uniqueness is checked for the whole upload."""
+
+    # Checked here so one oversized value cannot fail a whole insert chunk.
+    username = serializers.CharField(max_length=50)
+    email = serializers.EmailField(max_length=100)
+    empid = serializers.CharField(max_length=50)
+
+    def validate_empid(self, value):
+        return value
+
+    def validate_email(self, value):
+        return value
+
+
+class BulkCreateEmployeesSerializer(serializers.Serializer):
+    file = serializers.FileField()
+
+
 class EmployeeSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Employee
-        fields = ["id", "empid", "name", "email", "image_url"]
+        fields = ["id", "empid", "name", "email", "image_url", "image_variants"]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def _image(self, obj):
+        # Listings annotate the image via Employee.objects.with_image();
+        # single objects fall back to one lookup of the linked user.
+        if not hasattr(obj, "image_path"):
+            user = obj.user.order_by("id").only("id", "image", "image_variants").first()
+            obj.image_path = user.image.name if user else None
+            obj.image_variants = user.image_variants if user else None
+        return obj.image_path, obj.image_variants
 
     def get_image_url(self, obj):
-        user = getattr(obj, "user", None)
-        if user and user.first() and user.first().image:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(user.first().image.url)
-            return user.first().image.url
-        return None
+        name, _ = self._image(obj)
+        if not name:
+            return None
+
+        url = User._meta.get_field("image").storage.url(name)
+        request = self.context.get("request")
+        if request:
+            return request.build_absolute_uri(url)
+        return url
+
+    def get_image_variants(self, obj):
+        _, variants = self._image(obj)
+        return variant_urls(variants, self.context.get("request"))
 
 
 class UpdateEmployeeSerializer(serializers.Serializer):
@@ -106,7 +163,7 @@ class UpdateEmployeeSerializer(serializers.Serializer):
 
     def validate_email(self, value):
         empid = self.initial_data.get("empid")
-        if Employee.objects.filter(email=value).exclude(empid=empid).exists():
+        if Employee.all_objects.filter(email=value).exclude(empid=empid).exists():
             raise serializers.ValidationError("Email already exists")
         return value
 
@@ -136,6 +193,9 @@ class AddPhotoSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 f"Unsupported file type: {file.name} ({file.content_type})"
             )
+        error = image_upload_error(file)
+        if error:
+            raise serializers.ValidationError(error)
         return file
     
 class GetEmployeePhotosSerializer(serializers.Serializer):
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .models import Employee, EmployeeHierarchy, EmployeeManagerMap, User
+from .utils.hierarchy import refresh_hierarchy
+from .utils.images import delete_variants, image_worker
+from .utils.search import employee_index
+from .utils.user_cache import invalidate_token_version, invalidate_users
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Drop the entry under the email the row was loaded with as well, so an
+    # email change through update_employee cannot leave the old key alive.
+    invalidate_users(instance.email, getattr(instance, "_loaded_email", None))
+    invalidate_token_version(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(pre_delete, sender=Employee)
+def invalidate_employee_users(sender, instance, **kwargs):
+    # Deleting an employee nulls User.employee with a bulk update that sends
+    # no User signals, so the linked users are evicted here instead.
+    emails = User.objects.filter(employee_id=instance.pk).values_list("email", flat=True)
+    invalidate_users(*emails)
+
+
+@receiver(post_save, sender=Employee)
+def index_employee(sender, instance, **kwargs):
+    transaction.on_commit(lambda: employee_index.update(instance))
+
+
+@receiver(post_delete, sender=Employee)
+def unindex_employee(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: employee_index.remove(pk))
+
+
+@receiver(post_save, sender=EmployeeManagerMap)
+def refresh_mapped_hierarchy(sender, instance, **kwargs):
+    refresh_hierarchy({instance.employee_id, getattr(instance, "_loaded_employee_id", None)})
+    instance._loaded_employee_id = instance.employee_id
+
+
+@receiver(post_delete, sender=EmployeeManagerMap)
+def refresh_unmapped_hierarchy(sender, instance, **kwargs):
+    # Deferred to commit so cascades from a deleted employee or manager have
+    # finished before the subtree is recomputed.
+    employee_id = instance.employee_id
+    transaction.on_commit(lambda: refresh_hierarchy({employee_id}))
+
+
+@receiver(pre_delete, sender=Employee)
+def refresh_orphaned_hierarchy(sender, instance, **kwargs):
+    # The employee's reports lose every ancestor above them once its rows go.
+    employee_ids = set(
+        EmployeeHierarchy.objects.filter(ancestor=instance, depth=1)
+        .values_list("descendant_id", flat=True)
+    )
+    if employee_ids:
+        transaction.on_commit(lambda: refresh_hierarchy(employee_ids))
+
+
+@receiver(pre_save, sender=User)
+def refresh_relinked_manager_hierarchy(sender, instance, **kwargs):
+    # A manager's node is their linked employee, so relinking moves their
+    # whole team.
+    loaded = getattr(instance, "_loaded_claims", None)
+    if loaded is None or loaded[1] == instance.employee_id:
+        return
+    employee_ids = set(
+        EmployeeManagerMap.objects.filter(manager=instance)
+        .values_list("employee_id", flat=True)
+    )
+    if employee_ids:
+        transaction.on_commit(lambda: refresh_hierarchy(employee_ids))
+
+
+@receiver(post_save, sender=User)
+def queue_image_variants(sender, instance, **kwargs):
+    stale = getattr(instance, "_stale_image_variants", None)
+    if stale is None:
+        return
+    instance._stale_image_variants = None
+    user_id, name = instance.pk, instance.image.name
+
+    def replace():
+        delete_variants(stale)
+        if name:
+            image_worker.submit(user_id, name)
+
+    transaction.on_commit(replace)
@@ -1,3 +1,948 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.handlers import base as handler_base
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+
+from backend.middleware.api_logger import APILoggingMiddleware
+from backend.middleware.auth import AuthMiddleware
+from lms.models import Holiday, LeaveBalance, LeaveRequest
+from .models import Employee, EmployeeHierarchy, EmployeeManagerMap, User
+from .utils.auth import (
+    TokenCache,
+    create_token,
+    create_user_token,
+    decode_access_token,
+    hash_password,
+    token_cache,
+)
+from .utils.hashing import HashingPoolBusy, PasswordHashPool, hash_pool
+from .utils.images import generate_variants, image_worker
+from .utils.onboarding import hash_passwords
+from .utils.purge import employee_purger, purge_employee
+from .utils.refresh_tokens import issue_refresh_token
+from .utils.revocation import BloomFilter, revocation_list
+from .utils.search import EmployeeSearchIndex, employee_index
+from .utils.throttle import CacheWindowStore, LoginThrottle, MemoryWindowStore, login_throttle
+
+
+def make_user(empid, email, **roles):
+    employee = Employee.objects.create(
+        empid=empid,
+        name=empid.lower(),
+        email=email,
+        password=hash_password("secret"),
+    )
+    return User.objects.create(
+        email=email,
+        hashed_password=employee.password,
+        is_employee=True,
+        employee=employee,
+        **roles
+    )
+
+
+class AuthQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = make_user("HR1", "hr@example.com", is_hr=True)
+        cls.manager = make_user("MGR1", "manager@example.com", is_manager=True)
+        cls.employee = make_user("EMP1", "employee@example.com")
+
+        EmployeeManagerMap.objects.create(
+            employee=cls.employee.employee,
+            manager=cls.manager
+        )
+        LeaveBalance.objects.create(employee=cls.employee.employee, casual_leave=5)
+        cls.leave = LeaveRequest.objects.create(
+            employee=cls.employee.employee,
+            leave_type="casual",
+            start_date="2030-01-07",
+            end_date="2030-01-08",
+            total_days=2,
+        )
+        Holiday.objects.create(festival_date="2030-01-01", festival_name="New Year")
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(user)}"
+        )
+        return client
+
+    def auth_queries(self, client, method, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(client, method)(url)
+        lookups = [
+            q["sql"] for q in ctx.captured_queries
+            if '"user_user"."email" =' in q["sql"]
+        ]
+        return response, len(lookups)
+
+    def test_each_endpoint_resolves_caller_at_most_once(self):
+        empid = self.employee.employee.empid
+        cases = [
+            (self.hr, "get", reverse("get-employees")),
+            (self.hr, "get", reverse("get-employee-by-id", args=[empid])),
+            (self.hr, "get", reverse("get-managers")),
+            (self.hr, "get", reverse("get-employee-photos", args=[empid])),
+            (self.hr, "get", reverse("get-leave-balance", args=[empid])),
+            (self.hr, "get", reverse("all-leaves")),
+            (self.hr, "get", reverse("leave-by-id", args=[self.leave.id])),
+            (self.manager, "get", reverse("get-manager-employees", args=["MGR1"])),
+            (self.manager, "get", reverse("all-leaves")),
+            (self.employee, "get", reverse("my-leaves")),
+            (self.employee, "get", reverse("get-holidays")),
+        ]
+
+        for user, method, url in cases:
+            with self.subTest(url=url, user=user.email):
+                response, count = self.auth_queries(
+                    self.client_for(user), method, url
+                )
+                self.assertLess(response.status_code, 500)
+                self.assertLessEqual(count, 1)
+
+    def test_missing_token_is_rejected_without_lookup(self):
+        response, count = self.auth_queries(
+            APIClient(), "get", reverse("get-employees")
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(count, 0)
+
+    def test_steady_state_requests_skip_auth_query(self):
+        client = self.client_for(self.hr)
+        self.auth_queries(client, "get", reverse("get-managers"))
+
+        response, count = self.auth_queries(client, "get", reverse("get-managers"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(count, 0)
+
+    def test_role_change_revokes_issued_tokens(self):
+        client = self.client_for(self.hr)
+        response, _ = self.auth_queries(client, "get", reverse("get-managers"))
+        self.assertEqual(response.status_code, 200)
+
+        self.hr.is_hr = False
+        self.hr.save()
+
+        response, _ = self.auth_queries(client, "get", reverse("get-managers"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_role_permissions_are_decided_from_claims(self):
+        client = self.client_for(self.hr)
+        client.get(reverse("get-holidays"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("get-holidays"))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any('"user_user"' in q["sql"] for q in ctx.captured_queries)
+        )
+
+    def test_legacy_subject_only_token_still_authenticates(self):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_token({'sub': self.hr.email})}"
+        )
+        self.assertEqual(client.get(reverse("get-managers")).status_code, 200)
+
+
+class TokenCacheTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+
+    def test_repeat_decode_is_served_from_cache(self):
+        token = create_token({"sub": "someone@example.com"})
+
+        first = decode_access_token(token)
+        second = decode_access_token(token)
+
+        self.assertEqual(first, second)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_entries_expire_with_token_and_respect_size(self):
+        cache = TokenCache(maxsize=2, ttl=300)
+        cache.set("expired", {"sub": "a", "exp": time.time() - 1})
+        self.assertIsNone(cache.get("expired"))
+
+        for token in ("one", "two", "three"):
+            cache.set(token, {"sub": token, "exp": time.time() + 60})
+        self.assertIsNone(cache.get("one"))
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_invalid_token_is_rejected(self):
+        self.assertIsNone(decode_access_token("not-a-token"))
+
+
+class LoginTests(TestCase):
+
+    def setUp(self):
+        login_throttle.clear()
+        self.user = make_user("EMP9", "login@example.com")
+
+    def login(self, password):
+        return APIClient().post(
+            reverse("login-user"),
+            {"email": self.user.email, "password": password},
+            format="json",
+        )
+
+    def test_login_upgrades_outdated_hash(self):
+        legacy = make_password("secret", hasher="pbkdf2_sha1")
+        User.objects.filter(pk=self.user.pk).update(hashed_password=legacy)
+
+        response = self.login("secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.hashed_password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.user.employee.password, self.user.hashed_password)
+
+    def test_wrong_password_is_rejected(self):
+        self.assertEqual(self.login("wrong").status_code, 401)
+
+    def test_throttled_attempts_are_rejected_before_hashing(self):
+        for _ in range(login_throttle.email_limit):
+            self.assertEqual(self.login("wrong").status_code, 401)
+
+        hashed = hash_pool.stats()["completed"]
+        response = self.login("secret")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(hash_pool.stats()["completed"], hashed)
+        self.assertEqual(login_throttle.stats()["rejected"]["email"], 1)
+
+    def test_saturated_pool_is_a_503_when_changing_password(self):
+        hr = make_user("HR9", "login-hr@example.com", is_hr=True)
+        with mock.patch.object(hash_pool, "run", side_effect=HashingPoolBusy("saturated")):
+            response = self.client.post(
+                reverse("change-password"),
+                {"email": hr.email, "old_password": "secret", "new_password": "secret2"},
+                HTTP_AUTHORIZATION=f"Bearer {create_user_token(hr)}"
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    def test_shared_cache_store_counts_across_instances(self):
+        cache.clear()
+        first = LoginThrottle(CacheWindowStore(), email_limit=2, ip_limit=100)
+        second = LoginThrottle(CacheWindowStore(), email_limit=2, ip_limit=100)
+
+        self.assertIsNone(first.check("a@example.com", "10.0.0.1"))
+        self.assertIsNone(second.check("a@example.com", "10.0.0.2"))
+        self.assertIsNotNone(first.check("a@example.com", "10.0.0.3"))
+
+    def test_memory_store_stays_bounded(self):
+        store = MemoryWindowStore()
+        store.max_keys = 3
+        for index in range(10):
+            store.add(f"ip:10.0.0.{index}", 300, 1000.0)
+        store.add("ip:10.0.0.8", 300, 1001.0)
+        store.add("ip:10.0.0.10", 300, 1002.0)
+
+        self.assertEqual(list(store._hits), ["ip:10.0.0.9", "ip:10.0.0.8", "ip:10.0.0.10"])
+        self.assertEqual(store.count("ip:10.0.0.8", 300, 1002.0)[0], 2)
+
+    def test_refresh_token_rotates_and_rejects_reuse(self):
+        first = self.login("secret").json()["refresh_token"]
+        client = APIClient()
+
+        response = client.post(
+            reverse("refresh-token"), {"refresh_token": first}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        second = response.json()["refresh_token"]
+        self.assertNotEqual(first, second)
+        self.assertTrue(response.json()["access_token"])
+
+        reused = client.post(
+            reverse("refresh-token"), {"refresh_token": first}, format="json"
+        )
+        self.assertEqual(reused.status_code, 401)
+
+        # Reuse revokes the whole family, including the latest token.
+        revoked = client.post(
+            reverse("refresh-token"), {"refresh_token": second}, format="json"
+        )
+        self.assertEqual(revoked.status_code, 401)
+
+
+class PasswordHashPoolTests(TestCase):
+
+    def test_saturated_pool_rejects_instead_of_queueing(self):
+        pool = PasswordHashPool(workers=1, max_pending=0, timeout=5)
+        release = threading.Event()
+        worker = threading.Thread(target=pool.run, args=(release.wait,))
+        worker.start()
+
+        while pool.stats()["in_flight"] == 0:
+            time.sleep(0.01)
+        with self.assertRaises(HashingPoolBusy):
+            pool.run(len, "x")
+
+        release.set()
+        worker.join()
+        self.assertEqual(pool.stats()["rejected"], 1)
+        self.assertEqual(pool.stats()["completed"], 1)
+
+
+class RevocationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        self.user = make_user("EMP7", "revoke@example.com", is_hr=True)
+
+    def client_with(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def test_logout_revokes_only_that_token(self):
+        token, other = create_user_token(self.user), create_user_token(self.user)
+        client = self.client_with(token)
+
+        self.assertEqual(client.post(reverse("logout-user")).status_code, 200)
+
+        self.assertEqual(client.get(reverse("get-holidays")).status_code, 403)
+        self.assertEqual(
+            self.client_with(other).get(reverse("get-holidays")).status_code, 200
+        )
+
+    def test_admin_can_revoke_every_token_of_a_user(self):
+        target = make_user("EMP8", "target@example.com")
+        target_client = self.client_with(create_user_token(target))
+        self.assertEqual(target_client.get(reverse("get-holidays")).status_code, 200)
+
+        response = self.client_with(create_user_token(self.user)).post(
+            reverse("revoke-tokens"), {"email": target.email}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(target_client.get(reverse("get-holidays")).status_code, 403)
+
+    def test_unrevoked_tokens_skip_the_database(self):
+        revocation_list.is_revoked("warm-up")
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation_list.is_revoked("never-revoked"))
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=100, error_rate=0.01)
+        items = [f"jti-{i}" for i in range(100)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+
+class AuthMiddlewareTests(TestCase):
+
+    def test_principal_is_resolved_only_when_read(self):
+        user = make_user("EMP6", "lazy@example.com")
+        request = RequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {create_user_token(user)}"
+        )
+
+        token_cache.clear()
+        with self.assertNumQueries(0):
+            AuthMiddleware(lambda r: HttpResponse())(request)
+        self.assertEqual(token_cache.stats()["misses"], 0)
+
+        self.assertEqual(request.principal.email, user.email)
+        self.assertEqual(request.principal.user.pk, user.pk)
+
+    def test_middleware_chain_stays_async_under_asgi(self):
+        handler = handler_base.BaseHandler()
+        # A sync-only middleware would be wrapped in a thread adapter.
+        with mock.patch.object(handler_base, "sync_to_async", wraps=handler_base.sync_to_async) as adapt:
+            handler.load_middleware(is_async=True)
+        adapted = [call.args[0] for call in adapt.call_args_list]
+        self.assertEqual(
+            [method for method in adapted if not method.__name__.startswith("process_")],
+            []
+        )
+        self.assertTrue(iscoroutinefunction(handler._middleware_chain))
+
+        async def view(request):
+            return HttpResponse(request.principal.is_authenticated)
+
+        chain = APILoggingMiddleware(AuthMiddleware(view))
+        with mock.patch("backend.middleware.api_logger.loggers"):
+            response = async_to_sync(chain)(RequestFactory().get("/"))
+        self.assertEqual(response.content, b"False")
+
+    def test_access_log_does_not_resolve_the_principal(self):
+        user = make_user("EMP7", "logged@example.com")
+        token = create_user_token(user)
+        token_cache.clear()
+
+        def request_through(view):
+            request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+            with mock.patch("backend.middleware.api_logger.loggers") as loggers:
+                APILoggingMiddleware(AuthMiddleware(view))(request)
+            return loggers.info.call_args[0][0]
+
+        with self.assertNumQueries(0):
+            line = request_through(lambda r: HttpResponse())
+        self.assertIn("User: Unresolved", line)
+        self.assertEqual(token_cache.stats()["misses"], 0)
+
+        line = request_through(lambda r: HttpResponse(r.principal.email))
+        self.assertIn(f"User: {user.email}", line)
+
+
+class EmployeeListingQueryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        self.hr = make_user("HR5", "listing-hr@example.com", is_hr=True)
+        # The listing is HR-only; an HR user who also manages gets the scoped branch.
+        self.manager = make_user(
+            "MGR5", "listing-manager@example.com", is_hr=True, is_manager=True
+        )
+        self.add_employees(3)
+
+    def add_employees(self, count):
+        start = Employee.objects.count()
+        for i in range(start, start + count):
+            user = make_user(f"LST{i}", f"listing{i}@example.com")
+            User.objects.filter(pk=user.pk).update(image=f"employees/{i}.png")
+            EmployeeManagerMap.objects.create(employee=user.employee, manager=self.manager)
+
+    def listing_queries(self, user, url_name):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {create_user_token(user)}")
+        client.get(reverse(url_name))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["employees"], len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_employees(self):
+        for user in (self.hr, self.manager):
+            for url_name in ("get-employees", "get-employees-async"):
+                with self.subTest(user=user.email, url=url_name):
+                    _, before = self.listing_queries(user, url_name)
+                    self.add_employees(5)
+                    employees, after = self.listing_queries(user, url_name)
+
+                    self.assertEqual(before, after)
+                    self.assertLessEqual(after, 1)
+                    self.assertTrue(
+                        employees[-1]["image_url"].endswith(".png")
+                    )
+
+
+class ListingPaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        self.hr = make_user("HR6", "pages-hr@example.com", is_hr=True, is_manager=True)
+        self.employees = [make_user(f"PG{i}", f"pages{i}@example.com") for i in range(5)]
+        for user in self.employees:
+            EmployeeManagerMap.objects.create(employee=user.employee, manager=self.hr)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+
+    def walk(self, url, key=None, **params):
+        seen, cursor = [], None
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            seen.extend(body[key] if key else body)
+            cursor = response.get("X-Next-Cursor")
+            if not cursor:
+                return seen
+
+    def test_cursor_walks_every_row_once(self):
+        rows = self.walk(reverse("get-employees"), "employees", limit=2)
+        self.assertEqual(
+            [row["empid"] for row in rows],
+            [user.employee.empid for user in self.employees]
+        )
+
+        rows = self.walk(
+            reverse("get-manager-employees", args=["HR6"]), limit=2
+        )
+        self.assertEqual(len(rows), 5)
+
+        self.assertEqual(len(self.walk(reverse("get-managers"), "managers", limit=1)), 1)
+
+    def test_fields_narrow_output_and_projection(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(
+                reverse("get-employees"), {"fields": "empid"}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["employees"][0]), {"empid"})
+
+        listing = [q["sql"] for q in ctx.captured_queries if 'FROM "user_employee"' in q["sql"]]
+        self.assertTrue(listing)
+        self.assertNotIn('"user_employee"."name"', listing[-1])
+        self.assertNotIn("image", listing[-1])
+
+        response = self.client.get(reverse("get-managers"), {"fields": "email,is_hr"})
+        self.assertEqual(response.json()["managers"], [{"email": self.hr.email, "is_hr": True}])
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({"fields": "salary"}, {"cursor": "!!"}, {"limit": "0"}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("get-employees"), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class EmployeeSearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        employee_index.reset()
+        self.hr = make_user("HR7", "search-hr@example.com", is_hr=True)
+        for empid, name, email in [
+            ("EMP-100", "Priya Sharma", "priya.sharma@example.com"),
+            ("EMP-101", "Priyanka Rao", "p.rao@example.com"),
+            ("EMP-102", "Rahul Verma", "rahul@example.com"),
+        ]:
+            Employee.objects.create(empid=empid, name=name, email=email, password="!")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(reverse("search-employees"), dict(params, q=query))
+        self.assertEqual(response.status_code, 200)
+        return [row["empid"] for row in response.json()["employees"]]
+
+    def test_prefix_and_token_matching_with_ranking(self):
+        self.assertEqual(self.search("priya"), ["EMP-100", "EMP-101"])
+        self.assertEqual(self.search("pri sha"), ["EMP-100"])
+        self.assertEqual(self.search("emp102"), ["EMP-102"])
+        self.assertEqual(self.search("rao@"), ["EMP-101"])
+        self.assertEqual(self.search("pri", limit=1), ["EMP-100"])
+
+    def test_index_follows_model_signals(self):
+        self.search("rahul")
+        with self.captureOnCommitCallbacks(execute=True):
+            employee = Employee.objects.get(empid="EMP-102")
+            employee.name = "Rohan Verma"
+            employee.email = "rohan@example.com"
+            employee.save()
+
+        self.assertEqual(self.search("rahul"), [])
+        self.assertEqual(self.search("rohan"), ["EMP-102"])
+        self.assertEqual(employee_index.stats()["rebuilds"], 1)
+
+        # Another worker's index notices the version bump and rebuilds.
+        other = EmployeeSearchIndex()
+        other.search("rohan")
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.get(empid="EMP-100").delete()
+        self.assertEqual(other.search("priya"), [(Employee.objects.get(empid="EMP-101").pk, 2.0 * 5 / 8)])
+        self.assertEqual(other.stats()["rebuilds"], 2)
+
+
+class HierarchyTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        self.director = make_user("DIR1", "director@example.com", is_manager=True)
+        self.lead = make_user("LEAD1", "lead@example.com", is_manager=True)
+        self.dev = make_user("DEV1", "dev@example.com")
+        EmployeeManagerMap.objects.create(employee=self.lead.employee, manager=self.director)
+        self.dev_map = EmployeeManagerMap.objects.create(employee=self.dev.employee, manager=self.lead)
+        LeaveBalance.objects.create(employee=self.dev.employee, casual_leave=5)
+        self.leave = LeaveRequest.objects.create(
+            employee=self.dev.employee,
+            leave_type="casual",
+            start_date="2030-01-07",
+            end_date="2030-01-07",
+            total_days=1,
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {create_user_token(user)}")
+        return client
+
+    def reports(self, user, **params):
+        response = self.client_for(user).get(
+            reverse("get-manager-employees", args=[user.employee.empid]), params
+        )
+        return sorted(row["empid"] for row in response.json())
+
+    def test_closure_rows_track_depth(self):
+        self.assertEqual(
+            set(EmployeeHierarchy.objects.values_list("ancestor__empid", "descendant__empid", "depth")),
+            {("DIR1", "LEAD1", 1), ("LEAD1", "DEV1", 1), ("DIR1", "DEV1", 2)}
+        )
+
+    def test_manager_endpoints_cover_the_whole_subtree(self):
+        self.assertEqual(self.reports(self.director), ["DEV1", "LEAD1"])
+        self.assertEqual(self.reports(self.director, direct="true"), ["LEAD1"])
+
+        client = self.client_for(self.director)
+        leaves = client.get(reverse("all-leaves")).json()
+        self.assertEqual([leave["id"] for leave in leaves], [self.leave.id])
+
+        response = client.patch(
+            reverse("update-leave-status", args=[self.leave.id]),
+            {"status": "approved"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_mapping_changes_update_the_subtree(self):
+        other = make_user("DIR2", "other-director@example.com", is_manager=True)
+        lead_map = EmployeeManagerMap.objects.get(employee=self.lead.employee)
+        lead_map.manager = other
+        lead_map.save()
+
+        self.assertEqual(self.reports(self.director), [])
+        self.assertEqual(self.reports(other), ["DEV1", "LEAD1"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lead.employee.delete()
+        self.assertFalse(EmployeeHierarchy.objects.filter(descendant=self.dev.employee).exists())
+        self.assertEqual(self.reports(other), [])
+
+
+class BulkOnboardingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        self.hr = make_user("HR8", "bulk-hr@example.com", is_hr=True)
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+
+    def upload(self, name, content):
+        return self.client.post(
+            reverse("bulk-create-users"),
+            {"file": SimpleUploadedFile(name, content.encode())},
+            format="multipart",
+        )
+
+    def test_csv_import_reports_each_row(self):
+        csv_rows = "\n".join([
+            "username,email,empid,is_manager,manager_email",
+            "Lead,lead@bulk.com,B1,true,",
+            "Dev,dev@bulk.com,B2,,lead@bulk.com",
+            "Dup,dup@bulk.com,B2,,",
+            "Taken,other@bulk.com,HR8,,",
+            "Lost,lost@bulk.com,B3,,nobody@bulk.com",
+            "Bad,not-an-email,B4,,",
+        ])
+
+        response = self.upload("people.csv", csv_rows)
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["created"], body["failed"]), (2, 4))
+        statuses = [result["status"] for result in body["results"]]
+        self.assertEqual(statuses, ["created", "created", "error", "error", "error", "error"])
+        self.assertIn("empid", body["results"][2]["errors"])
+        self.assertIn("manager_email", body["results"][4]["errors"])
+
+        dev = User.objects.get(email="dev@bulk.com")
+        self.assertTrue(check_password(body["results"][1]["password"], dev.hashed_password))
+        self.assertTrue(
+            EmployeeHierarchy.objects.filter(
+                ancestor__empid="B1", descendant__empid="B2", depth=1
+            ).exists()
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def run(prefix, count):
+            lines = ["username,email,empid"] + [
+                f"U{i},{prefix}{i}@bulk.com,{prefix}{i}" for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.upload("people.csv", "\n".join(lines))
+            self.assertEqual(response.json()["created"], count)
+            return len(ctx.captured_queries)
+
+        run("warm", 1)
+        self.assertEqual(run("a", 3), run("b", 12))
+
+    def test_jsonl_import_and_parallel_hashing(self):
+        lines = "\n".join(
+            '{"username": "J%d", "email": "j%d@bulk.com", "empid": "J%d"}' % (i, i, i)
+            for i in range(2)
+        )
+        self.assertEqual(self.upload("people.jsonl", lines).json()["created"], 2)
+        self.assertEqual(self.upload("people.txt", lines).status_code, 400)
+
+        with mock.patch.multiple(
+            "user.utils.onboarding",
+            BULK_IMPORT_PARALLEL_THRESHOLD=2,
+            BULK_IMPORT_HASH_PROCESSES=2,
+        ):
+            hashed = hash_passwords(["one", "two", "three"])
+        self.assertTrue(all(
+            check_password(password, encoded)
+            for password, encoded in zip(["one", "two", "three"], hashed)
+        ))
+
+
+class ImageVariantTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.hr = make_user("HR9", "photos-hr@example.com", is_hr=True)
+        self.user = make_user("PIC1", "photo@example.com")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.hr)}"
+        )
+
+    def png(self, size=(1200, 800), mode="RGBA"):
+        buffer = BytesIO()
+        Image.new(mode, size, (200, 40, 40, 128) if mode == "RGBA" else "red").save(buffer, "PNG")
+        return SimpleUploadedFile("photo.png", buffer.getvalue(), content_type="image/png")
+
+    def upload(self):
+        with mock.patch.object(image_worker, "submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("add-photo", args=["PIC1"]),
+                    {"file": self.png()},
+                    format="multipart",
+                )
+        self.assertEqual(response.status_code, 201)
+        self.user.refresh_from_db()
+        submit.assert_called_once_with(self.user.pk, self.user.image.name)
+        return generate_variants(self.user.pk, self.user.image.name)
+
+    def test_upload_queues_variants_that_listings_expose(self):
+        variants = self.upload()
+
+        storage = User._meta.get_field("image").storage
+        self.assertEqual(set(variants), {"64", "160", "480"})
+        with storage.open(variants["160"]["webp"]) as handle:
+            image = Image.open(handle)
+            self.assertEqual((image.format, image.size), ("WEBP", (160, 107)))
+        with storage.open(variants["64"]["jpeg"]) as handle:
+            self.assertEqual(Image.open(handle).mode, "RGB")
+
+        response = self.client.get(reverse("get-employees"), {"fields": "empid,image_variants"})
+        rows = {row["empid"]: row for row in response.json()["employees"]}
+        self.assertTrue(rows["PIC1"]["image_variants"]["64"]["webp"].endswith("64.webp"))
+        self.assertIsNone(rows["HR9"]["image_variants"])
+
+    def test_replacing_the_photo_removes_stale_variants(self):
+        first = self.upload()
+        self.upload()
+
+        storage = User._meta.get_field("image").storage
+        self.assertFalse(storage.exists(first["64"]["webp"]))
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.image_variants, first)
+
+    def test_photo_download_checks_access(self):
+        variants = self.upload()
+
+        response = self.client.get(
+            reverse("download-employee-photo", args=["PIC1"]), {"size": "64"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        storage = User._meta.get_field("image").storage
+        with storage.open(variants["64"]["webp"]) as handle:
+            self.assertEqual(b"".join(response.streaming_content), handle.read())
+
+        own = APIClient()
+        own.credentials(HTTP_AUTHORIZATION=f"Bearer {create_user_token(self.user)}")
+        response = own.get(reverse("download-employee-photo", args=["PIC1"]))
+        self.assertEqual(response["Content-Type"], "image/png")
+
+        stranger = APIClient()
+        stranger.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {create_user_token(make_user('PIC2', 'stranger@example.com'))}"
+        )
+        response = stranger.get(reverse("download-employee-photo", args=["PIC1"]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_oversized_images_are_rejected_before_decoding(self):
+        with mock.patch("user.utils.images.IMAGE_MAX_PIXELS", 1000):
+            response = self.client.post(
+                reverse("add-photo", args=["PIC1"]),
+                {"file": self.png(size=(40, 40), mode="RGB")},
+                format="multipart",
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("too large", str(response.json()))
+
+
+class SoftDeleteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        revocation_list.reset()
+        login_throttle.clear()
+        employee_index.reset()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.hr = make_user("HR7", "purge-hr@example.com", is_hr=True)
+        self.director = make_user("DIR7", "purge-director@example.com", is_manager=True)
+        self.lead = make_user("LEAD7", "purge-lead@example.com", is_manager=True)
+        self.dev = make_user("DEV7", "purge-dev@example.com")
+        EmployeeManagerMap.objects.create(employee=self.lead.employee, manager=self.director)
+        EmployeeManagerMap.objects.create(employee=self.dev.employee, manager=self.lead)
+
+        LeaveBalance.objects.create(employee=self.lead.employee, casual_leave=5)
+        for day in range(7, 12):
+            LeaveRequest.objects.create(
+                employee=self.lead.employee,
+                leave_type="casual",
+                start_date=f"2030-01-{day:02d}",
+                end_date=f"2030-01-{day:02d}",
+                total_days=1,
+            )
+        self.dev_leave = LeaveRequest.objects.create(
+            employee=self.dev.employee,
+            leave_type="casual",
+            start_date="2030-02-04",
+            end_date="2030-02-04",
+            total_days=1,
+            action_by=self.lead,
+        )
+        self.refresh = issue_refresh_token(self.lead)
+        self.lead_token = create_user_token(self.lead)
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def delete_lead(self):
+        client = self.client_for(create_user_token(self.hr))
+        with mock.patch.object(employee_purger, "submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.delete(reverse("delete-employee", args=["LEAD7"]))
+        self.assertEqual(response.status_code, 200)
+        submit.assert_called_once_with(self.lead.employee_id)
+
+    def test_delete_hides_the_employee_at_once(self):
+        self.delete_lead()
+
+        self.assertFalse(Employee.objects.filter(empid="LEAD7").exists())
+        self.assertTrue(Employee.all_objects.filter(empid="LEAD7").exists())
+        self.assertEqual(LeaveRequest.objects.filter(employee=self.lead.employee_id).count(), 5)
+
+        hr = self.client_for(create_user_token(self.hr))
+        self.assertEqual(hr.get(reverse("get-employee-by-id", args=["LEAD7"])).status_code, 404)
+        self.assertEqual(
+            [leave["id"] for leave in hr.get(reverse("all-leaves")).json()],
+            [self.dev_leave.id]
+        )
+        self.assertEqual(
+            hr.get(reverse("search-employees"), {"q": "lead7"}).json()["employees"], []
+        )
+        self.assertFalse(
+            EmployeeHierarchy.objects.filter(descendant=self.dev.employee).exists()
+        )
+
+        self.assertEqual(
+            self.client_for(self.lead_token).get(reverse("get-holidays")).status_code, 403
+        )
+        login = APIClient().post(
+            reverse("login-user"),
+            {"email": "purge-lead@example.com", "password": "secret"},
+            format="json",
+        )
+        self.assertEqual(login.status_code, 401)
+        refresh = APIClient().post(
+            reverse("refresh-token"), {"refresh_token": self.refresh}, format="json"
+        )
+        self.assertEqual(refresh.status_code, 401)
+
+        # Their leave requests cannot be read or acted on by id either.
+        leave = LeaveRequest.objects.filter(employee=self.lead.employee_id).first()
+        self.assertEqual(hr.get(reverse("leave-by-id", args=[leave.id])).status_code, 404)
+        response = hr.patch(
+            reverse("update-leave-status", args=[leave.id]),
+            {"status": "approved"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, "pending")
+
+        # The empid and email stay taken until the purge has run.
+        response = hr.post(
+            reverse("create-user"),
+            {"username": "again", "email": "purge-lead@example.com", "empid": "LEAD7"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_purge_removes_history_in_chunks(self):
+        folder = os.path.join(settings.MEDIA_ROOT, "image", "LEAD7")
+        os.makedirs(folder)
+        self.delete_lead()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(purge_employee(self.lead.employee_id, chunk_size=2))
+        leave_deletes = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('DELETE FROM "leave_requests" WHERE "leave_requests"."id" IN')
+        ]
+        self.assertEqual(len(leave_deletes), 3)
+
+        self.assertFalse(Employee.all_objects.filter(pk=self.lead.employee_id).exists())
+        self.assertFalse(User.all_objects.filter(pk=self.lead.pk).exists())
+        self.assertFalse(LeaveRequest.objects.filter(employee=self.lead.employee_id).exists())
+        self.assertFalse(LeaveBalance.objects.filter(employee=self.lead.employee_id).exists())
+        self.assertFalse(os.path.exists(folder))
+        self.dev_leave.refresh_from_db()
+        self.assertIsNone(self.dev_leave.action_by_id)
+        self.assertTrue(Employee.objects.filter(empid="DEV7").exists())
+
+        self.assertFalse(purge_employee(self.lead.employee_id))
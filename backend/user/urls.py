@@ -1,18 +1,28 @@
 from django.urls import path
-from .views import create_user, login_user, get_employees, get_employee_by_id , change_password, delete_employee, get_employee_photos, update_employee , add_photo , delete_photo, get_managers , get_manager_employees
+from . import async_views
+from .views import create_user, bulk_create_users, login_user, refresh_token, logout_user, revoke_tokens, get_employees, search_employees, get_employee_by_id , change_password, delete_employee, get_employee_photos, download_employee_photo, update_employee , add_photo , delete_photo, get_managers , get_manager_employees
 
 urlpatterns = [
     path('create/', create_user,name="create-user"),
+    path('bulk-create/', bulk_create_users, name="bulk-create-users"),
     path('login/', login_user,name="login-user"),
+    path('refresh/', refresh_token, name="refresh-token"),
+    path('logout/', logout_user, name="logout-user"),
+    path('revoke/', revoke_tokens, name="revoke-tokens"),
     path('get/', get_employees, name="get-employees"),
+    path('search/', search_employees, name="search-employees"),
     path('get_by_id/<str:id>/', get_employee_by_id, name="get-employee-by-id"),
     path('update-employee/', update_employee, name="update-employee"),
     path('change-password/', change_password, name="change-password"),
     path('delete/<str:empid>/', delete_employee, name="delete-employee"),
     path('addphoto/<str:id>/', add_photo, name="add-photo"),
     path('photos/<str:empid>/', get_employee_photos, name="get-employee-photos"),
+    path('photos/<str:empid>/download/', download_employee_photo, name="download-employee-photo"),
     path("deletephoto/<str:id>/", delete_photo, name="delete-photo"),
     path("managers/", get_managers, name="get-managers"),
     path("manager_employee/<str:id>/", get_manager_employees, name="get-manager-employees"),
+
+    path("async/get/", async_views.get_employees, name="get-employees-async"),
+    path("async/addphoto/<str:id>/", async_views.add_photo, name="add-photo-async"),
 ]
 
@@ -1,83 +1,275 @@
 import os
 import jwt
+import time
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from django.conf import settings
-from django.contrib.auth.hashers import make_password, check_password
-from jose import JWTError
+from django.utils.functional import cached_property
 from django.http import JsonResponse
-from user.models import User
+from user.models import Employee, User
+from user.utils import hashing
+from user.utils.revocation import revocation_list
+from user.utils.user_cache import aget_cached_user, aget_token_version, get_cached_user, get_token_version
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 EXPIRE_TIME = getattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 60)
+TOKEN_CACHE_SIZE = getattr(settings, "TOKEN_CACHE_SIZE", 1024)
+TOKEN_CACHE_TTL = getattr(settings, "TOKEN_CACHE_TTL", 300)
 
 def hash_password(password: str):
-    return make_password(password)
+    return hashing.make_password(password)
 
 def verify_password(password: str, hashed_password: str):
-    return check_password(password, hashed_password)
+    is_correct, _ = hashing.check_password(password, hashed_password)
+    return is_correct
+
+def authenticate_password(user, password: str):
+    """
+    Check ``password`` against ``user`` and, when it matches a hash made with
+    an older hasher or cost setting, store a fresh hash in its place.
+    """
+    is_correct, must_update = hashing.check_password(password, user.hashed_password)
+
+    if is_correct and must_update:
+        hashed = hash_password(password)
+        User.objects.filter(pk=user.pk).update(hashed_password=hashed)
+        if user.employee_id:
+            Employee.objects.filter(pk=user.employee_id).update(password=hashed)
+        user.hashed_password = hashed
+
+    return is_correct
+
+def user_claims(user):
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "eid": user.employee_id,
+        "roles": [flag[3:] for flag in User.ROLE_FIELDS if getattr(user, flag)],
+        "ver": user.token_version,
+    }
+
+def create_user_token(user):
+    return create_token(user_claims(user))
 
 def create_token(data: dict):
     to_encode = data.copy()
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     expire = datetime.now(timezone.utc) + timedelta(minutes=EXPIRE_TIME)
     to_encode["exp"] = expire
     token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return token if isinstance(token, str) else token.decode("utf-8")
 
+class TokenCache:
+    """
+    Bounded LRU of verified token payloads, keyed by a SHA-256 digest of
+    the raw token. An entry never outlives the token's own ``exp`` claim.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+
+            self.misses += 1
+            return None
+
+    def set(self, token, payload):
+        if self.maxsize <= 0:
+            return
+
+        expires_at = time.time() + self.ttl
+        if "exp" in payload:
+            expires_at = min(expires_at, float(payload["exp"]))
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+token_cache = TokenCache()
+
 def decode_access_token(token: str):
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
 
-def get_user_from_request(request):
-    auth = request.headers.get("Authorization")
+    token_cache.set(token, payload)
+    return payload
 
+def _bearer_token(request):
+    auth = request.headers.get("Authorization")
     if not auth or not auth.startswith("Bearer "):
-        return None, JsonResponse(
-            {"error": "Authorization missing"}, status=401
-        )
+        return None
+    return auth.split(" ")[1]
 
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
 
-    if not payload:
-        return None, JsonResponse(
-            {"error": "Invalid token"}, status=401
-        )
+class Principal:
+    """
+    The caller behind a request's bearer token.
 
-    user = User.objects.filter(email=payload.get("sub")).first()
-    if not user:
-        return None, JsonResponse(
-            {"error": "User not found"}, status=404
-        )
+    Built once per request by ``get_principal``. Role checks are answered
+    from the token claims; the user row is only looked up when a view asks
+    for ``user``, and is then shared by permissions, views and logging.
+    """
 
-    return user, None
+    def __init__(self, payload=None, error=None):
+        self.payload = payload or {}
+        self.error = error
+        self.error_status = 401
+        self.email = self.payload.get("sub")
+        self.user_id = self.payload.get("uid")
+        self.employee_id = self.payload.get("eid")
+        self.jti = self.payload.get("jti")
 
-# utils/auth.py
+    @cached_property
+    def user(self):
+        if self.error:
+            return None
+        return get_cached_user(self.email)
 
-def authenticate_request(request):
-    auth = request.headers.get("Authorization")
+    async def auser(self):
+        """Async counterpart of ``user``."""
+        if "user" not in self.__dict__:
+            self.__dict__["user"] = (
+                None if self.error else await aget_cached_user(self.email)
+            )
+        return self.user
 
-    if not auth or not auth.startswith("Bearer "):
-        return None, JsonResponse(
-            {"error": "Authorization missing"}, status=401
-        )
+    def _check_version(self, current):
+        if current is None:
+            self.error, self.error_status = "User not found", 404
+        elif current != self.payload["ver"]:
+            self.error = "Token has been revoked"
 
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
+    def _check_user(self, user):
+        if user is None:
+            self.error, self.error_status = "User not found", 404
+
+    @cached_property
+    def is_authenticated(self):
+        if not self.error:
+            if "ver" in self.payload:
+                self._check_version(get_token_version(self.user_id))
+            else:
+                self._check_user(self.user)
+
+        if not self.error and self.jti and revocation_list.is_revoked(self.jti):
+            self.error = "Token has been revoked"
+
+        return not self.error
+
+    async def ais_authenticated(self):
+        """
+        Async counterpart of ``is_authenticated``. Tokens without role claims
+        also get their user row loaded here, so role checks stay sync-safe.
+        """
+        if "is_authenticated" not in self.__dict__:
+            if not self.error:
+                if "ver" in self.payload:
+                    self._check_version(await aget_token_version(self.user_id))
+                else:
+                    self._check_user(await self.auser())
+
+            if not self.error and self.jti and await revocation_list.ais_revoked(self.jti):
+                self.error = "Token has been revoked"
+
+            self.__dict__["is_authenticated"] = not self.error
+        return self.is_authenticated
+
+    def has_role(self, role):
+        roles = self.payload.get("roles")
+        if roles is not None:
+            return role in roles
 
+        # Tokens issued before role claims existed only carry ``sub``.
+        return bool(self.user and getattr(self.user, f"is_{role}"))
+
+    is_superadmin = property(lambda self: self.has_role("superadmin"))
+    is_hr = property(lambda self: self.has_role("hr"))
+    is_manager = property(lambda self: self.has_role("manager"))
+    is_employee = property(lambda self: self.has_role("employee"))
+
+    def error_response(self):
+        if self.is_authenticated:
+            return None
+        return JsonResponse({"error": self.error}, status=self.error_status)
+
+
+def resolve_principal(request):
+    token = _bearer_token(request)
+    if not token:
+        return Principal(error="Authorization missing")
+
+    payload = decode_access_token(token)
     if not payload:
-        return None, JsonResponse(
-            {"error": "Invalid token"}, status=401
-        )
+        return Principal(error="Invalid token")
 
-    user = User.objects.filter(email=payload.get("sub")).first()
-    if not user:
-        return None, JsonResponse(
-            {"error": "User not found"}, status=404
-        )
+    return Principal(payload)
+
+
+def get_principal(request):
+    # DRF wraps the Django request; keep the principal on the inner one so
+    # the middleware and every DRF layer see the same object.
+    http_request = getattr(request, "_request", request)
+
+    principal = getattr(http_request, "principal", None)
+    if principal is None:
+        principal = resolve_principal(http_request)
+        http_request.principal = principal
+    return principal
+
+
+def authenticate_request(request):
+    principal = get_principal(request)
+    return principal.user, principal.error_response()
 
-    return user, None
 
+get_user_from_request = authenticate_request
@@ -0,0 +1,170 @@
+import mimetypes
+import os
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+# "django" streams the file itself; "x-accel-redirect" (nginx) and
+# "x-sendfile" (Apache, lighttpd) hand the transfer to the front proxy.
+MEDIA_DELIVERY = getattr(settings, "MEDIA_DELIVERY", "django")
+MEDIA_ACCEL_PREFIX = getattr(settings, "MEDIA_ACCEL_PREFIX", "/protected-media/")
+
+# Authenticated content: caches may keep it but must revalidate each time.
+CACHE_CONTROL = "private, no-cache"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Return the inclusive ``(start, end)`` of a single byte range, or None
+    when the whole file should be sent instead: no header, a malformed one,
+    or several ranges, which are rare enough not to be worth multipart
+    responses. Raises RangeNotSatisfiable for ranges past the end.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    first, dash, last = spec.partition("-")
+    if not dash or not (first or last) or not (first + last).isdigit():
+        return None
+
+    if not first:
+        # "bytes=-500" is the last 500 bytes.
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(int(last) if last else size - 1, size - 1)
+
+
+def _if_range_matches(request, etag, mtime):
+    """A stale If-Range turns a range request back into a full one."""
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and since == int(mtime)
+
+
+class FileRange:
+    """Reads at most ``length`` bytes of ``fileobj`` from ``start``."""
+
+    def __init__(self, fileobj, start, length):
+        self.fileobj = fileobj
+        self.remaining = length
+        fileobj.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fileobj.close()
+
+
+def _handoff(name, path, content_type, disposition):
+    response = HttpResponse(content_type=content_type)
+    if MEDIA_DELIVERY == "x-sendfile":
+        response["X-Sendfile"] = path
+    else:
+        response["X-Accel-Redirect"] = MEDIA_ACCEL_PREFIX + quote(name.replace(os.sep, "/"))
+    response["Content-Disposition"] = disposition
+    response["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def media_response(request, name, as_attachment=False):
+    """
+    Serve the file ``name`` (relative to MEDIA_ROOT) once the caller has
+    checked permissions.
+
+    Full responses go out through ``FileResponse``, which WSGI servers
+    with ``wsgi.file_wrapper`` (gunicorn, uWSGI) send with ``sendfile``.
+    Single byte ranges and If-None-Match / If-Modified-Since are answered
+    here. With ``MEDIA_DELIVERY`` set to a handoff mode the proxy does all
+    of that instead, from an internal location mapped to MEDIA_ROOT.
+    """
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404("File not found")
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404("File not found")
+    if not os.path.isfile(path):
+        raise Http404("File not found")
+
+    filename = os.path.basename(path)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    disposition = "attachment" if as_attachment else "inline"
+    disposition = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+
+    if MEDIA_DELIVERY in ("x-accel-redirect", "x-sendfile"):
+        return _handoff(name, path, content_type, disposition)
+
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    last_modified = http_date(stat.st_mtime)
+
+    def finish(response):
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        response["Cache-Control"] = CACHE_CONTROL
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if conditional is not None:
+        return finish(conditional)
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.headers.get("Range"), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return finish(response)
+
+    if byte_range and not _if_range_matches(request, etag, stat.st_mtime):
+        byte_range = None
+
+    fileobj = open(path, "rb")
+    if byte_range is None:
+        response = FileResponse(fileobj, content_type=content_type)
+        response["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            FileRange(fileobj, start, end - start + 1),
+            status=206,
+            content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+
+    response["Content-Disposition"] = disposition
+    return finish(response)
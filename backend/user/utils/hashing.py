@@ -0,0 +1,117 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from django.conf import settings
+from django.contrib.auth import hashers
+
+PASSWORD_HASHER = getattr(settings, "PASSWORD_HASHER", "default")
+PASSWORD_HASH_WORKERS = getattr(settings, "PASSWORD_HASH_WORKERS", 4)
+PASSWORD_HASH_MAX_PENDING = getattr(settings, "PASSWORD_HASH_MAX_PENDING", 16)
+PASSWORD_HASH_TIMEOUT = getattr(settings, "PASSWORD_HASH_TIMEOUT", 10)
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing pool is saturated and cannot take more work."""
+
+
+class PasswordHashPool:
+    """
+    Runs password hashing on a fixed set of worker threads.
+
+    At most ``workers`` hashes run at once and at most ``max_pending`` wait
+    for a worker; anything beyond that is rejected up front with
+    ``HashingPoolBusy`` instead of queueing behind a login burst. The
+    PBKDF2/scrypt implementations in hashlib release the GIL, so threads are
+    enough to keep hashing off the rest of the worker's request threads.
+    """
+
+    def __init__(
+        self,
+        workers=PASSWORD_HASH_WORKERS,
+        max_pending=PASSWORD_HASH_MAX_PENDING,
+        timeout=PASSWORD_HASH_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="password-hash"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_time = 0.0
+        self.max_queue_time = 0.0
+        self.total_run_time = 0.0
+
+    def _record(self, queue_time, run_time):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+            self.total_queue_time += queue_time
+            self.max_queue_time = max(self.max_queue_time, queue_time)
+            self.total_run_time += run_time
+
+    def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolBusy("Password hashing pool is saturated")
+
+        with self._lock:
+            self._pending += 1
+        enqueued = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(started - enqueued, time.perf_counter() - started)
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(task)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingPoolBusy("Password hashing timed out")
+
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._pending,
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_queue_time": self.total_queue_time / completed if completed else 0.0,
+                "max_queue_time": self.max_queue_time,
+                "avg_run_time": self.total_run_time / completed if completed else 0.0,
+            }
+
+
+hash_pool = PasswordHashPool()
+
+
+def make_password(password):
+    return hash_pool.run(hashers.make_password, password, None, PASSWORD_HASHER)
+
+
+def check_password(password, encoded):
+    """
+    Return ``(is_correct, must_update)`` where ``must_update`` is True when
+    ``encoded`` was produced by another hasher or weaker cost settings than
+    the configured ``PASSWORD_HASHER``.
+    """
+    return hash_pool.run(hashers.verify_password, password, encoded, PASSWORD_HASHER)
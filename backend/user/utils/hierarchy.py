@@ -0,0 +1,141 @@
+from django.db import transaction
+from user.models import Employee, EmployeeHierarchy, EmployeeManagerMap
+
+# Keeps IN (...) lists under the bound-parameter limits of SQLite and MySQL.
+CHUNK_SIZE = 500
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield values[start:start + CHUNK_SIZE]
+
+
+def closure_depths(nodes, parents, external):
+    """
+    Return ``{node: {ancestor: depth}}`` for ``nodes``.
+
+    ``parents`` maps each node to its direct managers' employee ids and
+    ``external`` holds the already known ancestors of parents outside
+    ``nodes``. Nodes are visited parents-first, so each one only merges
+    its parents' results. Nodes caught in a management cycle are visited
+    last, and the cycle edges add nothing to them.
+    """
+    nodes = set(nodes)
+    pending = {
+        node: sum(1 for parent in parents.get(node, ()) if parent in nodes and parent != node)
+        for node in nodes
+    }
+    children = {}
+    for node in nodes:
+        for parent in parents.get(node, ()):
+            if parent in nodes and parent != node:
+                children.setdefault(parent, []).append(node)
+
+    order = [node for node, count in pending.items() if count == 0]
+    for node in order:
+        for child in children.get(node, ()):
+            pending[child] -= 1
+            if pending[child] == 0:
+                order.append(child)
+    order.extend(node for node, count in pending.items() if count > 0)
+
+    depths = {}
+    for node in order:
+        ancestors = {}
+        for parent in parents.get(node, ()):
+            if parent == node:
+                continue
+            upstream = depths.get(parent, {}) if parent in nodes else external.get(parent, {})
+            for ancestor, depth in [(parent, 0), *upstream.items()]:
+                if ancestor != node and depth + 1 < ancestors.get(ancestor, depth + 2):
+                    ancestors[ancestor] = depth + 1
+        depths[node] = ancestors
+    return depths
+
+
+def _subtree(roots):
+    """Return ``roots`` plus every employee below them, following the mappings."""
+    seen = set(roots)
+    frontier = set(roots)
+    while frontier:
+        found = set()
+        for chunk in _chunks(frontier):
+            found.update(
+                EmployeeManagerMap.objects.filter(manager__employee_id__in=chunk)
+                .values_list("employee_id", flat=True)
+            )
+        frontier = found - seen
+        seen |= frontier
+    return seen
+
+
+def refresh_hierarchy(employee_ids):
+    """
+    Recompute the hierarchy rows of ``employee_ids`` and everyone below them.
+
+    Called whenever a mapping (or a manager's employee link) changes. Only
+    the affected subtree is rewritten; ancestors outside it are read from
+    the existing rows.
+    """
+    roots = set()
+    for chunk in _chunks({pk for pk in employee_ids if pk is not None}):
+        roots.update(Employee.objects.filter(id__in=chunk).values_list("id", flat=True))
+    if not roots:
+        return
+
+    nodes = _subtree(roots)
+
+    parents = {}
+    for chunk in _chunks(nodes):
+        edges = EmployeeManagerMap.objects.filter(
+            employee_id__in=chunk,
+            manager__employee_id__isnull=False
+        ).values_list("employee_id", "manager__employee_id")
+        for employee_id, parent_id in edges:
+            parents.setdefault(employee_id, set()).add(parent_id)
+
+    outside = {parent for ids in parents.values() for parent in ids} - nodes
+    external = {}
+    for chunk in _chunks(outside):
+        rows = EmployeeHierarchy.objects.filter(descendant_id__in=chunk).values_list(
+            "descendant_id", "ancestor_id", "depth"
+        )
+        for descendant_id, ancestor_id, depth in rows:
+            external.setdefault(descendant_id, {})[ancestor_id] = depth
+
+    depths = closure_depths(nodes, parents, external)
+    rows = [
+        EmployeeHierarchy(ancestor_id=ancestor, descendant_id=node, depth=depth)
+        for node, ancestors in depths.items()
+        for ancestor, depth in ancestors.items()
+    ]
+
+    with transaction.atomic():
+        for chunk in _chunks(nodes):
+            EmployeeHierarchy.objects.filter(descendant_id__in=chunk).delete()
+        EmployeeHierarchy.objects.bulk_create(rows, batch_size=CHUNK_SIZE)
+
+
+def reports_of(manager_user_id, manager_employee_id, max_depth=None):
+    """
+    Subquery of the employee ids anywhere below a manager, for use as
+    ``employee_id__in=...``. A manager user without a linked employee has no
+    node in the hierarchy and falls back to their direct mappings.
+    """
+    if manager_employee_id is None:
+        return EmployeeManagerMap.objects.filter(
+            manager_id=manager_user_id
+        ).values("employee_id")
+
+    links = EmployeeHierarchy.objects.filter(ancestor_id=manager_employee_id)
+    if max_depth is not None:
+        links = links.filter(depth__lte=max_depth)
+    return links.values("descendant_id")
+
+
+def manages(manager_user_id, manager_employee_id, employee_id):
+    return Employee.objects.filter(
+        id=employee_id,
+        id__in=reports_of(manager_user_id, manager_employee_id)
+    ).exists()
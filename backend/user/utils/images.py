@@ -0,0 +1,183 @@
+import os
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from uuid import uuid4
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+from PIL import Image, ImageOps, UnidentifiedImageError
+from lms.log_app import loggers
+from user.models import User
+
+IMAGE_VARIANT_SIZES = getattr(settings, "IMAGE_VARIANT_SIZES", (64, 160, 480))
+IMAGE_VARIANT_WORKERS = getattr(settings, "IMAGE_VARIANT_WORKERS", 2)
+IMAGE_MAX_PIXELS = getattr(settings, "IMAGE_MAX_PIXELS", 40_000_000)
+
+# Pillow save arguments per variant format (file extension -> format, options).
+IMAGE_VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class ImageTooLarge(ValueError):
+    """Raised for images whose header declares more than IMAGE_MAX_PIXELS."""
+
+
+def open_limited(fileobj):
+    """
+    Open an image lazily and reject it before any pixel data is decoded if
+    its declared size exceeds ``IMAGE_MAX_PIXELS``. Pillow's own
+    decompression-bomb warning is promoted to an error as well.
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            image = Image.open(fileobj)
+    except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ImageTooLarge("Image dimensions are too large")
+
+    if image.width * image.height > IMAGE_MAX_PIXELS:
+        raise ImageTooLarge("Image dimensions are too large")
+    return image
+
+
+def image_upload_error(file):
+    """Return an error message for an unusable image upload, or None."""
+    try:
+        open_limited(file)
+    except ImageTooLarge as e:
+        return str(e)
+    except (UnidentifiedImageError, OSError):
+        return "Invalid image file"
+    finally:
+        file.seek(0)
+    return None
+
+
+def _storage():
+    return User._meta.get_field("image").storage
+
+
+def render_variants(name):
+    """
+    Decode the stored image ``name`` once and write every configured size in
+    every variant format. Returns ``{size: {extension: storage name}}``.
+    """
+    storage = _storage()
+    largest = max(IMAGE_VARIANT_SIZES)
+
+    with storage.open(name, "rb") as handle:
+        image = open_limited(handle)
+        # JPEG can decode straight to a reduced scale, skipping most pixels.
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    # A fresh folder per render, so deleting stale variants can never touch
+    # the files of a newer upload that reused the same original name.
+    stem = os.path.splitext(os.path.basename(name))[0]
+    folder = os.path.join(os.path.dirname(name), "variants", f"{stem}-{uuid4().hex[:8]}")
+
+    variants = {}
+    # Each size is downscaled from the previous, larger one.
+    for size in sorted(IMAGE_VARIANT_SIZES, reverse=True):
+        image.thumbnail((size, size), Image.LANCZOS)
+        for extension, (image_format, options) in IMAGE_VARIANT_FORMATS.items():
+            frame = image
+            if image_format == "JPEG" and image.mode == "RGBA":
+                frame = Image.new("RGB", image.size, "white")
+                frame.paste(image, mask=image.getchannel("A"))
+
+            buffer = BytesIO()
+            frame.save(buffer, image_format, **options)
+            variants.setdefault(str(size), {})[extension] = storage.save(
+                os.path.join(folder, f"{size}.{extension}"),
+                ContentFile(buffer.getvalue())
+            )
+    return variants
+
+
+def delete_variants(variants):
+    storage = _storage()
+    for formats in (variants or {}).values():
+        for name in formats.values():
+            storage.delete(name)
+
+
+def variant_urls(variants, request=None):
+    """Map stored variant names to URLs, absolute when a request is given."""
+    if not variants:
+        return None
+    storage = _storage()
+    build = request.build_absolute_uri if request else (lambda url: url)
+    return {
+        size: {extension: build(storage.url(name)) for extension, name in formats.items()}
+        for size, formats in variants.items()
+    }
+
+
+def generate_variants(user_id, name):
+    """
+    Render the variants of ``name`` and attach them to the user, unless the
+    user has uploaded another image in the meantime.
+    """
+    variants = render_variants(name)
+    # A queryset update: no signals, and no token_version bump.
+    updated = User.objects.filter(pk=user_id, image=name).update(image_variants=variants)
+    if not updated:
+        delete_variants(variants)
+    return variants
+
+
+class ImageVariantWorker:
+    """
+    Renders image variants on a small pool of background threads, so an
+    upload request returns as soon as the original is stored. Pillow
+    releases the GIL while decoding, resizing and encoding.
+
+    Queued jobs are lost if the process exits; the
+    ``generate_image_variants`` command fills in whatever is missing.
+    """
+
+    def __init__(self, workers=IMAGE_VARIANT_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def _run(self, user_id, name):
+        try:
+            generate_variants(user_id, name)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            loggers.error(f"Image variants failed for user {user_id} ({name})", exc_info=True)
+        else:
+            with self._lock:
+                self.completed += 1
+        finally:
+            # Pool threads outlive the job; do not leak their connections.
+            connection.close()
+
+    def submit(self, user_id, name):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="image-variants"
+                )
+        return self._executor.submit(self._run, user_id, name)
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "completed": self.completed, "failed": self.failed}
+
+
+image_worker = ImageVariantWorker()
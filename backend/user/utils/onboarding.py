@@ -0,0 +1,280 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import DatabaseError, transaction
+from user.models import Employee, EmployeeManagerMap, User
+from user.serializers import BulkEmployeeRowSerializer
+from user.utils import hashing
+from user.utils.helpers import generate_password
+from user.utils.hierarchy import refresh_hierarchy
+from user.utils.search import employee_index
+
+BULK_IMPORT_MAX_ROWS = getattr(settings, "BULK_IMPORT_MAX_ROWS", 10000)
+BULK_IMPORT_CHUNK_SIZE = getattr(settings, "BULK_IMPORT_CHUNK_SIZE", 500)
+BULK_IMPORT_HASH_PROCESSES = getattr(settings, "BULK_IMPORT_HASH_PROCESSES", os.cpu_count() or 1)
+# Below this many rows the process pool costs more than it saves.
+BULK_IMPORT_PARALLEL_THRESHOLD = getattr(settings, "BULK_IMPORT_PARALLEL_THRESHOLD", 32)
+
+# Keeps IN (...) lists under the bound-parameter limits of SQLite and MySQL.
+LOOKUP_CHUNK_SIZE = 500
+
+
+class BulkImportError(ValueError):
+    """Raised when an upload cannot be read as CSV or JSONL at all."""
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def parse_upload(upload):
+    """Return the rows of a ``.csv`` or ``.jsonl`` upload as dicts."""
+    name = (upload.name or "").lower()
+    try:
+        text = io.TextIOWrapper(upload.file, encoding="utf-8-sig")
+        if name.endswith(".csv"):
+            rows = list(csv.DictReader(text))
+        elif name.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in text if line.strip()]
+        else:
+            raise BulkImportError("Upload a .csv or .jsonl file")
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise BulkImportError(f"Could not parse upload: {e}")
+
+    if not rows:
+        raise BulkImportError("Upload contains no rows")
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise BulkImportError(f"Upload exceeds {BULK_IMPORT_MAX_ROWS} rows")
+    if not all(isinstance(row, dict) for row in rows):
+        raise BulkImportError("Each JSONL line must be an object")
+    return rows
+
+
+def _init_hash_worker():
+    import django
+    django.setup()
+
+
+def _hash_passwords(passwords, hasher):
+    return [hashers.make_password(password, None, hasher) for password in passwords]
+
+
+def hash_passwords(passwords):
+    """
+    Hash ``passwords`` in order. Large batches are spread over a process
+    pool, because pure-Python hashers and the per-call overhead would
+    otherwise serialize on the GIL. Small batches use the shared thread
+    pool.
+    """
+    if len(passwords) < BULK_IMPORT_PARALLEL_THRESHOLD or BULK_IMPORT_HASH_PROCESSES < 2:
+        return [hashing.make_password(password) for password in passwords]
+
+    size = max(1, -(-len(passwords) // (BULK_IMPORT_HASH_PROCESSES * 4)))
+    with ProcessPoolExecutor(
+        max_workers=BULK_IMPORT_HASH_PROCESSES,
+        initializer=_init_hash_worker
+    ) as executor:
+        batches = executor.map(
+            _hash_passwords,
+            _chunks(passwords, size),
+            [hashing.PASSWORD_HASHER] * -(-len(passwords) // size)
+        )
+        return [hashed for batch in batches for hashed in batch]
+
+
+def _existing(model, field, values):
+    found = set()
+    for chunk in _chunks(values, LOOKUP_CHUNK_SIZE):
+        found.update(
+            model.all_objects.filter(**{f"{field}__in": chunk}).values_list(field, flat=True)
+        )
+    return found
+
+
+class BulkOnboarding:
+    """
+    Creates employees and their users from parsed upload rows.
+
+    Rows are validated individually for shape. Uniqueness and manager
+    lookups are then checked for the whole upload with a handful of IN
+    queries, and valid rows are inserted with ``bulk_create`` in chunked
+    transactions. A row may name as its manager another manager created
+    earlier in the same upload.
+    """
+
+    def __init__(self, rows, created_by):
+        self.rows = rows
+        self.created_by = created_by
+        self.results = [{"row": index + 1, "status": "pending"} for index in range(len(rows))]
+
+    def _fail(self, index, errors):
+        result = self.results[index]
+        result["status"] = "error"
+        result["errors"] = errors
+
+    def _validate_rows(self):
+        valid = {}
+        for index, row in enumerate(self.rows):
+            # Empty CSV cells fall back to the serializer defaults.
+            data = {key: value for key, value in row.items() if value not in ("", None)}
+            serializer = BulkEmployeeRowSerializer(data=data)
+            if not serializer.is_valid():
+                self._fail(index, serializer.errors)
+                continue
+
+            values = serializer.validated_data
+            self.results[index].update(empid=values["empid"], email=values["email"])
+            if values["is_superadmin"] and self.created_by.is_manager:
+                self._fail(index, {"is_superadmin": ["Manager cannot create SuperAdmin"]})
+                continue
+            valid[index] = values
+        return valid
+
+    def _check_uniqueness(self, valid):
+        empids = {values["empid"] for values in valid.values()}
+        emails = {values["email"] for values in valid.values()}
+        taken_empids = _existing(Employee, "empid", empids)
+        taken_emails = _existing(User, "email", emails) | _existing(Employee, "email", emails)
+
+        seen_empids, seen_emails = set(), set()
+        for index, values in list(valid.items()):
+            email = values["email"]
+            errors = {}
+            if values["empid"] in taken_empids:
+                errors["empid"] = ["Employee ID already exists"]
+            elif values["empid"] in seen_empids:
+                errors["empid"] = ["Duplicate Employee ID in upload"]
+            if email in taken_emails:
+                errors["email"] = ["Email already exists"]
+            elif email in seen_emails:
+                errors["email"] = ["Duplicate email in upload"]
+
+            seen_empids.add(values["empid"])
+            seen_emails.add(email)
+            if errors:
+                self._fail(index, errors)
+                del valid[index]
+
+    def _resolve_managers(self, valid):
+        wanted = {values["manager_email"] for values in valid.values() if values.get("manager_email")}
+        managers = {}
+        for chunk in _chunks(wanted, LOOKUP_CHUNK_SIZE):
+            managers.update(
+                User.objects.filter(email__in=chunk, is_manager=True).values_list("email", "id")
+            )
+
+        # Managers created by the upload must come before their reports.
+        in_upload = set()
+        upload_managers = {values["email"] for values in valid.values() if values["is_manager"]}
+        for index in sorted(valid):
+            values = valid[index]
+            manager_email = values.get("manager_email")
+            if manager_email and manager_email not in managers and manager_email not in in_upload:
+                message = (
+                    "Manager must appear before their reports"
+                    if manager_email in upload_managers else "Invalid manager email"
+                )
+                self._fail(index, {"manager_email": [message]})
+                del valid[index]
+            elif values["is_manager"]:
+                in_upload.add(values["email"])
+        return managers
+
+    def _insert_chunk(self, indexes, valid, passwords, hashed, managers):
+        employees = [
+            Employee(
+                empid=valid[index]["empid"],
+                name=valid[index]["username"],
+                email=valid[index]["email"],
+                password=hashed[index],
+            )
+            for index in indexes
+        ]
+
+        with transaction.atomic():
+            Employee.objects.bulk_create(employees)
+            # Not every backend returns primary keys from bulk_create (MySQL
+            # does not), so they are read back by the unique empid.
+            employee_ids = dict(
+                Employee.objects.filter(
+                    empid__in=[employee.empid for employee in employees]
+                ).values_list("empid", "id")
+            )
+
+            User.objects.bulk_create([
+                User(
+                    email=valid[index]["email"],
+                    hashed_password=hashed[index],
+                    is_superadmin=valid[index]["is_superadmin"],
+                    is_hr=valid[index]["is_hr"],
+                    is_manager=valid[index]["is_manager"],
+                    is_employee=True,
+                    employee_id=employee_ids[valid[index]["empid"]],
+                )
+                for index in indexes
+            ])
+            user_ids = dict(
+                User.objects.filter(
+                    email__in=[valid[index]["email"] for index in indexes]
+                ).values_list("email", "id")
+            )
+            managers.update(
+                (valid[index]["email"], user_ids[valid[index]["email"]])
+                for index in indexes if valid[index]["is_manager"]
+            )
+
+            EmployeeManagerMap.objects.bulk_create([
+                EmployeeManagerMap(
+                    employee_id=employee_ids[valid[index]["empid"]],
+                    manager_id=managers[valid[index]["manager_email"]],
+                )
+                for index in indexes if valid[index].get("manager_email")
+            ])
+
+        for index in indexes:
+            self.results[index].update(
+                status="created",
+                password=passwords[index],
+                user_id=user_ids[valid[index]["email"]],
+            )
+        return [
+            employee_ids[valid[index]["empid"]]
+            for index in indexes if valid[index].get("manager_email")
+        ]
+
+    def run(self):
+        valid = self._validate_rows()
+        self._check_uniqueness(valid)
+        managers = self._resolve_managers(valid)
+
+        order = sorted(valid)
+        passwords = {index: generate_password() for index in order}
+        hashed = dict(zip(order, hash_passwords([passwords[index] for index in order])))
+
+        mapped = []
+        for indexes in _chunks(order, BULK_IMPORT_CHUNK_SIZE):
+            # Reports of a manager whose own chunk failed cannot be mapped.
+            chunk_emails = {valid[index]["email"] for index in indexes}
+            for index in list(indexes):
+                manager_email = valid[index].get("manager_email")
+                if manager_email and manager_email not in managers and manager_email not in chunk_emails:
+                    self._fail(index, {"manager_email": ["Manager could not be created"]})
+                    indexes.remove(index)
+
+            try:
+                mapped += self._insert_chunk(indexes, valid, passwords, hashed, managers)
+            except DatabaseError as e:
+                for index in indexes:
+                    self._fail(index, {"non_field_errors": [f"Database error: {e}"]})
+
+        if mapped:
+            refresh_hierarchy(mapped)
+        if any(result["status"] == "created" for result in self.results):
+            employee_index.invalidate()
+        return self.results
@@ -0,0 +1,188 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import F
+from django.utils import timezone
+from lms.log_app import loggers
+from user.models import Employee, EmployeeHierarchy, EmployeeManagerMap, RefreshToken, User
+from user.utils.images import delete_variants
+from user.utils.search import employee_index
+from user.utils.user_cache import invalidate_token_version, invalidate_users
+
+EMPLOYEE_PURGE_CHUNK_SIZE = getattr(settings, "EMPLOYEE_PURGE_CHUNK_SIZE", 500)
+EMPLOYEE_PURGE_WORKERS = getattr(settings, "EMPLOYEE_PURGE_WORKERS", 1)
+
+
+def deactivate_employee(employee, user=None):
+    """
+    Hide ``employee`` and its ``user`` at once and queue the rest of the
+    deletion for the background purger.
+
+    Only a handful of indexed updates run here: both rows are stamped with
+    ``deleted_at``, which the default managers filter out, the user's tokens
+    are revoked, and the reporting lines through the employee are removed
+    so the hierarchy no longer passes through it.
+    """
+    now = timezone.now()
+    user_ids = [user.pk] if user is not None else []
+
+    with transaction.atomic():
+        Employee.all_objects.filter(pk=employee.pk).update(deleted_at=now)
+        User.all_objects.filter(pk__in=user_ids).update(
+            deleted_at=now,
+            token_version=F("token_version") + 1
+        )
+        RefreshToken.objects.filter(
+            user_id__in=user_ids,
+            revoked_at__isnull=True
+        ).update(revoked_at=now)
+
+        # Mapping deletes send signals that refresh the affected subtrees.
+        EmployeeManagerMap.objects.filter(
+            models.Q(employee_id=employee.pk) | models.Q(manager_id__in=user_ids)
+        ).delete()
+        # One row per ancestor; the rows below the employee go with the refresh.
+        EmployeeHierarchy.objects.filter(descendant_id=employee.pk).delete()
+
+        emails = list(
+            User.all_objects.filter(employee_id=employee.pk).values_list("email", flat=True)
+        )
+        employee_id = employee.pk
+
+        def hidden():
+            # After commit, so no request can cache the old rows again.
+            invalidate_users(*emails)
+            for user_id in user_ids:
+                invalidate_token_version(user_id)
+            employee_index.remove(employee_id)
+            employee_purger.submit(employee_id)
+
+        transaction.on_commit(hidden)
+
+
+def _delete_in_chunks(queryset, chunk_size):
+    deleted = 0
+    manager = queryset.model._base_manager
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += manager.filter(pk__in=ids).delete()[0]
+
+
+def _clear_in_chunks(queryset, field, chunk_size):
+    cleared = 0
+    manager = queryset.model._base_manager
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return cleared
+        cleared += manager.filter(pk__in=ids).update(**{field: None})
+
+
+def _purge_relations(instance, chunk_size):
+    """
+    Remove every row pointing at ``instance`` the way its ``on_delete``
+    would, ``chunk_size`` rows per statement. Each statement commits on
+    its own, so no lock is held across the whole history.
+    """
+    for relation in instance._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        field = relation.field
+        queryset = relation.related_model._base_manager.filter(**{field.name: instance.pk})
+        on_delete = field.remote_field.on_delete
+        if on_delete is models.CASCADE:
+            _delete_in_chunks(queryset, chunk_size)
+        elif on_delete is models.SET_NULL:
+            _clear_in_chunks(queryset, field.name, chunk_size)
+
+
+def _delete_files(employee, users):
+    emp_dir = os.path.join(settings.MEDIA_ROOT, "image", str(employee.empid))
+    if os.path.exists(emp_dir):
+        shutil.rmtree(emp_dir)
+
+    for user in users:
+        delete_variants(user.image_variants)
+        if user.image:
+            user.image.storage.delete(user.image.name)
+
+
+def purge_employee(employee_id, chunk_size=EMPLOYEE_PURGE_CHUNK_SIZE):
+    """
+    Delete a deactivated employee, its deactivated users and everything
+    that references them. Safe to run again after an interruption; returns
+    False if there was nothing to purge.
+    """
+    employee = Employee.all_objects.filter(pk=employee_id, deleted_at__isnull=False).first()
+    if employee is None:
+        return False
+    users = list(User.all_objects.filter(employee_id=employee_id, deleted_at__isnull=False))
+
+    _purge_relations(employee, chunk_size)
+    for user in users:
+        _purge_relations(user, chunk_size)
+
+    _delete_files(employee, users)
+
+    # Nothing references the rows any more, so these deletes stay small.
+    with transaction.atomic():
+        for user in users:
+            user.delete()
+        employee.delete()
+    return True
+
+
+def deactivated_employee_ids():
+    return Employee.all_objects.filter(deleted_at__isnull=False).values_list("id", flat=True)
+
+
+class EmployeePurger:
+    """
+    Purges deactivated employees on background threads, so deleting an
+    employee with a long leave history returns immediately.
+
+    Queued jobs are lost if the process exits; the ``purge_employees``
+    command finishes whatever is left.
+    """
+
+    def __init__(self, workers=EMPLOYEE_PURGE_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def _run(self, employee_id):
+        try:
+            purge_employee(employee_id)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            loggers.error(f"Purge failed for employee {employee_id}", exc_info=True)
+        else:
+            with self._lock:
+                self.completed += 1
+        finally:
+            # Pool threads outlive the job; do not leak their connections.
+            connection.close()
+
+    def submit(self, employee_id):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="employee-purge"
+                )
+        return self._executor.submit(self._run, employee_id)
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "completed": self.completed, "failed": self.failed}
+
+
+employee_purger = EmployeePurger()
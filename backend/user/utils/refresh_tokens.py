@@ -0,0 +1,81 @@
+import hashlib
+import hmac
+import secrets
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from user.models import RefreshToken
+
+REFRESH_TOKEN_EXPIRE_DAYS = getattr(settings, "REFRESH_TOKEN_EXPIRE_DAYS", 7)
+
+
+class InvalidRefreshToken(Exception):
+    pass
+
+
+def _digest(raw_token):
+    return hmac.new(
+        settings.SECRET_KEY.encode("utf-8"),
+        raw_token.encode("utf-8"),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def issue_refresh_token(user, family=None):
+    raw_token = secrets.token_urlsafe(48)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=_digest(raw_token),
+        family=family or uuid.uuid4(),
+        expires_at=timezone.now() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return raw_token
+
+
+def rotate_refresh_token(raw_token):
+    """
+    Exchange ``raw_token`` for a new refresh token in the same family.
+
+    Costs one HMAC, one indexed lookup and a conditional update; presenting
+    a token that was already rotated revokes every token in its family.
+    Returns ``(user, new_raw_token)``.
+    """
+    token = (
+        RefreshToken.objects.select_related("user")
+        .filter(token_hash=_digest(raw_token))
+        .first()
+    )
+    if not token:
+        raise InvalidRefreshToken("Invalid refresh token")
+
+    now = timezone.now()
+    if token.expires_at <= now:
+        raise InvalidRefreshToken("Refresh token expired")
+
+    claimed = RefreshToken.objects.filter(
+        pk=token.pk,
+        revoked_at__isnull=True
+    ).update(revoked_at=now)
+
+    if not claimed:
+        RefreshToken.objects.filter(
+            family=token.family,
+            revoked_at__isnull=True
+        ).update(revoked_at=now)
+        raise InvalidRefreshToken("Refresh token already used")
+
+    return token.user, issue_refresh_token(token.user, family=token.family)
+
+
+def revoke_refresh_token(raw_token):
+    """Revoke ``raw_token`` and every token rotated from the same login."""
+    token = RefreshToken.objects.filter(token_hash=_digest(raw_token)).first()
+    if not token:
+        return False
+
+    RefreshToken.objects.filter(
+        family=token.family,
+        revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+    return True
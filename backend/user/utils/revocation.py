@@ -0,0 +1,185 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from user.models import RefreshToken, RevokedToken, User
+from user.utils.user_cache import invalidate_token_version, invalidate_users
+
+ACCESS_TOKEN_EXPIRE_MINUTES = getattr(settings, "ACCESS_TOKEN_EXPIRE_MINUTES", 60)
+REVOCATION_BLOOM_CAPACITY = getattr(settings, "REVOCATION_BLOOM_CAPACITY", 10000)
+REVOCATION_BLOOM_ERROR_RATE = getattr(settings, "REVOCATION_BLOOM_ERROR_RATE", 0.001)
+REVOCATION_SYNC_INTERVAL = getattr(settings, "REVOCATION_SYNC_INTERVAL", 5)
+REVOCATION_REBUILD_INTERVAL = getattr(settings, "REVOCATION_REBUILD_INTERVAL", 3600)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationList:
+    """
+    Per-process view of ``RevokedToken`` fronted by a Bloom filter.
+
+    New rows are pulled in incrementally (by id) at most every
+    ``REVOCATION_SYNC_INTERVAL`` seconds, and the filter is rebuilt from the
+    unexpired rows every ``REVOCATION_REBUILD_INTERVAL`` seconds or when it
+    outgrows its capacity. Tokens the filter has never seen are accepted
+    without touching the database; only filter hits are confirmed with an
+    indexed lookup.
+    """
+
+    def __init__(
+        self,
+        capacity=REVOCATION_BLOOM_CAPACITY,
+        error_rate=REVOCATION_BLOOM_ERROR_RATE,
+        sync_interval=REVOCATION_SYNC_INTERVAL,
+        rebuild_interval=REVOCATION_REBUILD_INTERVAL,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._last_id = 0
+            self._last_sync = None
+            self._last_rebuild = None
+            self.filter_hits = 0
+            self.false_positives = 0
+
+    def _sync_due(self):
+        return (
+            self._last_sync is None
+            or time.monotonic() - self._last_sync >= self.sync_interval
+        )
+
+    def _sync(self):
+        if not self._sync_due():
+            return
+
+        with self._lock:
+            if not self._sync_due():
+                return
+
+            now = time.monotonic()
+
+            rebuild = (
+                self._last_rebuild is None
+                or now - self._last_rebuild >= self.rebuild_interval
+                or self._bloom.count > self._bloom.capacity
+            )
+            if rebuild:
+                active = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+                bloom = BloomFilter(max(self.capacity, active.count() * 2), self.error_rate)
+                rows = active.values_list("id", "jti")
+                self._last_id = 0
+                self._last_rebuild = now
+            else:
+                bloom = self._bloom
+                rows = RevokedToken.objects.filter(id__gt=self._last_id).values_list("id", "jti")
+
+            for row_id, jti in rows.order_by("id").iterator():
+                bloom.add(jti)
+                self._last_id = row_id
+
+            self._bloom = bloom
+            self._last_sync = now
+
+    def add(self, jti):
+        with self._lock:
+            self._bloom.add(jti)
+
+    def is_revoked(self, jti):
+        self._sync()
+        if jti not in self._bloom:
+            return False
+
+        self.filter_hits += 1
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    async def ais_revoked(self, jti):
+        """Async counterpart of ``is_revoked``."""
+        if self._sync_due():
+            await sync_to_async(self._sync)()
+        if jti not in self._bloom:
+            return False
+
+        self.filter_hits += 1
+        revoked = await RevokedToken.objects.filter(jti=jti).aexists()
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def stats(self):
+        return {
+            "entries": self._bloom.count,
+            "capacity": self._bloom.capacity,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(jti, exp=None, user_id=None):
+    """
+    Deny-list the access token ``jti``. ``exp`` is the token's expiry as a
+    timestamp; when unknown the longest possible access token lifetime is
+    assumed.
+    """
+    if exp is None:
+        exp = time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    RevokedToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user_id": user_id,
+            "expires_at": datetime.fromtimestamp(exp, tz=dt_timezone.utc),
+        }
+    )
+    revocation_list.add(jti)
+
+
+def revoke_user_tokens(user):
+    """Revoke every access and refresh token issued to ``user`` so far."""
+    User.objects.filter(pk=user.pk).update(token_version=F("token_version") + 1)
+    invalidate_token_version(user.pk)
+    invalidate_users(user.email)
+    RefreshToken.objects.filter(
+        user=user,
+        revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
@@ -0,0 +1,212 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+from django.core.cache import cache
+from user.models import Employee
+
+EMPLOYEE_SEARCH_LIMIT = getattr(settings, "EMPLOYEE_SEARCH_LIMIT", 10)
+EMPLOYEE_SEARCH_MAX_LIMIT = getattr(settings, "EMPLOYEE_SEARCH_MAX_LIMIT", 50)
+EMPLOYEE_SEARCH_REBUILD_INTERVAL = getattr(settings, "EMPLOYEE_SEARCH_REBUILD_INTERVAL", 600)
+
+VERSION_KEY = "search:employee:version"
+
+# A term matching an empid outranks a name match, which outranks an email match.
+FIELD_WEIGHTS = {"empid": 3.0, "name": 2.0, "email": 1.0}
+
+TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_SPLIT.split((text or "").lower()) if token]
+
+
+def document_tokens(empid, name, email):
+    """Return ``{token: weight}`` for one employee, keeping each token's best field."""
+    local_part = (email or "").split("@")[0]
+    fields = [
+        ("email", tokenize(email) + ["".join(tokenize(local_part))]),
+        ("name", tokenize(name)),
+        # "EMP-0042" is also indexed as "emp0042" so it matches typed without the dash.
+        ("empid", tokenize(empid) + ["".join(tokenize(empid))]),
+    ]
+
+    tokens = {}
+    for field, values in fields:
+        for token in values:
+            if token:
+                tokens[token] = max(tokens.get(token, 0.0), FIELD_WEIGHTS[field])
+    return tokens
+
+
+class EmployeeSearchIndex:
+    """
+    In-process inverted index over employee name, email and empid.
+
+    Tokens are kept in a sorted list, so a prefix maps to a contiguous slice
+    found with two bisections. Every query term must match a token of the
+    document, either exactly or as a prefix, and documents are ranked by
+    field weight and by how much of the matched token the term covers.
+
+    Model signals apply changes to this process's index and bump a version
+    stamp in the cache. Other workers see the new stamp on their next query
+    and rebuild, and every worker also rebuilds every
+    ``EMPLOYEE_SEARCH_REBUILD_INTERVAL`` seconds so bulk updates that send
+    no signals are picked up.
+    """
+
+    def __init__(self, rebuild_interval=EMPLOYEE_SEARCH_REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._built = False
+            self._version = None
+            self._built_at = None
+            self._postings = {}
+            self._tokens = []
+            self._docs = {}
+            self.rebuilds = 0
+
+    def _add(self, pk, empid, name, email):
+        tokens = document_tokens(empid, name, email)
+        self._docs[pk] = tokens
+        for token, weight in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                index = bisect_left(self._tokens, token)
+                self._tokens.insert(index, token)
+            postings[pk] = weight
+
+    def _remove(self, pk):
+        for token in self._docs.pop(pk, ()):
+            postings = self._postings[token]
+            postings.pop(pk, None)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+    def _rebuild(self, version):
+        postings = {}
+        docs = {}
+        rows = Employee.objects.values_list("id", "empid", "name", "email").iterator()
+        for pk, empid, name, email in rows:
+            tokens = document_tokens(empid, name, email)
+            docs[pk] = tokens
+            for token, weight in tokens.items():
+                postings.setdefault(token, {})[pk] = weight
+
+        self._postings = postings
+        self._tokens = sorted(postings)
+        self._docs = docs
+        self._version = version
+        self._built_at = time.monotonic()
+        self._built = True
+        self.rebuilds += 1
+
+    def _ensure_fresh(self):
+        version = cache.get(VERSION_KEY, 0)
+        stale = (
+            not self._built
+            or version != self._version
+            or time.monotonic() - self._built_at >= self.rebuild_interval
+        )
+        if stale:
+            self._rebuild(version)
+
+    def _bump(self):
+        cache.add(VERSION_KEY, 0, None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, None)
+            version = 1
+        # Only skip the rebuild when no other writer bumped in between.
+        if self._built and version == (self._version or 0) + 1:
+            self._version = version
+
+    def invalidate(self):
+        """Force every worker to rebuild, e.g. after a bulk insert."""
+        with self._lock:
+            self._bump()
+            self._built = False
+
+    def update(self, employee):
+        with self._lock:
+            if self._built:
+                self._remove(employee.pk)
+                self._add(employee.pk, employee.empid, employee.name, employee.email)
+            self._bump()
+
+    def remove(self, pk):
+        with self._lock:
+            if self._built:
+                self._remove(pk)
+            self._bump()
+
+    def _term_scores(self, term):
+        scores = {}
+        # Tokens only hold [0-9a-z], so "{" sorts after every token with this prefix.
+        start = bisect_left(self._tokens, term)
+        end = bisect_left(self._tokens, term + "{", start)
+        for index in range(start, end):
+            token = self._tokens[index]
+            coverage = 2.0 if token == term else len(term) / len(token)
+            for pk, weight in self._postings[token].items():
+                score = weight * coverage
+                if score > scores.get(pk, 0.0):
+                    scores[pk] = score
+        return scores
+
+    def _document_score(self, pk, term):
+        best = 0.0
+        for token, weight in self._docs[pk].items():
+            if token.startswith(term):
+                coverage = 2.0 if token == term else len(term) / len(token)
+                best = max(best, weight * coverage)
+        return best
+
+    def search(self, query, limit=EMPLOYEE_SEARCH_LIMIT, within=None):
+        """
+        Return ``[(employee_id, score), ...]`` for the best ``limit`` matches.
+        ``within`` optionally restricts results to a set of employee ids.
+        """
+        terms = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not terms:
+            return []
+
+        with self._lock:
+            self._ensure_fresh()
+
+            # The longest term has the fewest matching tokens; start from it and
+            # score the remaining terms against the surviving documents only.
+            totals = self._term_scores(terms[0])
+            for term in terms[1:]:
+                narrowed = {}
+                for pk, total in totals.items():
+                    score = self._document_score(pk, term)
+                    if score:
+                        narrowed[pk] = total + score
+                totals = narrowed
+
+        if within is not None:
+            totals = {pk: score for pk, score in totals.items() if pk in within}
+
+        return heapq.nlargest(limit, totals.items(), key=lambda item: (item[1], -item[0]))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "tokens": len(self._tokens),
+                "version": self._version,
+                "rebuilds": self.rebuilds,
+            }
+
+
+employee_index = EmployeeSearchIndex()
@@ -0,0 +1,157 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from django.conf import settings
+from django.core.cache import cache
+
+LOGIN_THROTTLE_WINDOW = getattr(settings, "LOGIN_THROTTLE_WINDOW", 300)
+LOGIN_THROTTLE_EMAIL_LIMIT = getattr(settings, "LOGIN_THROTTLE_EMAIL_LIMIT", 5)
+LOGIN_THROTTLE_IP_LIMIT = getattr(settings, "LOGIN_THROTTLE_IP_LIMIT", 20)
+LOGIN_THROTTLE_BACKEND = getattr(settings, "LOGIN_THROTTLE_BACKEND", "memory")
+LOGIN_THROTTLE_TRUST_FORWARDED = getattr(settings, "LOGIN_THROTTLE_TRUST_FORWARDED", False)
+
+
+class MemoryWindowStore:
+    """
+    Exact sliding-window log per key, local to this process. Keys are kept
+    in order of their last hit, and past ``max_keys`` the least recently
+    hit key is dropped, so a spray of distinct keys cannot grow the store.
+    """
+
+    max_keys = 10000
+
+    def __init__(self):
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, hits, now, window):
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+
+    def count(self, key, window, now):
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0, 0
+            self._prune(hits, now, window)
+            retry_after = hits[0] + window - now if hits else 0
+            return len(hits), retry_after
+
+    def add(self, key, window, now):
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            else:
+                self._hits.move_to_end(key)
+            hits.append(now)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+
+    def reset(self, key, window, now):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._hits.clear()
+
+
+class CacheWindowStore:
+    """
+    Sliding-window counter kept in Django's cache so several workers share
+    it. The current and previous fixed windows are blended by overlap.
+    """
+
+    prefix = "throttle:login:"
+
+    def _key(self, key, index):
+        return f"{self.prefix}{key}:{index}"
+
+    def count(self, key, window, now):
+        index = int(now // window)
+        current = cache.get(self._key(key, index), 0)
+        previous = cache.get(self._key(key, index - 1), 0)
+        elapsed = (now % window) / window
+        return previous * (1 - elapsed) + current, window - now % window
+
+    def add(self, key, window, now):
+        cache_key = self._key(key, int(now // window))
+        cache.add(cache_key, 0, window * 2)
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            cache.set(cache_key, 1, window * 2)
+
+    def reset(self, key, window, now):
+        index = int(now // window)
+        cache.delete_many([self._key(key, index), self._key(key, index - 1)])
+
+    def clear(self):
+        pass
+
+
+class LoginThrottle:
+    """
+    Limits login attempts per email and per client IP. ``check`` runs before
+    the user lookup and password hashing, so rejected attempts cost nothing.
+    """
+
+    def __init__(
+        self,
+        store,
+        window=LOGIN_THROTTLE_WINDOW,
+        email_limit=LOGIN_THROTTLE_EMAIL_LIMIT,
+        ip_limit=LOGIN_THROTTLE_IP_LIMIT,
+    ):
+        self.store = store
+        self.window = window
+        self.email_limit = email_limit
+        self.ip_limit = ip_limit
+        self.rejected = {"email": 0, "ip": 0}
+        self._lock = threading.Lock()
+
+    def check(self, email, ip):
+        """Record an attempt; return seconds to wait if it is over the limit."""
+        now = time.time()
+        keys = [
+            ("email", f"email:{email.lower()}", self.email_limit),
+            ("ip", f"ip:{ip}", self.ip_limit),
+        ]
+
+        for scope, key, limit in keys:
+            count, retry_after = self.store.count(key, self.window, now)
+            if count >= limit:
+                with self._lock:
+                    self.rejected[scope] += 1
+                return max(1, math.ceil(retry_after))
+
+        for _, key, _ in keys:
+            self.store.add(key, self.window, now)
+        return None
+
+    def reset(self, email):
+        self.store.reset(f"email:{email.lower()}", self.window, time.time())
+
+    def clear(self):
+        self.store.clear()
+        with self._lock:
+            self.rejected = {"email": 0, "ip": 0}
+
+    def stats(self):
+        with self._lock:
+            return {"rejected": dict(self.rejected)}
+
+
+def client_ip(request):
+    if LOGIN_THROTTLE_TRUST_FORWARDED:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+login_throttle = LoginThrottle(
+    CacheWindowStore() if LOGIN_THROTTLE_BACKEND == "cache" else MemoryWindowStore()
+)
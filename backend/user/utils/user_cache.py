@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.core.cache import cache
+from user.models import User
+
+USER_CACHE_TIMEOUT = getattr(settings, "USER_CACHE_TIMEOUT", 300)
+KEY_PREFIX = "user:principal:"
+VERSION_KEY_PREFIX = "user:token_version:"
+
+
+def _cache_key(email):
+    return f"{KEY_PREFIX}{email}"
+
+
+def _version_key(user_id):
+    return f"{VERSION_KEY_PREFIX}{user_id}"
+
+
+def get_cached_user(email):
+    """
+    Return the User for ``email`` from the shared cache, falling back to the
+    database on a miss. The password hash is deferred and never cached.
+    """
+    if not email:
+        return None
+
+    key = _cache_key(email)
+    user = cache.get(key)
+    if user is not None:
+        return user
+
+    user = User.objects.filter(email=email).defer("hashed_password").first()
+    if user is not None:
+        cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+async def aget_cached_user(email):
+    """Async counterpart of ``get_cached_user``."""
+    if not email:
+        return None
+
+    key = _cache_key(email)
+    user = await cache.aget(key)
+    if user is not None:
+        return user
+
+    user = await User.objects.filter(email=email).defer("hashed_password").afirst()
+    if user is not None:
+        await cache.aset(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_users(*emails):
+    keys = [_cache_key(email) for email in set(emails) if email]
+    if keys:
+        cache.delete_many(keys)
+
+
+def get_token_version(user_id):
+    """Current ``token_version`` for ``user_id``, or None if the user is gone."""
+    if user_id is None:
+        return None
+
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is not None:
+        return version
+
+    version = (
+        User.objects.filter(pk=user_id)
+        .values_list("token_version", flat=True)
+        .first()
+    )
+    if version is not None:
+        cache.set(key, version, USER_CACHE_TIMEOUT)
+    return version
+
+
+async def aget_token_version(user_id):
+    """Async counterpart of ``get_token_version``."""
+    if user_id is None:
+        return None
+
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is not None:
+        return version
+
+    version = await (
+        User.objects.filter(pk=user_id)
+        .values_list("token_version", flat=True)
+        .afirst()
+    )
+    if version is not None:
+        await cache.aset(key, version, USER_CACHE_TIMEOUT)
+    return version
+
+
+def invalidate_token_version(user_id):
+    cache.delete(_version_key(user_id))
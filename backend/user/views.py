@@ -3,7 +3,18 @@ from uuid import uuid4
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from .utils.auth import verify_password, create_token, hash_password ,decode_access_token
+from .utils.auth import verify_password, create_user_token, hash_password ,authenticate_request, authenticate_password, get_principal
+from .utils.hashing import HashingPoolBusy
+from .utils.throttle import client_ip, login_throttle
+from .utils.refresh_tokens import InvalidRefreshToken, issue_refresh_token, revoke_refresh_token, rotate_refresh_token
+from .utils.revocation import revoke_token, revoke_user_tokens
+from .utils.hierarchy import reports_of
+from .utils.downloads import media_response
+from .utils.images import image_upload_error, variant_urls
+from .utils.onboarding import BulkImportError, BulkOnboarding, parse_upload
+from .utils.purge import deactivate_employee
+from .utils.search import EMPLOYEE_SEARCH_LIMIT, EMPLOYEE_SEARCH_MAX_LIMIT, employee_index
+from .utils.pagination import PaginationError, keyset_page, page_params, paginated_response, requested_fields, split_page
 from .models import User, Employee, EmployeeManagerMap
 from django.contrib.auth.hashers import check_password, make_password
 import shutil
@@ -13,8 +24,12 @@ from rest_framework import status
 from django.http import Http404
 from .serializers import (
     LoginSerializer,
+    RefreshTokenSerializer,
+    LogoutSerializer,
+    RevokeTokenSerializer,
     CreateEmployeeSerializer,
     EmployeeSerializer,
+    BulkCreateEmployeesSerializer,
     UpdateEmployeeSerializer,
     ChangePasswordSerializer,
     DeleteEmployeeSerializer,
@@ -25,11 +40,10 @@ from .serializers import (
     GetManagerEmployeesSerializer
 )
 from .models import User, Employee
-from .utils.auth import create_token, decode_access_token, verify_password
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.decorators import api_view, permission_classes
-from .permissions import JWTAuthenticationPermission,IsHRorSuperAdmin, IsHR, IsManager, IsEmployee
+from .permissions import JWTAuthenticationPermission,IsHRorSuperAdmin, IsHR, IsManager, IsEmployee, can_access_employee
 from django.http.multipartparser import MultiPartParser
 
 ALLOWED_IMAGE_TYPES = ["image/png", "image/jpeg", "image/jpg"]
@@ -39,6 +53,27 @@ PHOTOS_BASE_PATH = os.path.join(settings.MEDIA_ROOT, "media/employee")
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+listing_parameters = [
+    openapi.Parameter(
+        "cursor",
+        openapi.IN_QUERY,
+        description="Opaque cursor from the X-Next-Cursor header of the previous page",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "limit",
+        openapi.IN_QUERY,
+        description="Page size",
+        type=openapi.TYPE_INTEGER,
+    ),
+    openapi.Parameter(
+        "fields",
+        openapi.IN_QUERY,
+        description="Comma-separated subset of fields to return",
+        type=openapi.TYPE_STRING,
+    ),
+]
+
 login_request_schema = openapi.Schema(
     type=openapi.TYPE_OBJECT,
     required=["email", "password"],
@@ -65,6 +100,10 @@ login_response_schema = openapi.Schema(
             type=openapi.TYPE_STRING,
             example="eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9..."
         ),
+        "refresh_token": openapi.Schema(
+            type=openapi.TYPE_STRING,
+            example="q3v9cN0pZ0u0Yx..."
+        ),
         "token_type": openapi.Schema(
             type=openapi.TYPE_STRING,
             example="bearer"
@@ -94,27 +133,160 @@ def login_user(request):
         email = serializer.validated_data["email"]
         password = serializer.validated_data["password"]
 
+        retry_after = login_throttle.check(email, client_ip(request))
+        if retry_after:
+            response = JsonResponse(
+                {"error": "Too many login attempts, try again later"},
+                status=429
+            )
+            response["Retry-After"] = str(retry_after)
+            return response
+
         user = User.objects.filter(email=email).first()
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not authenticate_password(user, password):
             return JsonResponse(
                 {"error": "Invalid email/password"},
                 status=401
             )
 
-        token = create_token({"sub": user.email})
+        login_throttle.reset(email)
+        token = create_user_token(user)
 
         return JsonResponse(
             {
                 "username": user.email,
                 "access_token": token,
+                "refresh_token": issue_refresh_token(user),
                 "token_type": "bearer",
             },
             status=200,
         )
 
+    except HashingPoolBusy:
+        response = JsonResponse(
+            {"error": "Too many login attempts in progress, retry shortly"},
+            status=503
+        )
+        response["Retry-After"] = "1"
+        return response
+
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
     
+@swagger_auto_schema(
+    method="post",
+    operation_summary="Refresh Access Token",
+    operation_description="Exchange a refresh token for a new access token and a rotated refresh token",
+    request_body=RefreshTokenSerializer,
+    responses={200: login_response_schema, 401: "Invalid refresh token"},
+    tags=["Authentication"],
+)
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def refresh_token(request):
+    serializer = RefreshTokenSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        user, new_refresh_token = rotate_refresh_token(
+            serializer.validated_data["refresh_token"]
+        )
+    except InvalidRefreshToken as e:
+        return JsonResponse({"error": str(e)}, status=401)
+
+    return JsonResponse(
+        {
+            "username": user.email,
+            "access_token": create_user_token(user),
+            "refresh_token": new_refresh_token,
+            "token_type": "bearer",
+        },
+        status=200,
+    )
+
+@swagger_auto_schema(
+    method="post",
+    operation_summary="Logout",
+    operation_description="Revoke the current access token and, if given, its refresh token",
+    manual_parameters=[
+        openapi.Parameter(
+            "Authorization",
+            openapi.IN_HEADER,
+            description="Bearer <token>",
+            type=openapi.TYPE_STRING,
+            required=True,
+        )
+    ],
+    request_body=LogoutSerializer,
+    responses={200: "Logged out"},
+    tags=["Authentication"],
+)
+@api_view(["POST"])
+@permission_classes([JWTAuthenticationPermission])
+def logout_user(request):
+    serializer = LogoutSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    principal = get_principal(request)
+    if not principal.jti:
+        return JsonResponse(
+            {"error": "Token cannot be revoked, please log in again"},
+            status=400
+        )
+
+    revoke_token(
+        principal.jti,
+        exp=principal.payload.get("exp"),
+        user_id=principal.user_id
+    )
+
+    refresh = serializer.validated_data.get("refresh_token")
+    if refresh:
+        revoke_refresh_token(refresh)
+
+    return JsonResponse({"message": "Logged out successfully"}, status=200)
+
+
+@swagger_auto_schema(
+    method="post",
+    operation_summary="Revoke Tokens",
+    operation_description="Revoke a single access token by jti, or every token of a user by email",
+    manual_parameters=[
+        openapi.Parameter(
+            "Authorization",
+            openapi.IN_HEADER,
+            description="Bearer <token>",
+            type=openapi.TYPE_STRING,
+            required=True,
+        )
+    ],
+    request_body=RevokeTokenSerializer,
+    responses={200: "Revoked", 404: "User not found"},
+    tags=["Authentication"],
+)
+@api_view(["POST"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def revoke_tokens(request):
+    serializer = RevokeTokenSerializer(data=request.data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    jti = serializer.validated_data.get("jti")
+    email = serializer.validated_data.get("email")
+
+    if email:
+        user = User.objects.filter(email=email).first()
+        if not user:
+            return JsonResponse({"error": "User not found"}, status=404)
+        revoke_user_tokens(user)
+
+    if jti:
+        revoke_token(jti)
+
+    return JsonResponse({"message": "Tokens revoked successfully"}, status=200)
+
 @swagger_auto_schema(
     method="post", 
     operation_summary="Create Employee",
@@ -140,19 +312,9 @@ def create_user(request):
     if request.method != "POST":
         return JsonResponse({"error": "POST required"}, status=400)
 
-    token = request.headers.get("Authorization")
-    if not token or not token.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization header missing"}, status=401)
-
-    token = token.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user_email = payload.get("sub")
-    current_user = User.objects.filter(email=current_user_email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr or current_user.is_manager):
         return JsonResponse(
@@ -175,6 +337,10 @@ def create_user(request):
         if file.content_type not in ALLOWED_IMAGE_TYPES:
             return JsonResponse({"error": "Invalid image type"}, status=400)
 
+        image_error = image_upload_error(file)
+        if image_error:
+            return JsonResponse({"error": image_error}, status=400)
+
         # Prepare serializer data
         serializer_data = {
             "username": request.POST.get("username"),
@@ -211,6 +377,61 @@ def create_user(request):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+@swagger_auto_schema(
+    method="post",
+    operation_summary="Bulk Create Employees",
+    operation_description=(
+        "Create employees from a .csv or .jsonl upload with the columns "
+        "username, email, empid, is_superadmin, is_hr, is_manager and "
+        "manager_email. Returns a per-row report."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            "Authorization",
+            openapi.IN_HEADER,
+            description="Bearer <token>",
+            type=openapi.TYPE_STRING,
+            required=True,
+        )
+    ],
+    consumes=["multipart/form-data"],
+    request_body=BulkCreateEmployeesSerializer,
+    tags=["Employee"],
+)
+@api_view(["POST"])
+@permission_classes([JWTAuthenticationPermission,IsHRorSuperAdmin|IsManager])
+@csrf_exempt
+def bulk_create_users(request):
+    current_user = request.user_obj
+
+    serializer = BulkCreateEmployeesSerializer(data={"file": request.FILES.get("file")})
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    try:
+        rows = parse_upload(serializer.validated_data["file"])
+    except BulkImportError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        results = BulkOnboarding(rows, current_user).run()
+    except HashingPoolBusy:
+        response = JsonResponse(
+            {"error": "Server is busy, please retry shortly"},
+            status=503
+        )
+        response["Retry-After"] = "5"
+        return response
+
+    created = sum(1 for result in results if result["status"] == "created")
+    return JsonResponse({
+        "message": "Bulk import finished",
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+    }, status=200)
+
+
 def to_bool(v):
     if isinstance(v, bool):
         return v
@@ -228,7 +449,8 @@ def to_bool(v):
             description="Bearer <token>",
             type=openapi.TYPE_STRING,
             required=True,
-        )
+        ),
+        *listing_parameters,
     ],
     responses={200: EmployeeSerializer(many=True)},
     tags=["Employee"],
@@ -240,33 +462,99 @@ def get_employees(request):
     current_user = request.user_obj   
 
     try:
+        after, limit = page_params(request)
+        fields = requested_fields(request, EmployeeSerializer.Meta.fields)
+
+        employees = Employee.objects.for_listing(fields)
         if current_user.is_manager:
-            mapping = EmployeeManagerMap.objects.filter(manager=current_user)
-            employees = Employee.objects.filter(
-                id__in=[m.employee.id for m in mapping]
-            )
-        else:
-            employees = Employee.objects.all()
+            employees = employees.filter(manager_mapping__manager=current_user)
 
-        if not employees.exists():
+        employees, next_cursor = split_page(
+            keyset_page(employees, after, limit), limit
+        )
+        if not employees and after is None:
             return JsonResponse({"error": "No employees found"}, status=404)
 
-        serializer = EmployeeSerializer(employees, many=True)
+        serializer = EmployeeSerializer(
+            employees, many=True, fields=fields, context={"request": request}
+        )
         data = serializer.data
 
-        for emp_dict in data:
-            emp_id = emp_dict["id"]
-            user = User.objects.filter(employee_id=emp_id).first()
-            if user and user.image:
-                emp_dict["image_url"] = request.build_absolute_uri(user.image.url)
-            else:
-                emp_dict["image_url"] = None
+        return paginated_response(
+            JsonResponse({"employees": data, "next_cursor": next_cursor}, safe=False),
+            next_cursor
+        )
 
-        return JsonResponse({"employees": data}, safe=False)
+    except PaginationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Search Employees",
+    manual_parameters=[
+        openapi.Parameter(
+            "Authorization",
+            openapi.IN_HEADER,
+            description="Bearer <token>",
+            type=openapi.TYPE_STRING,
+            required=True,
+        ),
+        openapi.Parameter(
+            "q",
+            openapi.IN_QUERY,
+            description="Name, email or empid, or a prefix of any of their words",
+            type=openapi.TYPE_STRING,
+            required=True,
+        ),
+        openapi.Parameter(
+            "limit",
+            openapi.IN_QUERY,
+            description="Maximum number of matches",
+            type=openapi.TYPE_INTEGER,
+        ),
+    ],
+    responses={200: EmployeeSerializer(many=True)},
+    tags=["Employee"],
+)
+@api_view(["GET"])
+@permission_classes([JWTAuthenticationPermission, IsHRorSuperAdmin])
+def search_employees(request):
+    current_user = request.user_obj
+
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"error": "q is required"}, status=400)
+
+    try:
+        limit = min(int(request.GET.get("limit", EMPLOYEE_SEARCH_LIMIT)), EMPLOYEE_SEARCH_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+    if limit < 1:
+        return JsonResponse({"error": "limit must be positive"}, status=400)
+
+    within = None
+    if current_user.is_manager:
+        within = set(
+            EmployeeManagerMap.objects.filter(manager=current_user)
+            .values_list("employee_id", flat=True)
+        )
+
+    matches = employee_index.search(query, limit=limit, within=within)
+    employees = Employee.objects.with_image().in_bulk([pk for pk, _ in matches])
+
+    results = []
+    for pk, score in matches:
+        # Skip rows deleted since the index last refreshed.
+        if pk in employees:
+            row = EmployeeSerializer(employees[pk], context={"request": request}).data
+            row["score"] = round(score, 3)
+            results.append(row)
+
+    return JsonResponse({"employees": results}, status=200)
+
 @swagger_auto_schema(
     method="get", 
     operation_summary="Get Employee By ID",
@@ -289,24 +577,14 @@ def get_employee_by_id(request, id):
     if request.method != "GET":
         return JsonResponse({"error": "GET request required"}, status=400)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    email = payload.get("sub")
-    current_user = User.objects.filter(email=email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr or current_user.is_manager):
         return JsonResponse({"error": "Permission denied"}, status=403)
 
-    emp_obj = Employee.objects.filter(empid=id).first()
+    emp_obj = Employee.objects.with_image().filter(empid=id).first()
     if not emp_obj:
         return JsonResponse({"error": "Employee not found"}, status=404)
 
@@ -316,16 +594,9 @@ def get_employee_by_id(request, id):
         ).exists():
             return JsonResponse({"error": "Access denied"}, status=403)
 
-    serializer = EmployeeSerializer(emp_obj)
+    serializer = EmployeeSerializer(emp_obj, context={"request": request})
     employee = serializer.data
 
-    user_obj = User.objects.filter(employee=emp_obj).first()
-
-    if user_obj and user_obj.image:
-        employee["image_url"] = request.build_absolute_uri(user_obj.image.url)
-    else:
-        employee["image_url"] = None
-
     return JsonResponse({"employee": employee})
 
     
@@ -354,18 +625,9 @@ def update_employee(request):
     parser = MultiPartParser(request.META, request, request.upload_handlers)
     data, files = parser.parse()
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization header missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user = User.objects.filter(email=payload.get("sub")).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr):
         return JsonResponse(
@@ -377,6 +639,12 @@ def update_employee(request):
     if not serializer.is_valid():
         return JsonResponse(serializer.errors, status=400)
 
+    image_file = files.get("file")
+    if image_file:
+        image_error = image_upload_error(image_file)
+        if image_error:
+            return JsonResponse({"error": image_error}, status=400)
+
     validated = serializer.validated_data
     empid = validated["empid"]
 
@@ -409,10 +677,10 @@ def update_employee(request):
         if validated.get("is_manager") is not None:
             user.is_manager = validated["is_manager"]
 
-        image_file = files.get("file")
         if image_file:
-            user.image = image_file   
-            user.save()
+            user.image = image_file
+
+        user.save()
 
         return JsonResponse({
             "message": "Employee updated successfully",
@@ -462,10 +730,10 @@ def change_password(request):
         if not user:
             return JsonResponse({"error": "User not found"}, status=404)
 
-        if not check_password(old_password, user.hashed_password):
+        if not verify_password(old_password, user.hashed_password):
             return JsonResponse({"error": "Incorrect old password"}, status=401)
 
-        hashed_password = make_password(new_password)
+        hashed_password = hash_password(new_password)
 
         if user.is_employee:
             emp = Employee.objects.filter(email=email).first()
@@ -481,6 +749,14 @@ def change_password(request):
             status=200
         )
 
+    except HashingPoolBusy:
+        response = JsonResponse(
+            {"error": "Server is busy, please retry shortly"},
+            status=503
+        )
+        response["Retry-After"] = "1"
+        return response
+
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
@@ -505,19 +781,9 @@ def delete_employee(request, empid):
     if request.method != "DELETE":
         return JsonResponse({"error": "DELETE request required"}, status=400)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    email = payload.get("sub")
-    current_user = User.objects.filter(email=email).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr):
         return JsonResponse(
@@ -557,13 +823,9 @@ def delete_employee(request, empid):
                     status=403
                 )
 
-            user.delete()
-
-        employee.delete()
-
-        emp_dir = os.path.join(UPLOAD_FOLDER, str(empid))
-        if os.path.exists(emp_dir):
-            shutil.rmtree(emp_dir)
+        # Hidden at once; leave history, mappings and files are purged in the
+        # background by user.utils.purge.
+        deactivate_employee(employee, user)
 
         return JsonResponse(
             {"message": "Employee and associated user deleted successfully"},
@@ -599,18 +861,9 @@ def add_photo(request, id):
     if request.method != "POST":
         return JsonResponse({"error": "POST required"}, status=400)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user = User.objects.filter(email=payload.get("sub")).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr or current_user.is_manager):
         return JsonResponse(
@@ -684,18 +937,9 @@ def get_employee_photos(request, empid):
     if request.method != "GET":
         return JsonResponse({"error": "GET request required"}, status=400)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user = User.objects.filter(email=payload.get("sub")).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr or current_user.is_manager):
         return JsonResponse(
@@ -734,10 +978,76 @@ def get_employee_photos(request, empid):
     image_url = request.build_absolute_uri(user.image.url)
 
     return JsonResponse(
-        {"image": image_url},
+        {
+            "image": image_url,
+            "variants": variant_urls(user.image_variants, request),
+        },
         status=200
     )
 
+@swagger_auto_schema(
+    method="get",
+    operation_summary="Download Employee Photo",
+    operation_description=(
+        "Streams the photo to the employee, their managers and HR. "
+        "Supports Range and If-None-Match / If-Modified-Since."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            "Authorization",
+            openapi.IN_HEADER,
+            type=openapi.TYPE_STRING,
+            required=True,
+        ),
+        openapi.Parameter(
+            "size",
+            openapi.IN_QUERY,
+            description="Variant size; the original is sent if it is not rendered yet",
+            type=openapi.TYPE_STRING,
+        ),
+        openapi.Parameter(
+            "format",
+            openapi.IN_QUERY,
+            description="Variant format: webp (default) or jpeg",
+            type=openapi.TYPE_STRING,
+        ),
+    ],
+    tags=["Photos"],
+)
+@api_view(["GET"])
+@permission_classes([JWTAuthenticationPermission])
+def download_employee_photo(request, empid):
+    current_user = request.user_obj
+
+    employee = Employee.objects.filter(empid=empid).first()
+    if not employee:
+        return JsonResponse({"error": "Employee not found"}, status=404)
+
+    if not can_access_employee(current_user, employee.id):
+        return JsonResponse(
+            {"error": "You don't have access to this employee"},
+            status=403
+        )
+
+    user = (
+        User.objects.filter(employee=employee)
+        .only("id", "image", "image_variants")
+        .first()
+    )
+    if not user or not user.image:
+        return JsonResponse({"error": "No image uploaded"}, status=404)
+
+    name = user.image.name
+    size = request.GET.get("size")
+    if size:
+        formats = (user.image_variants or {}).get(size, {})
+        name = formats.get(request.GET.get("format", "webp"), name)
+
+    try:
+        return media_response(request, name)
+    except Http404:
+        return JsonResponse({"error": "Image file not found"}, status=404)
+
 @swagger_auto_schema(
     method="delete",
     operation_summary="Delete Employee Photo",
@@ -758,18 +1068,9 @@ def delete_photo(request, id):
     if request.method != "DELETE":
         return JsonResponse({"error": "DELETE request required"}, status=405)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user = User.objects.filter(email=payload.get("sub")).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr or current_user.is_manager):
         return JsonResponse(
@@ -816,6 +1117,33 @@ def delete_photo(request, id):
         status=200
     )
 
+# Columns each get_managers field reads, and how the field is rendered.
+MANAGER_LISTING = {
+    "id": ((), lambda manager, request: manager.id),
+    "email": (("email",), lambda manager, request: manager.email),
+    "name": (
+        ("employee", "employee__name"),
+        lambda manager, request: manager.employee.name if manager.employee else "",
+    ),
+    "empid": (
+        ("employee", "employee__empid"),
+        lambda manager, request: manager.employee.empid if manager.employee else "",
+    ),
+    "image_url": (
+        ("image",),
+        lambda manager, request: (
+            request.build_absolute_uri(manager.image.url) if manager.image else None
+        ),
+    ),
+    "image_variants": (
+        ("image_variants",),
+        lambda manager, request: variant_urls(manager.image_variants, request),
+    ),
+    "is_superadmin": (("is_superadmin",), lambda manager, request: manager.is_superadmin),
+    "is_hr": (("is_hr",), lambda manager, request: manager.is_hr),
+    "is_manager": (("is_manager",), lambda manager, request: manager.is_manager),
+}
+
 @swagger_auto_schema(
     method="get",
     operation_summary="Get Managers",
@@ -825,7 +1153,8 @@ def delete_photo(request, id):
             openapi.IN_HEADER,
             type=openapi.TYPE_STRING,
             required=True,
-        )
+        ),
+        *listing_parameters,
     ],
     tags=["Manager"],
 )
@@ -836,18 +1165,9 @@ def get_managers(request):
     if request.method != "GET":
         return JsonResponse({"error": "GET request required"}, status=400)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user = User.objects.filter(email=payload.get("sub")).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr):
         return JsonResponse(
@@ -856,30 +1176,36 @@ def get_managers(request):
         )
 
     try:
-        managers = User.objects.filter(is_manager=True).select_related("employee")
+        after, limit = page_params(request)
+        fields = requested_fields(request, tuple(MANAGER_LISTING)) or tuple(MANAGER_LISTING)
 
-        response_list = []
+        columns = {"id"}
+        for name in fields:
+            columns.update(MANAGER_LISTING[name][0])
 
-        for manager in managers:
-            emp = manager.employee
+        managers = User.objects.filter(is_manager=True).only(*columns)
+        if "employee" in columns:
+            managers = managers.select_related("employee")
 
-            image_url = (
-                request.build_absolute_uri(manager.image.url)
-                if manager.image else None
-            )
+        managers, next_cursor = split_page(
+            keyset_page(managers, after, limit), limit
+        )
 
-            response_list.append({
-                "id": manager.id,
-                "email": manager.email,
-                "name": emp.name if emp else "",
-                "empid": emp.empid if emp else "",
-                "image_url": image_url,
-                "is_superadmin": manager.is_superadmin,
-                "is_hr": manager.is_hr,
-                "is_manager": manager.is_manager,
-            })
+        response_list = [
+            {name: MANAGER_LISTING[name][1](manager, request) for name in fields}
+            for manager in managers
+        ]
+
+        return paginated_response(
+            JsonResponse(
+                {"managers": response_list, "next_cursor": next_cursor},
+                status=200
+            ),
+            next_cursor
+        )
 
-        return JsonResponse({"managers": response_list}, status=200)
+    except PaginationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     except Exception as e:
         return JsonResponse(
@@ -896,7 +1222,14 @@ def get_managers(request):
             openapi.IN_HEADER,
             type=openapi.TYPE_STRING,
             required=True,
-        )
+        ),
+        openapi.Parameter(
+            "direct",
+            openapi.IN_QUERY,
+            description="Only direct reports instead of the whole subtree",
+            type=openapi.TYPE_BOOLEAN,
+        ),
+        *listing_parameters,
     ],
     tags=["Manager"],
 )
@@ -904,22 +1237,12 @@ def get_managers(request):
 @permission_classes([JWTAuthenticationPermission,IsManager])
 def get_manager_employees(request, id):
 
-    current_user = request.user_obj
     if request.method != "GET":
         return JsonResponse({"error": "GET request required"}, status=400)
 
-    auth = request.headers.get("Authorization")
-    if not auth or not auth.startswith("Bearer "):
-        return JsonResponse({"error": "Authorization missing"}, status=401)
-
-    token = auth.split(" ")[1]
-    payload = decode_access_token(token)
-    if not payload:
-        return JsonResponse({"error": "Invalid token"}, status=401)
-
-    current_user = User.objects.filter(email=payload.get("sub")).first()
-    if not current_user:
-        return JsonResponse({"error": "User not found"}, status=404)
+    current_user, error_response = authenticate_request(request)
+    if error_response:
+        return error_response
 
     if not (current_user.is_superadmin or current_user.is_hr or current_user.is_manager):
         return JsonResponse(
@@ -942,28 +1265,29 @@ def get_manager_employees(request, id):
         if not manager_user:
             return JsonResponse({"error": "Manager not found"}, status=404)
 
-        mappings = EmployeeManagerMap.objects.filter(manager=manager_user)
+        after, limit = page_params(request)
+        fields = requested_fields(request, EmployeeSerializer.Meta.fields)
 
-        employee_list = []
+        # Direct reports only with ?direct=true, otherwise the whole subtree.
+        max_depth = 1 if to_bool(request.GET.get("direct")) else None
+        employees = Employee.objects.for_listing(fields).filter(
+            id__in=reports_of(manager_user.id, manager_user.employee_id, max_depth)
+        )
+        employees, next_cursor = split_page(
+            keyset_page(employees, after, limit), limit
+        )
 
-        for m in mappings:
-            emp = m.employee
-            user = User.objects.filter(employee=emp).first()
+        employee_list = EmployeeSerializer(
+            employees, many=True, fields=fields, context={"request": request}
+        ).data
 
-            image_url = (
-                request.build_absolute_uri(user.image.url)
-                if user and user.image else None
-            )
-
-            employee_list.append({
-                "id": emp.id,
-                "empid": emp.empid,
-                "name": emp.name,
-                "email": emp.email,
-                "image_url": image_url
-            })
+        return paginated_response(
+            JsonResponse(employee_list, safe=False, status=200),
+            next_cursor
+        )
 
-        return JsonResponse(employee_list, safe=False, status=200)
+    except PaginationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     except Exception as e:
         return JsonResponse(